@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import traffic_capture
+from client_connection import ConnectionStatistics, Datagram, pack_messages
+from configurations import COALESCE_COMMANDS
+from command_scheduler import CommandScheduler
+
+"""
+asyncio counterpart of client_connection.Connection.
+The protocol is driven by an event loop instead of a thread of its own. Received datagrams are handed directly to the
+input queue of an asyncio thinker, and messages put in the action queue are sent on the transport as soon as the
+command scheduler lets them, so no thread hand-offs are needed between receiving, thinking and sending.
+"""
+
+
+class AsyncConnection(asyncio.DatagramProtocol):
+
+    def __init__(self, UDP_IP, UDP_PORT, think, should_print=False, recorder: traffic_capture.TrafficRecorder = None,
+                 receive_stage=None):
+        super().__init__()
+        self.addr = (UDP_IP, UDP_PORT)
+        self.think = think
+        self.transport: asyncio.DatagramTransport = None
+        self.statistics = ConnectionStatistics()
+        self.action_queue = _TransportSender(self)
+        self.should_print = should_print
+        self.recorder = recorder
+        # Called with every received datagram like in client_connection.Connection
+        self.receive_stage = receive_stage
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data, addr) -> None:
+        # The client will be sent the init ok message from a different port.
+        # Adapt to this port. Each client gets it's own port like this.
+        if self.addr != addr:
+            self.addr = addr
+        # Decoded lazily by the parser
+        msg = Datagram(data, time.monotonic())
+        if self.recorder is not None:
+            self.recorder.record(traffic_capture.INBOUND, data, msg.received_at)
+        if self.should_print:
+            print(msg)
+        if self.receive_stage is not None:
+            msg = self.receive_stage(msg)
+        self.think.input_queue.put_nowait(msg)
+
+    def error_received(self, exc) -> None:
+        print("Connection to {0} received error: {1}".format(self.addr, exc))
+
+    def stop(self) -> None:
+        if self.transport is None or self.transport.is_closing():
+            return
+        self._send_message("(bye)")
+        self.transport.close()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def _send_message(self, msg: str):
+        # \0 is the string terminator for C++
+        self._send_datagram((msg + "\0").encode("utf-8"))
+
+    def _send_messages(self, messages: [str]):
+        self.statistics.messages_sent += len(messages)
+        for datagram in pack_messages(messages, coalesce=COALESCE_COMMANDS):
+            self._send_datagram(datagram)
+            self.statistics.datagrams_sent += 1
+
+    def _send_datagram(self, datagram: bytes):
+        self.transport.sendto(datagram, self.addr)
+        if self.recorder is not None:
+            self.recorder.record(traffic_capture.OUTBOUND, datagram)
+
+
+# Mimics the action queue of the threaded connection, but sends as soon as the scheduler lets it, since we are already
+# on the I/O loop
+class _TransportSender:
+
+    def __init__(self, connection: AsyncConnection):
+        self._connection = connection
+        # Only players use the async connection
+        self._scheduler = CommandScheduler(enforce_cycle_limits=True, on_put=self._send_ready,
+                                           superseded=connection.statistics.superseded_commands)
+
+    # Accepts a single message or a list of messages for the same cycle
+    def put(self, item, urgent=False):
+        self._scheduler.put(item, urgent=urgent)
+
+    def start_cycle(self):
+        self._scheduler.start_cycle()
+
+    def end_cycle(self):
+        self._scheduler.end_cycle()
+
+    def _send_ready(self):
+        messages = self._scheduler.take_messages()
+        if len(messages) > 0:
+            self._connection._send_messages(messages)
@@ -1,16 +1,136 @@
+import collections
 import select
 import socket
 import threading
-import queue
 import time
 
+from command_scheduler import CommandScheduler, END_OF_CYCLE
+import traffic_capture
+from configurations import MAX_COMMAND_DATAGRAM_SIZE, MAX_RECEIVE_DATAGRAM_SIZE, WARNING_PREFIX, \
+    SERVER_STARTUP_TIMEOUT
+
 """
 This class is used by both player, trainer, coach and fake monitor for connecting to the server.
+By default every connection runs its own thread polling the socket. If a shared io_reactor.IOReactor is given,
+the connection does not start a thread of its own, and the reactor receives and sends on its behalf instead.
+
+The action queue accepts single messages as well as lists of messages meant for the same cycle.
+For players, the action queue (a command_scheduler.CommandScheduler) drops the commands the server would reject in a
+cycle, and sends urgent commands first.
+For players, everything waiting in the queue is coalesced into as few datagrams as possible, since the server accepts
+several commands in one message, f.ex. (dash 100)(turn_neck 30)(change_view narrow high). In synchronous mode a
+datagram ends with (done), so the commands of the next cycle are never sent together with the commands of this one.
+The trainer, coach and fake monitor send every message on its own.
+
+Datagrams are handed to the thinker as Datagram objects holding the received bytes and the time they were received.
+They are only decoded when parsed, so the decoding happens in the thinker thread instead of the I/O thread.
+The datagrams read together, usually the messages of one cycle, are handed over together.
+
+If a traffic_capture.TrafficRecorder is given, every datagram received and sent is recorded.
+If a receive stage is given, it is called with every received datagram in the I/O thread, and what it returns is
+handed to the thinker instead. Players use parsing.read_percept, see percepts.py.
+
+The connected event is set when the server has answered for the first time, which is the answer to the init message.
+From then on, messages are sent to the port the server answered from.
 """
 
+# These messages must reach the server on their own
+_UNCOALESCABLE_PREFIXES = ("(init", "(reconnect", "(dispinit", "(bye")
+
+
+class Datagram:
+    __slots__ = ["payload", "received_at"]
+
+    def __init__(self, payload, received_at=None) -> None:
+        self.payload: bytes = payload
+        # time.monotonic() when the datagram was received
+        self.received_at = received_at
+
+    def decode(self) -> str:
+        return str(self.payload, "utf-8")
+
+    def startswith(self, prefix: bytes) -> bool:
+        return self.payload[:len(prefix)] == prefix
+
+    def __len__(self):
+        return len(self.payload)
+
+    def __str__(self) -> str:
+        return self.decode()
+
+
+class ConnectionStatistics:
+
+    def __init__(self) -> None:
+        self.messages_sent = 0
+        self.datagrams_sent = 0
+        # Datagrams larger than the maximum receive size
+        self.truncated_datagrams = 0
+        # Commands dropped by the command scheduler by command name, because a newer command replaced them
+        self.superseded_commands = collections.Counter()
+        # Errors of the socket while receiving, f.ex. connection refused after the server closed its port
+        self.receive_errors = 0
+
+    # Each datagram costs one sendto system call and one packet for the server to parse
+    def saved_datagrams(self):
+        return self.messages_sent - self.datagrams_sent
+
+    def add(self, other):
+        self.messages_sent += other.messages_sent
+        self.datagrams_sent += other.datagrams_sent
+        self.truncated_datagrams += other.truncated_datagrams
+        self.superseded_commands.update(other.superseded_commands)
+        self.receive_errors += other.receive_errors
+
+
+# Probes the server until it answers, so the clients are not connected before the server is listening.
+# (init) without a team name is answered with an error, so the probe does not take the place of a player.
+# Returns False if the server did not answer before the timeout
+def wait_for_server(UDP_IP, UDP_PORT, timeout=SERVER_STARTUP_TIMEOUT, interval=0.05) -> bool:
+    end_time = time.monotonic() + timeout
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        while time.monotonic() < end_time:
+            try:
+                sock.sendto(b"(init)\0", (UDP_IP, UDP_PORT))
+                if select.select([sock], [], [], interval)[0]:
+                    sock.recvfrom(MAX_RECEIVE_DATAGRAM_SIZE)
+                    return True
+            except ConnectionError:
+                # Port unreachable. The server has not opened its socket yet
+                time.sleep(interval)
+    return False
+
+
+# Packs messages into as few datagrams as possible without exceeding max_size bytes (including the terminator)
+def pack_messages(messages: [str], max_size=MAX_COMMAND_DATAGRAM_SIZE, coalesce=True) -> [bytes]:
+    datagrams = []
+    current = b""
+    for msg in messages:
+        encoded = msg.encode("utf-8")
+        if not coalesce or msg.startswith(_UNCOALESCABLE_PREFIXES):
+            if current:
+                datagrams.append(current + b"\0")
+                current = b""
+            datagrams.append(encoded + b"\0")
+            continue
+        if current and len(current) + len(encoded) + 1 > max_size:
+            datagrams.append(current + b"\0")
+            current = b""
+        current += encoded
+        if msg == END_OF_CYCLE:
+            datagrams.append(current + b"\0")
+            current = b""
+    if current:
+        datagrams.append(current + b"\0")
+    return datagrams
+
+
 class Connection(threading.Thread):
 
-    def __init__(self, UDP_IP, UDP_PORT, think, should_print=False):
+    def __init__(self, UDP_IP, UDP_PORT, think, should_print=False, reactor=None, coalesce=False,
+                 max_datagram_size=MAX_COMMAND_DATAGRAM_SIZE, max_receive_size=MAX_RECEIVE_DATAGRAM_SIZE,
+                 schedule_player_commands=False,
+                 recorder: traffic_capture.TrafficRecorder = None, receive_stage=None):
         super().__init__()
         self._stop_event = threading.Event()
         self.addr = (UDP_IP, UDP_PORT)
@@ -18,33 +138,50 @@ class Connection(threading.Thread):
         self.sock.setblocking(False)
         self.think = think
         self.player_conn = None
-        self.action_queue = queue.Queue()
+        self.reactor = reactor
+        self.statistics = ConnectionStatistics()
+        # Let the reactor know, that there is something to send
+        on_put = None if reactor is None else lambda: reactor.request_flush(self)
+        self.action_queue = CommandScheduler(enforce_cycle_limits=schedule_player_commands, on_put=on_put,
+                                             superseded=self.statistics.superseded_commands)
+        # Datagrams that are ready to be sent, but could not be sent yet because the socket was not writable
+        self._outbox = collections.deque()
+        self.coalesce = coalesce
+        self.max_datagram_size = max_datagram_size
+
+        self.max_receive_size = max_receive_size
+        self.recorder = recorder
+        self.receive_stage = receive_stage
         self.last_send_time = 0
         self.sending = False
         self.should_print = should_print
+        # Set when the server has answered the init message
+        self.connected = threading.Event()
 
     def start(self):
+        if self.reactor is not None:
+            self.reactor.register(self)
+            return
         super().start()
 
+    def join(self, timeout=None):
+        # Connections driven by the reactor never start a thread
+        if self.reactor is not None:
+            return
+        super().join(timeout)
+
     def run(self):
         super().run()
         while True:
-            while True:
-                if self._stop_event.is_set():
-                    return
-                msg = self._receive_message()
-                if msg is None:
-                    break
-                if self.should_print:
-                    print(msg)
-                self.think.input_queue.put(msg)
-
-            while not self.action_queue.empty():
-                self.sending = True
-                if self._stop_event.is_set():
-                    return
-                msg = self.action_queue.get()
-                self._send_message(msg)
+            if self._stop_event.is_set():
+                return
+            # The messages of a cycle arrive together, so everything received is read after waiting once
+            if select.select([self.sock], [], [], 0.01)[0]:
+                self._on_readable()
+
+            if self._stop_event.is_set():
+                return
+            self._flush_actions()
 
             if self._stop_event.is_set():
                 return
@@ -52,6 +189,13 @@ class Connection(threading.Thread):
     def stop(self) -> None:
         self._stop_event.set()
         self._send_bye()
+        if self.reactor is not None:
+            self.reactor.unregister(self)
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def is_stopped(self):
+        return self._stop_event.is_set()
 
     def _send_bye(self):
         self._send_message("(bye)")
@@ -60,14 +204,88 @@ class Connection(threading.Thread):
         # \0 is the string terminator for C++
         bytes_to_send = (msg + "\0").encode("utf-8")
         self.sock.sendto(bytes_to_send, self.addr)
+        if self.recorder is not None:
+            self.recorder.record(traffic_capture.OUTBOUND, bytes_to_send)
+
+    # Sends everything in the action queue. Returns False if the socket stopped accepting messages.
+    def _flush_actions(self) -> bool:
+        messages = self.action_queue.take_messages()
+        if len(messages) > 0:
+            self.sending = True
+            self.statistics.messages_sent += len(messages)
+            self._outbox.extend(pack_messages(messages, self.max_datagram_size, self.coalesce))
+
+        while len(self._outbox) > 0:
+            if self._stop_event.is_set():
+                return True
+            try:
+                self.sock.sendto(self._outbox[0], self.addr)
+            except BlockingIOError:
+                return False
+            datagram = self._outbox.popleft()
+            self.statistics.datagrams_sent += 1
+            if self.recorder is not None:
+                self.recorder.record(traffic_capture.OUTBOUND, datagram)
+        return True
+
+    def _receive_error(self, error: OSError):
+        self.statistics.receive_errors += 1
+        print(WARNING_PREFIX + "Could not receive from {0}: {1}".format(self.addr, error))
 
-    def _receive_message(self):
-        ready = select.select([self.sock], [], [], 0.01)
-        if ready[0]:
-            player_info, address = self.sock.recvfrom(2048)
+    # Waits until everything in the action queue has been sent. Returns False on timeout
+    def wait_until_sent(self, timeout=1) -> bool:
+        end_time = time.monotonic() + timeout
+        while not self.action_queue.empty() or len(self._outbox) > 0:
+            if time.monotonic() > end_time or self._stop_event.is_set():
+                return False
+            time.sleep(0.005)
+        return True
+
+    # Called by the reactor when the socket has data. Reads until the socket is drained.
+    # The datagrams read together are stamped with the time the socket became readable.
+    def _on_readable(self):
+        received_at = time.monotonic()
+        received = []
+        # One extra byte makes it possible to detect datagrams, that were larger than the maximum
+        receive_size = self.max_receive_size + 1
+        while True:
+            try:
+                payload, address = self.sock.recvfrom(receive_size)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                # The reactor serves other connections too, so one failing socket must not stop it
+                self._receive_error(e)
+                break
             # The client will be sent the init ok message from a different port.
             # Adapt socket to this port. Each client gets it's own port like this.
             if self.addr != address:
                 self.addr = address
-            return player_info.decode()
-        return None
\ No newline at end of file
+            if not self.connected.is_set():
+                self.connected.set()
+
+            if len(payload) > self.max_receive_size:
+                self.statistics.truncated_datagrams += 1
+                print(WARNING_PREFIX + "Dropped datagram larger than {0} bytes from {1}".format(self.max_receive_size,
+                                                                                               address))
+                continue
+            if self.recorder is not None:
+                self.recorder.record(traffic_capture.INBOUND, payload, received_at)
+            received.append(Datagram(payload, received_at))
+        if len(received) > 0:
+            self._deliver(received)
+
+    # The messages read together are queued together, so the thinker is woken once for them
+    def _deliver(self, messages):
+        if self.should_print:
+            for msg in messages:
+                print(msg)
+        if self.receive_stage is not None:
+            messages = [self.receive_stage(msg) for msg in messages]
+        input_queue = self.think.input_queue
+        if hasattr(input_queue, "put_all"):
+            input_queue.put_all(messages)
+        else:
+            for msg in messages:
+                input_queue.put(msg)
+
@@ -8,13 +8,14 @@ from coaches.coach.coachThinker import CoachThinker
 class Coach(threading.Thread):
 
     # Start up the player
-    def __init__(self, team: str, UDP_PORT, UDP_IP) -> None:
+    def __init__(self, team: str, UDP_PORT, UDP_IP, reactor=None, synch_mode=False) -> None:
         # Init thinker thread
         super().__init__()
         self._stop_event = threading.Event()
-        self.think: CoachThinker = CoachThinker(team_name=team)
+        self.think: CoachThinker = CoachThinker(team_name=team, synch_mode=synch_mode)
         # Init player connection thread
-        self.coach_conn = client_connection.Connection(UDP_PORT=UDP_PORT, UDP_IP=UDP_IP, think=self.think)
+        self.coach_conn = client_connection.Connection(UDP_PORT=UDP_PORT, UDP_IP=UDP_IP, think=self.think,
+                                                      reactor=reactor)
         # Give reference of connection to thinker thread
         self.think.connection = self.coach_conn
 
@@ -0,0 +1,77 @@
+import time
+
+from configurations import SERVER_CYCLE_LENGTH, WARNING_PREFIX
+from soccer_sim import SoccerSim
+from statisticsmodule import log_parser, log_segments
+
+"""
+Runs many trainer scenarios on the same server and clients, instead of starting a SoccerSim for every scenario.
+Between scenarios the trainer stops the game, the players forget the previous scenario and move back to their
+starting positions, and the commands of the next scenario are sent by the trainer and the coach.
+The ticks of every scenario are remembered, so the logs can be split and parsed per scenario when the session ends.
+"""
+
+# Seconds to wait for the players to reset, before the next scenario is set up anyway
+PLAYER_RESET_TIMEOUT = 1
+
+
+class ScenarioSession:
+
+    def __init__(self, soccersim: SoccerSim, ticks_per_run: int, first_game_number=1) -> None:
+        if not soccersim.trainer_mode:
+            raise Exception("A scenario session needs a SoccerSim with trainer mode enabled")
+        self.soccersim = soccersim
+        self.ticks_per_run = ticks_per_run
+        self.first_game_number = first_game_number
+        # (start_tick, end_tick) of every scenario that has been run
+        self.segments: [(int, int)] = []
+
+    def start(self):
+        self.soccersim.start()
+        self.soccersim.clients_ready.wait()
+        if len(self.soccersim.player_thinkers()) == 0:
+            print(WARNING_PREFIX + "The players run in other processes, and are not reset between scenarios")
+
+    # Sets up the scenario, and plays it for ticks_per_run ticks
+    def run_scenario(self, commands: [str], coach_msgs: [str]):
+        trainer = self.soccersim.trainer
+        trainer.think.change_game_mode("before_kick_off")
+        self._reset_players()
+
+        # Players not moved by the scenario start from their starting positions, the ball from the center
+        trainer.think.say_command("(move (ball) 0 0)")
+        trainer.think.say_command("(recover)")
+        for command in commands:
+            trainer.think.say_command(command)
+        if self.soccersim.coach_1 is not None:
+            for msg in coach_msgs:
+                self.soccersim.coach_1.think.say(msg)
+            self.soccersim.coach_1.coach_conn.wait_until_sent()
+        trainer.connection.wait_until_sent()
+        # Let the server apply the commands
+        time.sleep(SERVER_CYCLE_LENGTH)
+
+        start_tick = trainer.think.world_view.sim_time
+        trainer.think.change_game_mode("play_on")
+        trainer.think.tick_bus.wait_for_tick(start_tick + self.ticks_per_run)
+        self.segments.append((start_tick, trainer.think.world_view.sim_time))
+
+    def _reset_players(self):
+        thinkers = self.soccersim.player_thinkers()
+        for thinker in thinkers:
+            thinker.request_scenario_reset()
+        end_time = time.monotonic() + PLAYER_RESET_TIMEOUT
+        for thinker in thinkers:
+            if not thinker.scenario_reset_done.wait(max(0.0, end_time - time.monotonic())):
+                print(WARNING_PREFIX + "Player {0} of {1} did not reset in time".format(
+                    thinker.player_state.num, thinker.player_state.team_name))
+
+    # Stops the server and the clients, and parses the logs of every scenario as a game of its own. The scenarios run
+    # so far are parsed, even if stopping fails
+    def stop(self):
+        try:
+            self.soccersim.stop(parse_logs=False)
+            self.soccersim.join()
+        finally:
+            log_dir = log_parser.DEFAULT_LOG_DIR if self.soccersim.log_dir is None else self.soccersim.log_dir
+            log_segments.parse_segments(log_dir, self.segments, self.first_game_number)
@@ -10,12 +10,13 @@ from coaches.trainer.trainer_thinker import TrainerThinker
 class Trainer(threading.Thread):
 
     # Start up the player
-    def __init__(self, UDP_PORT, UDP_IP) -> None:
+    def __init__(self, UDP_PORT, UDP_IP, reactor=None, synch_mode=False) -> None:
         super().__init__()
         self._stop_event = threading.Event()
-        self.think: TrainerThinker = TrainerThinker()
+        self.think: TrainerThinker = TrainerThinker(synch_mode=synch_mode)
         # Init player connection thread
-        self.connection = client_connection.Connection(UDP_PORT=UDP_PORT, UDP_IP=UDP_IP, think=self.think)
+        self.connection = client_connection.Connection(UDP_PORT=UDP_PORT, UDP_IP=UDP_IP, think=self.think,
+                                                        reactor=reactor)
         # Give reference of connection to thinker thread
         self.think.connection = self.connection
 
@@ -4,13 +4,15 @@ import time
 from random import random, randint
 
 import client_connection
+from configurations import INIT_TIMEOUT, WARNING_PREFIX
+from tick_bus import TickBus
 import parsing
 from coaches.world_objects_coach import WorldViewCoach
 from coaches.trainer.scenarios import passing_strat
 
 
 class TrainerThinker(threading.Thread):
-    def __init__(self):
+    def __init__(self, synch_mode: bool = False):
         super().__init__()
         self._stop_event = threading.Event()
         self.team = "TRAINER"
@@ -19,6 +21,10 @@ class TrainerThinker(threading.Thread):
         self.connection: client_connection.Connection = None
         # Non processed inputs from server
         self.input_queue = queue.Queue()
+        # In synchronous mode the server waits for (done) from the coaches too, before simulating the next cycle
+        self.synch_mode = synch_mode
+        # The tick of every parsed message is published here. See tick_bus
+        self.tick_bus = TickBus()
         self.is_scenario_set = False
         self.scenario_commands: [] = []
 
@@ -29,28 +35,47 @@ class TrainerThinker(threading.Thread):
         init_string = "(init (version 16))"
         self.connection.action_queue.put(init_string)
 
-        time.sleep(1)
+        # Wait for the answer, since the server answers from the port the messages should be sent to from now on
+        if not self.connection.connected.wait(INIT_TIMEOUT):
+            print(WARNING_PREFIX + "{0} got no answer to init from the server".format(self.team))
 
         # Enable periodic messages from the server with positions of all objects
         self.connection.action_queue.put("(eye on)")
 
     def run(self) -> None:
         super().run()
-        time.sleep(4)
+        # Messages are handled once the server has accepted the trainer
+        while not self.connection.connected.wait(0.1):
+            if self._stop_event.is_set():
+                return
         while True:
             if self._stop_event.is_set():
                 return
             self._think()
 
     def _think(self) -> None:
-        time.sleep(0.1)
+        if self.synch_mode:
+            # Wait for messages instead of sleeping, so the server is not held back waiting for (done)
+            try:
+                self._handle_message(self.input_queue.get(timeout=0.1))
+            except queue.Empty:
+                pass
+        else:
+            time.sleep(0.1)
         while not self.input_queue.empty():
-            msg: str = self.input_queue.get()
-            parsing.parse_message_trainer(msg, self.world_view)
+            self._handle_message(self.input_queue.get())
+
+    def _handle_message(self, msg) -> None:
+        if parsing.is_think_message(msg):
+            self.connection.action_queue.put("(done)")
+            return
+        parsing.parse_message_trainer(msg, self.world_view)
+        self.tick_bus.publish(self.world_view.sim_time)
 
 
     def stop(self) -> None:
         self._stop_event.set()
+        self.tick_bus.close()
 
     def say_command(self, cmd):
         '''
@@ -0,0 +1,141 @@
+import collections
+import threading
+
+"""
+Outbound queue of a connection, that decides which of the queued commands are sent to the server.
+The server only executes one body command (dash, turn, kick, catch, move or tackle) per cycle, and rejects the rest.
+When the commands of several cycles are waiting to be sent, f.ex. because the thinker planned again before the
+connection got to send, only the newest body command is sent. An urgent body command, f.ex. a catch or a kick to
+stop the ball, is only replaced by a newer urgent command, and is sent first. Of the commands the server allows
+besides the body command (turn_neck, change_view, say etc.), only the newest of each kind is sent.
+All other messages (init, synch_see, clang, coach messages etc.) are sent in the order they were queued.
+
+The thinker calls start_cycle when the server starts a new cycle (it sends sense_body once every cycle), and
+end_cycle when it has queued its commands for the cycle. The commands are held back until then, so commands queued
+separately during a cycle are scheduled together. Once the commands of a cycle have been sent, commands queued later
+in the same cycle are held back until the send point of the next cycle, since the server would reject them.
+Until the first cycle has started, commands are sent right away.
+
+In synchronous mode (done) ends a cycle, so the commands on each side of it are scheduled separately.
+The rules are only enforced when enforce_cycle_limits is set, since the trainer uses move for other purposes.
+"""
+
+BODY_COMMANDS = frozenset(["dash", "turn", "kick", "catch", "move", "tackle"])
+EXTRA_COMMANDS = frozenset(["turn_neck", "change_view", "say", "pointto", "attentionto"])
+END_OF_CYCLE = "(done)"
+
+
+# (turn_neck 30) -> turn_neck
+def command_name(msg: str) -> str:
+    return msg[1:].split(" ", 1)[0].rstrip(")")
+
+
+def _is_command(msg: str) -> bool:
+    name = command_name(msg)
+    return name in BODY_COMMANDS or name in EXTRA_COMMANDS
+
+
+class CommandScheduler:
+
+    def __init__(self, enforce_cycle_limits=False, on_put=None, superseded: collections.Counter = None) -> None:
+        self.enforce_cycle_limits = enforce_cycle_limits
+        self._on_put = on_put
+        self._lock = threading.Lock()
+        # (message, urgent) in the order they were queued
+        self._pending = []
+        # Amount of dropped commands by command name
+        self.superseded = collections.Counter() if superseded is None else superseded
+        # Number of the current server cycle, counted from the first call of start_cycle
+        self._cycle = None
+        # Set when the thinker has queued its commands for the current cycle
+        self._send_point_reached = False
+        # The last cycle, in which commands were sent
+        self._sent_cycle = None
+
+    # Accepts a single message or a list of messages for the same cycle. Same signature as queue.Queue.put
+    def put(self, item, block=True, timeout=None, urgent=False):
+        if isinstance(item, str):
+            item = [item]
+        with self._lock:
+            self._pending.extend((msg, urgent) for msg in item if msg is not None)
+            if END_OF_CYCLE in item:
+                self._send_point_reached = True
+        if self._on_put is not None:
+            self._on_put()
+
+    def start_cycle(self):
+        with self._lock:
+            self._cycle = 0 if self._cycle is None else self._cycle + 1
+            self._send_point_reached = False
+
+    # The commands queued for the current cycle may be sent
+    def end_cycle(self):
+        with self._lock:
+            self._send_point_reached = True
+        if self._on_put is not None:
+            self._on_put()
+
+    def empty(self):
+        return len(self._pending) == 0
+
+    def qsize(self):
+        return len(self._pending)
+
+    # Removes the queued messages and returns the ones that should be sent, in the order they should be sent
+    def take_messages(self) -> [str]:
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+            if self.enforce_cycle_limits and self._cycle is not None:
+                if self._send_point_reached and self._sent_cycle != self._cycle:
+                    if any(_is_command(msg) for msg, _ in pending):
+                        self._sent_cycle = self._cycle
+                else:
+                    # Other messages are not limited per cycle, and are sent right away
+                    self._pending = [entry for entry in pending if _is_command(entry[0])]
+                    pending = [entry for entry in pending if not _is_command(entry[0])]
+
+        if not self.enforce_cycle_limits:
+            return [msg for msg, _ in pending]
+
+        messages = []
+        cycle = []
+        for entry in pending:
+            cycle.append(entry)
+            if entry[0] == END_OF_CYCLE:
+                messages.extend(self._schedule_cycle(cycle))
+                cycle = []
+        messages.extend(self._schedule_cycle(cycle))
+        return messages
+
+    def _schedule_cycle(self, entries) -> [str]:
+        body = None
+        body_is_urgent = False
+        extras = {}
+        others = []
+        end_of_cycle = []
+        for msg, urgent in entries:
+            name = command_name(msg)
+            if name in BODY_COMMANDS:
+                # An urgent command is only replaced by a newer urgent command
+                if body is not None and body_is_urgent and not urgent:
+                    self.superseded[name] += 1
+                    continue
+                if body is not None:
+                    self.superseded[command_name(body)] += 1
+                body = msg
+                body_is_urgent = urgent
+            elif name in EXTRA_COMMANDS:
+                if name in extras:
+                    self.superseded[name] += 1
+                extras[name] = msg
+            elif msg == END_OF_CYCLE:
+                end_of_cycle.append(msg)
+            else:
+                others.append(msg)
+
+        if body is None:
+            return others + list(extras.values()) + end_of_cycle
+        if body_is_urgent:
+            return [body] + others + list(extras.values()) + end_of_cycle
+        return others + [body] + list(extras.values()) + end_of_cycle
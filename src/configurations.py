@@ -26,6 +26,27 @@ QUANTIZE_STEP_LINES = 0.01
 
 EPSILON = 1.0e-10
 
+# -----------------  Networking --------------------- #
+# Send all commands queued for the same cycle to the server in a single datagram
+COALESCE_COMMANDS = True
+# Largest datagram sent to the server when coalescing commands. The server accepts messages up to 8192 bytes
+MAX_COMMAND_DATAGRAM_SIZE = 1024
+# Largest datagram accepted from the server. Larger datagrams are dropped and counted as truncated
+MAX_RECEIVE_DATAGRAM_SIZE = 8192
+# Parse the see, sense_body and hear messages of the players in the I/O thread, and let the thinkers only apply the
+# parsed percepts. See percepts.py
+PARSE_IN_RECEIVE_STAGE = False
+
+# -----------------  Timing --------------------- #
+# Length of a server cycle in seconds
+SERVER_CYCLE_LENGTH = 0.1
+# Seconds after the estimated start of a server cycle at which the players send their commands
+ACTION_OFFSET_IN_CYCLE = 0.03
+# Seconds to wait for a newly started server to answer, before the clients are connected anyway
+SERVER_STARTUP_TIMEOUT = 10
+# Seconds to wait for the server to answer the init message of a client
+INIT_TIMEOUT = 5
+
 # -----------------  Uppaal Strategies --------------------- #
 # Make team use strategies by adding the team name to these lists
 # For example DRIBBLE_OR_PASS_TEAMS = [TEAM_1_NAME] would make team one use possession model.
@@ -38,3 +59,12 @@ DRIBBLE_INDICATOR = "DRIBBLE_FORWARD"
 PASS_INDICATOR = "PASS_TO:"
 
 USING_PASS_CHAIN_STRAT = False
+
+# Strategies generated at the same time by the players of a process. None means one per CPU core
+STRATEGY_WORKERS = None
+# Strategy requests waiting for a worker. When the queue is full, the oldest request is dropped
+STRATEGY_QUEUE_LENGTH = 22
+# Seconds a strategy request may wait for a worker, before it is cancelled
+STRATEGY_REQUEST_DEADLINE = 1.0
+# Server cycles the game may move on while a strategy request waits, before it is cancelled as stale
+STRATEGY_MAX_AGE_CYCLES = 5
@@ -0,0 +1,187 @@
+import csv
+import json
+import re
+from pathlib import Path
+
+import configurations
+from configurations import WARNING_PREFIX
+from match_farm import MatchFarm
+from soccer_sim import THREADED_CLIENT_MODEL
+
+"""
+Runs an experiment described by a spec file, instead of editing main.py and configurations.py between runs.
+The spec lists variants of the configuration, and how many games to play with each:
+
+{
+    "team_names": ["Team_1", "Team_2"],
+    "num_players": 11,
+    "ticks_per_match": 6000,
+    "max_parallel": null,
+    "variants": [
+        {"name": "baseline", "repetitions": 10, "configuration": {}},
+        {"name": "possession", "repetitions": 10, "configuration": {"DRIBBLE_OR_PASS_TEAMS": ["Team_1"]}}
+    ]
+}
+
+Only "variants" is required. The configuration of a variant overrides values of configurations.py.
+The games are played in parallel by a MatchFarm, every game in a directory named <variant>_<repetition>. The
+repetitions are interleaved, so a change of the load on the host during the experiment affects all variants alike.
+
+When all games are done, the possession, field progress, kick and stamina files of the games are collected into
+aggregated/<variant>, and aggregated/summary.csv holds the mean of every column per variant.
+"""
+
+_VARIANT_NAME_RE = re.compile("^[A-Za-z0-9_-]+$")
+
+SUM = "sum"
+MEAN = "mean"
+# Statistics files of a game to aggregate, and how their rows are reduced to one value per game.
+# The first column (game number or tick) is not aggregated
+AGGREGATED_FILES = [("possession/possession.csv", SUM),
+                    ("fieldprogress/fieldprogress.csv", SUM),
+                    ("*/kicks.csv", SUM),
+                    ("*/kicks_successes.csv", SUM),
+                    ("*/average_stamina.csv", MEAN)]
+
+
+class Variant:
+
+    def __init__(self, name: str, repetitions: int, configuration: dict) -> None:
+        self.name = name
+        self.repetitions = repetitions
+        self.configuration = configuration
+
+
+class ExperimentSpec:
+
+    def __init__(self, variants: [Variant], team_names: [str] = None, num_players=11, ticks_per_match=6000,
+                 max_parallel: int = None, client_model: str = THREADED_CLIENT_MODEL, synch_mode=False) -> None:
+        self.variants = variants
+        self.team_names = [configurations.TEAM_1_NAME, configurations.TEAM_2_NAME] if team_names is None \
+            else team_names
+        self.num_players = num_players
+        self.ticks_per_match = ticks_per_match
+        self.max_parallel = max_parallel
+        self.client_model = client_model
+        self.synch_mode = synch_mode
+
+    # (variant, repetition, configuration) of every game, with the repetitions of the variants interleaved
+    def matches(self) -> [(str, int, dict)]:
+        matches = []
+        for repetition in range(max(variant.repetitions for variant in self.variants)):
+            for variant in self.variants:
+                if repetition < variant.repetitions:
+                    matches.append((variant.name, repetition, variant.configuration))
+        return matches
+
+
+def read_spec(path: Path) -> ExperimentSpec:
+    with open(path, "r") as file:
+        spec = json.load(file)
+    return parse_spec(spec)
+
+
+def parse_spec(spec: dict) -> ExperimentSpec:
+    if len(spec.get("variants", [])) == 0:
+        raise Exception("Experiment spec has no variants")
+    variants = []
+    for entry in spec["variants"]:
+        name = entry.get("name")
+        if name is None or not _VARIANT_NAME_RE.match(name):
+            raise Exception("Variant names may only contain letters, digits, '_' and '-': " + str(name))
+        if name in [variant.name for variant in variants]:
+            raise Exception("Variant defined twice: " + name)
+        repetitions = entry.get("repetitions", 1)
+        if not isinstance(repetitions, int) or repetitions < 1:
+            raise Exception("Variant {0} needs at least one repetition".format(name))
+        configuration = entry.get("configuration", {})
+        for key in configuration:
+            if not key.isupper() or not hasattr(configurations, key):
+                raise Exception("Unknown configuration in variant {0}: {1}".format(name, key))
+        variants.append(Variant(name, repetitions, configuration))
+
+    unknown = set(spec.keys()) - {"variants", "team_names", "num_players", "ticks_per_match", "max_parallel",
+                                  "client_model", "synch_mode"}
+    if len(unknown) > 0:
+        raise Exception("Unknown fields in experiment spec: " + ", ".join(sorted(unknown)))
+    return ExperimentSpec(variants, spec.get("team_names"), spec.get("num_players", 11),
+                          spec.get("ticks_per_match", 6000), spec.get("max_parallel"),
+                          spec.get("client_model", THREADED_CLIENT_MODEL), spec.get("synch_mode", False))
+
+
+class ExperimentRunner:
+
+    def __init__(self, spec: ExperimentSpec, experiment_dir: Path) -> None:
+        self.spec = spec
+        self.experiment_dir = experiment_dir
+
+    def run(self):
+        self.experiment_dir.mkdir(parents=True, exist_ok=True)
+        farm = MatchFarm(num_matches=0, farm_dir=self.experiment_dir, team_names=self.spec.team_names,
+                         num_players=self.spec.num_players, max_parallel=self.spec.max_parallel,
+                         ticks_per_match=self.spec.ticks_per_match, client_model=self.spec.client_model,
+                         synch_mode=self.spec.synch_mode, matches=self.spec.matches())
+        farm.run()
+        aggregate(self.spec, self.experiment_dir)
+
+
+def _read_csv(path: Path) -> ([str], [[float]]):
+    with open(path, "r", newline="") as file:
+        lines = [line for line in csv.reader(file, skipinitialspace=True) if len(line) > 0]
+    if len(lines) == 0:
+        return None, []
+    return lines[0], [[float(value) for value in line] for line in lines[1:]]
+
+
+def _reduce(rows: [[float]], how: str) -> [float]:
+    columns = list(zip(*rows))[1:]
+    if how == MEAN:
+        return [sum(column) / len(column) for column in columns]
+    return [sum(column) for column in columns]
+
+
+# Collects the statistics files of every game into aggregated/<variant>, and writes the means per variant to
+# aggregated/summary.csv
+def aggregate(spec: ExperimentSpec, experiment_dir: Path):
+    aggregated_dir = experiment_dir / "aggregated"
+    summary_rows = []
+    for variant in spec.variants:
+        variant_dir = aggregated_dir / variant.name
+        variant_dir.mkdir(parents=True, exist_ok=True)
+        for pattern, how in AGGREGATED_FILES:
+            header = None
+            rows = []
+            per_game = []
+            for repetition in range(variant.repetitions):
+                stat_dir = experiment_dir / "{0}_{1}".format(variant.name, repetition) / "Statistics"
+                paths = sorted(stat_dir.glob(pattern))
+                if len(paths) == 0:
+                    print(WARNING_PREFIX + "No {0} for {1} repetition {2}".format(pattern, variant.name, repetition))
+                    continue
+                for path in paths:
+                    game_header, game_rows = _read_csv(path)
+                    if len(game_rows) == 0:
+                        continue
+                    header = game_header
+                    rows.extend([[repetition] + row for row in game_rows])
+                    per_game.append(_reduce(game_rows, how))
+            if header is None:
+                continue
+
+            with open(variant_dir / Path(pattern).name, "w") as file:
+                file.write(", ".join(["Variant", "Repetition"] + header) + "\n")
+                for row in rows:
+                    file.write(", ".join([variant.name, str(row[0])] + [_format(value) for value in row[1:]]) + "\n")
+            for column, values in zip(header[1:], zip(*per_game)):
+                summary_rows.append([variant.name, Path(pattern).name, column, sum(values) / len(values),
+                                     len(values)])
+
+    aggregated_dir.mkdir(parents=True, exist_ok=True)
+    with open(aggregated_dir / "summary.csv", "w") as file:
+        file.write("Variant, File, Column, Mean, Games\n")
+        for variant, file_name, column, mean, games in summary_rows:
+            file.write("{0}, {1}, {2}, {3:.3f}, {4}\n".format(variant, file_name, column, mean, games))
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if value == int(value) else str(value)
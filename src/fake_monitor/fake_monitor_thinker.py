@@ -4,6 +4,9 @@ import threading
 import time
 
 from client_connection import Connection
+from configurations import WARNING_PREFIX
+from fake_monitor.ground_truth import GroundTruthFeed
+from tick_bus import TickBus
 
 
 class FakeMonitorThinker(threading.Thread):
@@ -17,7 +20,11 @@ class FakeMonitorThinker(threading.Thread):
         self.start_time = time.time() + self.start_delay
         self.has_started_game = False
         self.current_tick = 0
-
+        # The tick of every show message is published here. See tick_bus
+        self.tick_bus = TickBus()
+        # The ball and players of every show message. See ground_truth
+        self.ground_truth = GroundTruthFeed()
+        self._show_parse_failed = False
 
     def start(self) -> None:
         super().start()
@@ -31,12 +38,19 @@ class FakeMonitorThinker(threading.Thread):
         while not self._stop_event.is_set():
             while not self.input_queue.empty():
                 # Parse message and update player state / world view
-                msg: str = self.input_queue.get()
+                msg: str = str(self.input_queue.get())
 
-                # Parse current tick
+                # Parse current tick and the state of the ball and the players
                 if "(show" in msg:
-                    tick = re.match(r'\(show ([0-9]*) \(.*', msg).group(1)
-                    self.current_tick = int(tick)
+                    try:
+                        self.current_tick = self.ground_truth.publish_message(msg).tick
+                    except (ValueError, IndexError):
+                        if not self._show_parse_failed:
+                            self._show_parse_failed = True
+                            print(WARNING_PREFIX + "Could not parse show message: " + msg)
+                        tick = re.match(r'\(show ([0-9]*) \(.*', msg).group(1)
+                        self.current_tick = int(tick)
+                    self.tick_bus.publish(self.current_tick)
 
                 if self.current_tick == 3000:
                     time.sleep(5)
@@ -52,4 +66,5 @@ class FakeMonitorThinker(threading.Thread):
 
 
     def stop(self) -> None:
-        self._stop_event.set()
\ No newline at end of file
+        self._stop_event.set()
+        self.tick_bus.close()
\ No newline at end of file
@@ -12,12 +12,13 @@ This was used for debugging and tests purposes.
 
 class FakeMonitorClient(threading.Thread):
 
-    def __init__(self, start_time: int, UDP_IP, UDP_PORT):
+    def __init__(self, start_time: int, UDP_IP, UDP_PORT, reactor=None):
         super().__init__()
         self._stop_event = threading.Event()
         self.start_time = start_time
         self.thinker = FakeMonitorThinker(start_time)
-        self.connection = client_connection.Connection(UDP_IP, UDP_PORT, self.thinker, should_print=False)
+        self.connection = client_connection.Connection(UDP_IP, UDP_PORT, self.thinker, should_print=False,
+                                                       reactor=reactor)
         self.thinker.connection = self.connection
 
 
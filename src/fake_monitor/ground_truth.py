@@ -0,0 +1,74 @@
+import threading
+
+import numpy
+
+from statisticsmodule import show_parser
+from statisticsmodule.show_parser import ShowFrame, BALL_COLUMNS, PLAYER_COLUMNS, MAX_PLAYERS_PER_TEAM
+
+"""
+The exact state of the game, as sent to the monitor in every tick, kept while the match is running.
+Statistics, the error of the players' localization and the code running the matches can read it during the match,
+without rcssmonitor and without parsing the logs afterwards.
+
+The last history ticks are kept in preallocated arrays, indexed by tick % history. Frames of older ticks are
+overwritten. To be told about every new tick, subscribe to the tick bus of the monitor, and read the frame of the tick
+from the feed.
+"""
+
+# Ticks kept by default. A full game is 6000 ticks
+GROUND_TRUTH_HISTORY = 1000
+
+
+class GroundTruthFeed:
+
+    def __init__(self, history=GROUND_TRUTH_HISTORY) -> None:
+        self.history = history
+        self._ticks = numpy.full(history, -1, dtype=int)
+        self._balls = numpy.full((history, len(BALL_COLUMNS)), numpy.nan)
+        self._players = numpy.full((history, 2 * MAX_PLAYERS_PER_TEAM, len(PLAYER_COLUMNS)), numpy.nan)
+        self._play_modes = [None] * history
+        self.latest_tick = -1
+        self._lock = threading.Lock()
+
+    # Called by the monitor for every show message. A later message of the same tick replaces the earlier
+    def publish(self, frame: ShowFrame) -> None:
+        slot = frame.tick % self.history
+        with self._lock:
+            self._ticks[slot] = frame.tick
+            self._balls[slot] = frame.ball
+            self._players[slot] = frame.players
+            self._play_modes[slot] = frame.play_mode
+            self.latest_tick = max(self.latest_tick, frame.tick)
+
+    def publish_message(self, msg: str) -> ShowFrame:
+        frame = show_parser.parse_show(msg)
+        self.publish(frame)
+        return frame
+
+    # A copy of the frame of the tick, or None if the tick has not been received or has been overwritten
+    def frame(self, tick: int) -> ShowFrame:
+        slot = tick % self.history
+        with self._lock:
+            if tick < 0 or self._ticks[slot] != tick:
+                return None
+            return ShowFrame(tick, self._balls[slot].copy(), self._players[slot].copy(), self._play_modes[slot])
+
+    def latest(self) -> ShowFrame:
+        return self.frame(self.latest_tick)
+
+    # (x, y) of a player in the tick, or None if the player was not on the field
+    def player_position(self, tick: int, side: str, unum: int) -> (float, float):
+        frame = self.frame(tick)
+        if frame is None:
+            return None
+        row = frame.player(side, unum)
+        if numpy.isnan(row[show_parser.X]):
+            return None
+        return float(row[show_parser.X]), float(row[show_parser.Y])
+
+    # (x, y) of the ball in the tick, or None if the tick is not kept
+    def ball_position(self, tick: int) -> (float, float):
+        frame = self.frame(tick)
+        if frame is None:
+            return None
+        return float(frame.ball[0]), float(frame.ball[1])
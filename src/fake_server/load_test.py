@@ -0,0 +1,65 @@
+import time
+
+from configurations import ACTION_OFFSET_IN_CYCLE, SERVER_CYCLE_LENGTH
+from fake_server.stub_server import StubServer
+from player.cycle_estimator import ServerCycleEstimator
+from player.player_client import Client
+from statisticsmodule import statistics
+
+"""
+Finds out how many players the Python clients can run on this host, before they start missing cycles.
+The players are connected to a fake_server.StubServer in teams of up to 11. Once they have started up, the server
+measures their response latency and the cycles they did not send any commands in.
+Run from src with: python -m fake_server.load_test
+"""
+
+PLAYERS_PER_TEAM = 11
+
+
+def run_load_test(num_players, cycle_length=0.1, duration=10, warm_up=3, stream=None, synch_mode=False):
+    server = StubServer(cycle_length=cycle_length, stream=stream, synch_mode=synch_mode)
+    server.start()
+
+    clients = []
+    try:
+        for player_num in range(num_players):
+            team = "Team{0}".format(player_num // PLAYERS_PER_TEAM + 1)
+            # The first player of every team is the goalie
+            player_type = "goalie" if player_num % PLAYERS_PER_TEAM == 0 else "NaN"
+            client = Client(team, server.port, server.host, player_type, synch_mode=synch_mode)
+            # Let the players act at the same point in the shorter or longer cycles
+            action_offset = ACTION_OFFSET_IN_CYCLE * cycle_length / SERVER_CYCLE_LENGTH
+            client.think.cycle_estimator = ServerCycleEstimator(cycle_length, action_offset)
+            client.start()
+            clients.append(client)
+
+        # The players start thinking as soon as the server has answered their init message. The warm up lets their
+        # cycle estimators settle on the cycles of the stub server, before the statistics are counted
+        time.sleep(warm_up)
+        server.reset_statistics()
+        time.sleep(duration)
+        total = server.total_statistics()
+        report = server.report()
+    finally:
+        for client in clients:
+            client.stop()
+            client.join()
+        server.stop()
+        server.join()
+    return total, report
+
+
+if __name__ == "__main__":
+    for cycle_length in [0.1, 0.05]:
+        for players in [1, 11, 22, 44]:
+            total, report = run_load_test(players, cycle_length)
+            missed_ratio = 0 if total.cycles == 0 else total.cycles_without_commands / total.cycles
+            print("{0} players, {1} ms cycles: {2:.1%} cycles without commands, {3}".format(
+                players, int(cycle_length * 1000), missed_ratio, total.text()))
+            statistics.append_to_csv("fake_server_load.csv",
+                                     "players, cycle_ms, cycles, cycles_without_commands, commands_per_second, "
+                                     "mean_latency_ms, p99_latency_ms",
+                                     "{0}, {1}, {2}, {3}, {4:.1f}, {5:.3f}, {6}".format(
+                                         players, int(cycle_length * 1000), total.cycles,
+                                         total.cycles_without_commands, total.commands_per_second(),
+                                         total.response_latency.mean_ms(), total.response_latency.percentile(99)))
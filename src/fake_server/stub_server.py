@@ -0,0 +1,265 @@
+import re
+import selectors
+import socket
+import threading
+import time
+
+from player.player import LatencyHistogram
+from traffic_capture import read_capture, INBOUND
+
+"""
+A stand-in for rcssserver, that speaks enough of the protocol to load test the clients without a real server.
+It answers (init ...), (synch_see), (clang ...) and (bye) like the server does, and gives every client a socket of
+its own, so the clients switch port after init as they would with rcssserver.
+Every cycle the messages of a stream are sent to all clients. The stream is either synthetic, or taken from a capture
+made by traffic_capture.TrafficRecorder.
+
+For every client the server measures the time from the messages of a cycle were sent until the first command
+arrived (until (done) in synchronous mode), the commands sent per second, and the cycles without any commands.
+"""
+
+# Messages, that are answered by the server instead of counted as commands
+_CONTROL_MESSAGES = ("(init", "(synch_see", "(clang", "(bye", "(done", "(eye", "(ear", "(reconnect")
+
+SYNTHETIC_SENSE_BODY = "(sense_body {0} (view_mode high normal) (stamina 8000 1 130600) (speed 0 0) (head_angle 0) " \
+                       "(kick 0) (dash 0) (turn 0) (say 0) (turn_neck 0) (catch 0) (move 0) (change_view 0) " \
+                       "(arm (movable 0) (expires 0) (target 0 0) (count 0)) (focus (target none) (count 0)) " \
+                       "(tackle (expires 0) (count 0)) (collision none) (foul  (charged 0) (card none)))"
+SYNTHETIC_SEE = "(see {0} ((f c) 20.1 -10) ((f c t) 40.4 -40) ((f c b) 30 30) ((f l t) 60.3 -30) ((f l b) 55.1 35) " \
+                "((g l) 40 0) ((b) 10 5 0 0) ((p \"OtherTeam\" 3) 15 10) ((l l) 40 -80))"
+SYNTHETIC_HEAR = "(hear {0} referee play_on)"
+
+_INIT_REGEX = re.compile("\\(init ([^ ()]+)")
+
+
+# Splits a datagram into its top level messages. (dash 100)(turn_neck 30) -> ["(dash 100)", "(turn_neck 30)"]
+def split_messages(payload: bytes) -> [str]:
+    text = payload.decode("utf-8", "replace").rstrip("\0")
+    messages = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(text):
+        if char == "(":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                messages.append(text[start:i + 1])
+    return messages
+
+
+class SyntheticStream:
+
+    def __init__(self, see_interval=1, hear_interval=100) -> None:
+        self.see_interval = see_interval
+        self.hear_interval = hear_interval
+
+    def messages_for_cycle(self, cycle) -> [str]:
+        messages = [SYNTHETIC_SENSE_BODY.format(cycle)]
+        if cycle % self.see_interval == 0:
+            messages.append(SYNTHETIC_SEE.format(cycle))
+        # The play mode is announced right away, so the players start playing
+        if cycle % self.hear_interval == 1:
+            messages.append(SYNTHETIC_HEAR.format(cycle))
+        return messages
+
+
+# Replays the messages a client received in a capture. A cycle starts at every sense_body, and the stream starts over
+# when the capture has been sent
+class RecordedStream:
+
+    def __init__(self, path) -> None:
+        self.cycles = []
+        for record in read_capture(path):
+            if record.direction != INBOUND:
+                continue
+            msg = record.payload.decode("utf-8", "replace").rstrip("\0")
+            if msg.startswith("(sense_body"):
+                self.cycles.append([])
+            if len(self.cycles) > 0 and msg.startswith(("(sense_body", "(see ", "(hear")):
+                self.cycles[-1].append(msg)
+        if len(self.cycles) == 0:
+            raise Exception("No cycles found in capture: " + str(path))
+
+    def messages_for_cycle(self, cycle) -> [str]:
+        return self.cycles[cycle % len(self.cycles)]
+
+
+class ClientStatistics:
+
+    def __init__(self) -> None:
+        self.response_latency = LatencyHistogram()
+        self.commands = 0
+        self.cycles = 0
+        self.cycles_without_commands = 0
+        self.started_at = time.monotonic()
+
+    def commands_per_second(self):
+        duration = time.monotonic() - self.started_at
+        return 0 if duration <= 0 else self.commands / duration
+
+    def text(self):
+        return "cycles: {0}, without commands: {1}, commands/s: {2:.1f}, response latency: {3}".format(
+            self.cycles, self.cycles_without_commands, self.commands_per_second(),
+            self.response_latency.text().split("\n")[0])
+
+
+class _StubClient:
+
+    def __init__(self, sock, address, team, side, unum) -> None:
+        self.sock = sock
+        self.address = address
+        self.team = team
+        self.side = side
+        self.unum = unum
+        self.statistics = ClientStatistics()
+        self.cycle_sent_at = None
+        self.has_responded = True
+
+    def send(self, msg: str):
+        self.sock.sendto((msg + "\0").encode("utf-8"), self.address)
+
+
+class StubServer(threading.Thread):
+
+    def __init__(self, host="127.0.0.1", port=0, cycle_length=0.1, stream=None, synch_mode=False) -> None:
+        super().__init__(name="StubServer")
+        self._stop_event = threading.Event()
+        self.cycle_length = cycle_length
+        self.stream = SyntheticStream() if stream is None else stream
+        # If set, (think) is sent after the messages of each cycle, and the response latency is measured until (done)
+        self.synch_mode = synch_mode
+        self.cycle = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.host = host
+        self.port = self.sock.getsockname()[1]
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.sock, selectors.EVENT_READ, None)
+        self._lock = threading.Lock()
+        self.clients: [_StubClient] = []
+        self._sides = {}
+
+    def run(self) -> None:
+        super().run()
+        next_cycle = time.monotonic() + self.cycle_length
+        while not self._stop_event.is_set():
+            for key, _ in self._selector.select(max(0.0, next_cycle - time.monotonic())):
+                self._receive(key.fileobj, key.data)
+            if time.monotonic() >= next_cycle:
+                next_cycle += self.cycle_length
+                # Do not try to catch up, if the server itself has fallen behind
+                next_cycle = max(next_cycle, time.monotonic())
+                self._send_cycle()
+
+        for client in self.clients:
+            client.sock.close()
+        self._selector.close()
+        self.sock.close()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    # Starts the measurements over, f.ex. when the clients are done starting up
+    def reset_statistics(self):
+        with self._lock:
+            for client in self.clients:
+                client.statistics = ClientStatistics()
+
+    def total_statistics(self) -> ClientStatistics:
+        total = ClientStatistics()
+        with self._lock:
+            for client in self.clients:
+                total.response_latency.add(client.statistics.response_latency)
+                total.commands += client.statistics.commands
+                total.cycles += client.statistics.cycles
+                total.cycles_without_commands += client.statistics.cycles_without_commands
+                total.started_at = client.statistics.started_at
+        return total
+
+    def report(self) -> str:
+        with self._lock:
+            lines = ["{0} {1}: {2}".format(client.team, client.unum, client.statistics.text())
+                     for client in self.clients]
+        lines.append("Total: " + self.total_statistics().text())
+        return "\n".join(lines)
+
+    def _send_cycle(self):
+        self.cycle += 1
+        messages = self.stream.messages_for_cycle(self.cycle)
+        with self._lock:
+            for client in self.clients:
+                if not client.has_responded:
+                    client.statistics.cycles_without_commands += 1
+                client.statistics.cycles += 1
+                client.has_responded = False
+                client.cycle_sent_at = time.monotonic()
+                for msg in messages:
+                    client.send(msg)
+                if self.synch_mode:
+                    client.send("(think)")
+
+    def _receive(self, sock, client):
+        try:
+            payload, address = sock.recvfrom(8192)
+        except (BlockingIOError, ConnectionError):
+            return
+        now = time.monotonic()
+        for msg in split_messages(payload):
+            if msg.startswith("(init"):
+                if client is None:
+                    self._connect(msg, address)
+                continue
+            if client is None:
+                continue
+            if msg.startswith("(synch_see"):
+                client.send("(ok synch_see)")
+            elif msg.startswith("(clang"):
+                client.send("(ok clang (ver 8 8))")
+            elif msg.startswith("(bye"):
+                self._disconnect(client)
+                return
+            elif msg.startswith("(done"):
+                if self.synch_mode:
+                    self._register_response(client, now)
+            elif not msg.startswith(_CONTROL_MESSAGES):
+                client.statistics.commands += 1
+                if not self.synch_mode:
+                    self._register_response(client, now)
+
+    def _register_response(self, client, now):
+        if client.has_responded or client.cycle_sent_at is None:
+            return
+        client.has_responded = True
+        client.statistics.response_latency.register(now - client.cycle_sent_at)
+
+    # (init TEAMNAME (version VERSION)) or (init TEAMNAME (version VERSION) (goalie))
+    def _connect(self, msg, address):
+        matched = _INIT_REGEX.match(msg)
+        if matched is None:
+            # Like rcssserver. Used by client_connection.wait_for_server to find out if the server is up
+            self.sock.sendto(b"(error illegal_command_form)\0", address)
+            return
+        team = matched.group(1)
+        if team not in self._sides:
+            self._sides[team] = "l" if len(self._sides) % 2 == 0 else "r"
+        unum = sum(1 for client in self.clients if client.team == team) + 1
+
+        # Every client gets a socket of its own, like with rcssserver
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((self.host, 0))
+        sock.setblocking(False)
+        client = _StubClient(sock, address, team, self._sides[team], unum)
+        with self._lock:
+            self.clients.append(client)
+        self._selector.register(sock, selectors.EVENT_READ, client)
+        client.send("(init {0} {1} before_kick_off)".format(client.side, unum))
+
+    def _disconnect(self, client):
+        with self._lock:
+            self.clients.remove(client)
+        self._selector.unregister(client.sock)
+        client.sock.close()
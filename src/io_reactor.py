@@ -0,0 +1,121 @@
+import selectors
+import socket
+import threading
+
+"""
+A single I/O thread, that owns the sockets of many client connections.
+Instead of every connection polling its own socket, the reactor waits on all sockets at once using the best selector
+available on the platform (epoll on Linux). Incoming datagrams are routed to the thinker of the connection that owns
+the socket, and the outbound action queues are flushed when something is put in them, or when the socket becomes
+writable again after having been full.
+
+Connections are attached by passing the reactor to the client_connection.Connection constructor.
+"""
+
+
+class IOReactor(threading.Thread):
+
+    def __init__(self):
+        super().__init__(name="IOReactor")
+        self._stop_event = threading.Event()
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        # Connections that have new messages in their action queue
+        self._pending_flush = set()
+        # Registrations requested by other threads. The selector is only modified by the reactor thread.
+        self._pending_registrations = []
+        # Connections waiting for their socket to become writable
+        self._blocked = set()
+
+        # Used to wake the reactor up, when another thread has work for it
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
+        self._selector.register(self._wakeup_recv, selectors.EVENT_READ, None)
+
+    def register(self, connection) -> None:
+        with self._lock:
+            self._pending_registrations.append((True, connection))
+            self._pending_flush.add(connection)
+        self._wakeup()
+
+    def unregister(self, connection) -> None:
+        with self._lock:
+            self._pending_registrations.append((False, connection))
+            self._pending_flush.discard(connection)
+        self._wakeup()
+
+    def request_flush(self, connection) -> None:
+        with self._lock:
+            self._pending_flush.add(connection)
+        self._wakeup()
+
+    def run(self) -> None:
+        super().run()
+        while not self._stop_event.is_set():
+            for key, mask in self._selector.select():
+                if key.data is None:
+                    self._drain_wakeup()
+                    continue
+                connection = key.data
+                if mask & selectors.EVENT_READ:
+                    connection._on_readable()
+                if mask & selectors.EVENT_WRITE:
+                    self._flush(connection)
+            self._process_pending()
+
+        self._selector.close()
+        self._wakeup_recv.close()
+        self._wakeup_send.close()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._wakeup()
+
+    def _process_pending(self):
+        with self._lock:
+            registrations = self._pending_registrations
+            self._pending_registrations = []
+            to_flush = self._pending_flush
+            self._pending_flush = set()
+
+        for should_register, connection in registrations:
+            if should_register:
+                self._selector.register(connection.sock, selectors.EVENT_READ, connection)
+            else:
+                self._blocked.discard(connection)
+                try:
+                    self._selector.unregister(connection.sock)
+                except KeyError:
+                    pass
+
+        for connection in to_flush:
+            if connection.is_stopped() or connection in self._blocked:
+                continue
+            self._flush(connection)
+
+    def _flush(self, connection):
+        if connection.is_stopped():
+            return
+        fully_sent = connection._flush_actions()
+        if fully_sent and connection in self._blocked:
+            self._blocked.discard(connection)
+            self._selector.modify(connection.sock, selectors.EVENT_READ, connection)
+        elif not fully_sent and connection not in self._blocked:
+            # Wait for the socket to become writable before sending the rest
+            self._blocked.add(connection)
+            self._selector.modify(connection.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, connection)
+
+    def _wakeup(self):
+        try:
+            self._wakeup_send.send(b"\0")
+        except (BlockingIOError, OSError):
+            # Wakeup already pending or reactor has been shut down
+            pass
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeup_recv.recv(1024):
+                pass
+        except BlockingIOError:
+            pass
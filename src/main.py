@@ -6,10 +6,14 @@ from pathlib import Path
 
 import configurations
 from coaches.trainer import scenarios
+from coaches.trainer.scenario_session import ScenarioSession
 from coaches.world_objects_coach import WorldViewCoach
-from configurations import TEAM_2_NAME, TEAM_1_NAME
+from configurations import TEAM_2_NAME, TEAM_1_NAME, SERVER_CYCLE_LENGTH
+from experiment_runner import ExperimentRunner, read_spec
 from fake_monitor.fake_monitor_thread import FakeMonitorClient
-from soccer_sim import SoccerSim
+from match_farm import MatchFarm
+from soccer_sim import SoccerSim, THREADED_CLIENT_MODEL, ASYNC_CLIENT_MODEL, PROCESS_CLIENT_MODEL, \
+    COOPERATIVE_CLIENT_MODEL
 from utils import DEBUG_DICT
 
 finished_successfully = False
@@ -25,6 +29,21 @@ def shut_down_gracefully() -> None:
     exit(0)
 
 
+# Generates the trainer commands and coach messages of a scenario
+def generate_scenario():
+    # Generate passing strat
+    if configurations.USING_PASS_CHAIN_STRAT:
+        while True:
+            try:
+                return scenarios.generate_commands_coachmsg_passing_strat(random.randint(0, 1000000000),
+                                                                          wv=WorldViewCoach(0, TEAM_1_NAME))
+            except Exception:
+                print("Generating...")
+    # For coach positioning strategy
+    return scenarios.generate_commands_coachmsg_goalie_positioning(random.randint(0, 1000000000),
+                                                                   wv=WorldViewCoach(0, TEAM_1_NAME))
+
+
 # Network settings
 # These are default values used by robocup for local hosts
 UDP_IP = "127.0.0.1"
@@ -43,6 +62,9 @@ MORE_SCENARIOS_TRAINER_MODE = False
 configurations.USING_PASS_CHAIN_STRAT = False
 NUM_SIMULATIONS = 100
 TICKS_PER_RUN = 100
+# Run all scenarios on the same server and clients. The players are reset between scenarios, and the logs are split
+# into one game per scenario when the session ends
+SCENARIO_SESSION = False
 
 # Run more games sequentially to test game performance
 # The fake monitor is implemented to spoof the soccer-sim and allow for runs without graphics, but still
@@ -50,12 +72,40 @@ TICKS_PER_RUN = 100
 MORE_GAMES_WITH_FAKE_MONITOR_MODE = False
 NUM_GAMES = 100
 
+# Run NUM_GAMES games in parallel, each with a server, ports and log directory of its own. A new game is started when
+# there are enough idle CPU cores for it. The logs and statistics of every game are saved in Statistics/farm
+MATCH_FARM_MODE = False
+# Most games running at once. None lets the idle CPU cores decide
+MAX_PARALLEL_GAMES = None
+
+# Run the variants and repetitions of an experiment spec in parallel, f.ex. Path(__file__).parent / "experiments" /
+# "models.json". The games and the statistics aggregated per variant are saved in Statistics/experiments
+EXPERIMENT_SPEC = None
+
 # Debugging information showed. See file constants.DEBUG_DICT to add more
 DEBUG_DICT["ALL"] = False
 
 # Enable coaches
 COACHES_ENABLED = False
 
+# Serve all client sockets from one shared I/O thread instead of one polling thread per connection
+SHARED_IO_REACTOR = False
+
+# How the players are run. THREADED_CLIENT_MODEL, ASYNC_CLIENT_MODEL (one asyncio event loop per team),
+# PROCESS_CLIENT_MODEL (players spread over a pool of processes) or COOPERATIVE_CLIENT_MODEL (players stepped
+# round-robin by one thread per CPU core)
+CLIENT_MODEL = THREADED_CLIENT_MODEL
+# Players in each process with PROCESS_CLIENT_MODEL. 1 runs every player in a process of its own.
+# None spreads the players evenly over the CPU cores
+PLAYERS_PER_PROCESS = None
+
+# Run the server in synchronous mode. A cycle is simulated as soon as all clients are done with the previous one,
+# so games finish faster than real time when the clients keep up
+SYNCH_MODE = False
+
+# Record the UDP traffic of every player to Statistics/captures, so it can be replayed with traffic_replay
+CAPTURE_TRAFFIC = False
+
 # Enable trainer for a single run
 TRAINER_SINGLE_RUN_ENABLED = False
 
@@ -65,30 +115,41 @@ if not stat_dir.exists():
     os.makedirs(stat_dir)
 game_number_path = stat_dir / "game_number.txt"
 game_number = 1
+capture_dir = stat_dir / "captures" if CAPTURE_TRAFFIC else None
 
 try:
     # Run multiple games sequentially
-    if MORE_SCENARIOS_TRAINER_MODE:
+    if MORE_SCENARIOS_TRAINER_MODE and SCENARIO_SESSION:
+        random.seed(123456237890)
+        soccersim: SoccerSim = SoccerSim(team_names=team_names,
+                                         num_players=num_players,
+                                         trainer_mode=True,
+                                         coaches_enabled=COACHES_ENABLED,
+                                         udp_player=UDP_PORT_PLAYER,
+                                         udp_trainer=UDP_PORT_TRAINER,
+                                         udp_coach=UDP_PORT_COACH,
+                                         udp_ip=UDP_IP,
+                                         enable_monitor=monitor_enabled,
+                                         shared_io_reactor=SHARED_IO_REACTOR,
+                                         client_model=CLIENT_MODEL,
+                                         synch_mode=SYNCH_MODE,
+                                         capture_dir=capture_dir,
+                                         players_per_process=PLAYERS_PER_PROCESS)
+        session = ScenarioSession(soccersim, TICKS_PER_RUN, first_game_number=game_number)
+        session.start()
+        try:
+            for sim in range(NUM_SIMULATIONS):
+                commands, coach_msgs = generate_scenario()
+                session.run_scenario(commands, coach_msgs)
+                print("Done with run {0} of {1}".format(sim + 1, NUM_SIMULATIONS))
+        finally:
+            # The scenarios that have been run are parsed, also if a scenario failed or the session was interrupted
+            session.stop()
+        finished_successfully = True
+    elif MORE_SCENARIOS_TRAINER_MODE:
         random.seed(123456237890)
         for sim in range(NUM_SIMULATIONS):
-            # Generate passing strat
-            if configurations.USING_PASS_CHAIN_STRAT:
-                generate_success = False
-                while not generate_success:
-                    try:
-                        commands, coach_msgs = scenarios.generate_commands_coachmsg_passing_strat(
-                            random.randint(0, 1000000000),
-                            wv=WorldViewCoach(0, TEAM_1_NAME))
-                        generate_success = True
-                    except Exception:
-                        print("Generating...")
-                        continue
-            else:
-                # For coach positioning strategy
-                commands, coach_msgs = scenarios.generate_commands_coachmsg_goalie_positioning(
-                        random.randint(0, 1000000000),
-                        wv=WorldViewCoach(0, TEAM_1_NAME))
-
+            commands, coach_msgs = generate_scenario()
 
             soccersim: SoccerSim = SoccerSim(team_names=team_names,
                                              num_players=num_players,
@@ -98,13 +159,17 @@ try:
                                              udp_trainer=UDP_PORT_TRAINER,
                                              udp_coach=UDP_PORT_COACH,
                                              udp_ip=UDP_IP,
-                                             enable_monitor=monitor_enabled)
+                                             enable_monitor=monitor_enabled,
+                                             shared_io_reactor=SHARED_IO_REACTOR,
+                                             client_model=CLIENT_MODEL,
+                                             synch_mode=SYNCH_MODE,
+                                             capture_dir=capture_dir,
+                                             players_per_process=PLAYERS_PER_PROCESS)
 
             soccersim.start()
 
-            # Wait for all clients to have started
-            while not soccersim.has_init_clients:
-                time.sleep(0.5)
+            # Wait for all clients to have been accepted by the server
+            soccersim.clients_ready.wait()
 
             # Make trainer say commands to move players around
             for command in commands:
@@ -118,13 +183,15 @@ try:
 
             trainer = soccersim.trainer
 
-            # Start game
-            time.sleep(2)
+            # Start game, when the server has received the commands of the trainer and the coach, and simulated a cycle
+            trainer.connection.wait_until_sent()
+            if soccersim.coach_1 is not None:
+                soccersim.coach_1.coach_conn.wait_until_sent()
+            time.sleep(SERVER_CYCLE_LENGTH)
             trainer.think.change_game_mode("play_on")
 
 
-            while trainer.think.world_view.sim_time < TICKS_PER_RUN:
-                pass
+            trainer.think.tick_bus.wait_for_tick(TICKS_PER_RUN)
 
             try:
                 with open(game_number_path, "w") as file:
@@ -139,6 +206,17 @@ try:
             print("Done with run {0} of {1}".format(sim + 1, NUM_SIMULATIONS))
             print('_' * 200)
             finished_successfully = True
+    elif EXPERIMENT_SPEC is not None:
+        experiment_dir = stat_dir / "experiments" / "{0}_{1}".format(Path(EXPERIMENT_SPEC).stem,
+                                                                     time.strftime("%Y%m%d%H%M%S"))
+        ExperimentRunner(read_spec(EXPERIMENT_SPEC), experiment_dir).run()
+        finished_successfully = True
+    elif MATCH_FARM_MODE:
+        farm = MatchFarm(num_matches=NUM_GAMES, farm_dir=stat_dir / "farm", team_names=team_names,
+                         num_players=num_players, max_parallel=MAX_PARALLEL_GAMES, udp_ip=UDP_IP,
+                         client_model=CLIENT_MODEL, synch_mode=SYNCH_MODE)
+        farm.run()
+        finished_successfully = True
     elif MORE_GAMES_WITH_FAKE_MONITOR_MODE:
         atexit.register(shut_down_gracefully)
         for game in range(NUM_GAMES):
@@ -150,11 +228,17 @@ try:
                                              udp_trainer=UDP_PORT_TRAINER,
                                              udp_coach=UDP_PORT_COACH,
                                              udp_ip=UDP_IP,
-                                             enable_monitor=False)
+                                             enable_monitor=False,
+                                             shared_io_reactor=SHARED_IO_REACTOR,
+                                             client_model=CLIENT_MODEL,
+                                             synch_mode=SYNCH_MODE,
+                                             capture_dir=capture_dir,
+                                             players_per_process=PLAYERS_PER_PROCESS)
 
             soccersim.start()
-            time.sleep(2)
-            fake_monitor = FakeMonitorClient(start_time=5, UDP_IP=UDP_IP, UDP_PORT=UDP_PORT_MONITOR)
+            soccersim.server_ready.wait()
+            fake_monitor = FakeMonitorClient(start_time=5, UDP_IP=UDP_IP, UDP_PORT=UDP_PORT_MONITOR,
+                                             reactor=soccersim.io_reactor)
             fake_monitor.start()
 
             try:
@@ -165,8 +249,7 @@ try:
             except Exception:
                 print("Log parser failed")
 
-            while fake_monitor.thinker.current_tick != 6000:
-                time.sleep(0.1)
+            fake_monitor.thinker.tick_bus.wait_for_tick(6000)
 
             soccersim.stop()
             soccersim.join()
@@ -183,7 +266,12 @@ try:
                                          udp_trainer=UDP_PORT_TRAINER,
                                          udp_coach=UDP_PORT_COACH,
                                          udp_ip=UDP_IP,
-                                         enable_monitor=monitor_enabled)
+                                         enable_monitor=monitor_enabled,
+                                         shared_io_reactor=SHARED_IO_REACTOR,
+                                         client_model=CLIENT_MODEL,
+                                         synch_mode=SYNCH_MODE,
+                                         capture_dir=capture_dir,
+                                         players_per_process=PLAYERS_PER_PROCESS)
 
         soccersim.start()
 
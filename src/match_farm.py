@@ -0,0 +1,242 @@
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+import configurations
+import uppaal
+from configurations import WARNING_PREFIX
+from fake_monitor.fake_monitor_thread import FakeMonitorClient
+from soccer_sim import SoccerSim, THREADED_CLIENT_MODEL
+from statisticsmodule import statistics
+
+"""
+Runs several matches at once, each with an rcssserver of its own.
+Every match gets a triple of free ports (player, trainer, coach), and a directory of its own, where the server writes
+its logs, the statistics of the match are written and the UPPAAL models and strategies are kept.
+The matches run in processes of their own, so the statistics and the UPPAAL directories of a match are not shared
+with the other matches.
+
+A match is only started, when there are enough idle CPU cores for it. Matches that do not get the CPU time they need
+miss cycles, which would corrupt their results. The farm waits a while after starting a match, so its load is measured
+before the next match is started. The least idle cores measured during every match is saved in match_farm.csv, so
+matches that ran on an overloaded host can be found afterwards.
+
+The matches can also be given as variants of the configuration, f.ex. by experiment_runner. The configuration of a
+variant is applied in the process of the match, and the directory of the match is named after the variant.
+"""
+
+# Ports of the first match. The ports of the following matches are found by adding PORT_STRIDE
+BASE_PORT = 6000
+PORT_STRIDE = 10
+# Idle CPU cores needed to start another match
+CORES_PER_MATCH = 2.0
+# Seconds to wait after starting a match, before its load is measured and the next match may start
+MATCH_WARM_UP = 10
+# Seconds between measurements of the idle CPU cores
+SAMPLE_INTERVAL = 1.0
+
+# Forked like player.process_runtime, so main.py is not run again in every match. The farm itself starts no threads
+_CONTEXT = multiprocessing.get_context("fork")
+
+
+class MatchSpec:
+
+    def __init__(self, index: int, ports: (int, int, int), directory: Path, variant: str = None,
+                 configuration: dict = None) -> None:
+        self.index = index
+        self.player_port, self.trainer_port, self.coach_port = ports
+        self.directory = directory
+        self.variant = variant
+        # Values of configurations.py to override in the process of the match
+        self.configuration = {} if configuration is None else configuration
+
+    def __str__(self) -> str:
+        return "match {0} on ports {1}/{2}/{3} in {4}".format(self.index, self.player_port, self.trainer_port,
+                                                             self.coach_port, self.directory)
+
+
+# Measures the idle CPU cores of the host from /proc/stat. Falls back to the load average on other systems
+class CpuSampler:
+
+    def __init__(self) -> None:
+        self.cores = os.cpu_count() or 1
+        self._last = self._read_proc_stat()
+
+    def idle_cores(self) -> float:
+        current = self._read_proc_stat()
+        if current is None or self._last is None:
+            return max(0.0, self.cores - os.getloadavg()[0])
+        idle = current[0] - self._last[0]
+        total = current[1] - self._last[1]
+        self._last = current
+        if total <= 0:
+            return self.cores
+        return self.cores * idle / total
+
+    @staticmethod
+    def _read_proc_stat():
+        try:
+            with open("/proc/stat", "r") as file:
+                # cpu  user nice system idle iowait irq softirq steal ...
+                fields = [int(field) for field in file.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        return fields[3] + fields[4], sum(fields[:8])
+
+
+# Returns True if the UDP ports are not used by another server
+def ports_are_free(ip, ports) -> bool:
+    for port in ports:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.bind((ip, port))
+        except OSError:
+            return False
+        finally:
+            sock.close()
+    return True
+
+
+_MISSING = object()
+
+
+# Overrides values of configurations.py in this process. Lists are changed in place, and modules that imported a value
+# by name get the new value too, so the override is seen no matter how the value was imported
+def apply_configuration(overrides: dict):
+    for name, value in overrides.items():
+        old = getattr(configurations, name, _MISSING)
+        if old is _MISSING or not name.isupper():
+            raise Exception("Unknown configuration: " + name)
+        if isinstance(old, list):
+            old[:] = value
+            continue
+        setattr(configurations, name, value)
+        for module in list(sys.modules.values()):
+            if module is not configurations and getattr(module, name, _MISSING) is old:
+                setattr(module, name, value)
+
+
+class MatchFarm:
+
+    # The matches are either num_matches matches of the current configuration, or given as a list of
+    # (variant, repetition, configuration overrides), f.ex. ("possession", 0, {"DRIBBLE_OR_PASS_TEAMS": ["Team1"]})
+    def __init__(self, num_matches: int, farm_dir: Path, team_names: [str], num_players: int, max_parallel: int = None,
+                 udp_ip="127.0.0.1", ticks_per_match=6000, client_model: str = THREADED_CLIENT_MODEL,
+                 synch_mode: bool = False, cores_per_match=CORES_PER_MATCH, matches: [(str, int, dict)] = None) -> None:
+        if matches is not None:
+            num_matches = len(matches)
+        self.num_matches = num_matches
+        self.matches = matches
+        self.farm_dir = farm_dir
+        self.team_names = team_names
+        self.num_players = num_players
+        self.cores_per_match = cores_per_match
+        if max_parallel is None:
+            max_parallel = max(1, int((os.cpu_count() or 1) // cores_per_match))
+        self.max_parallel = max_parallel
+        self.udp_ip = udp_ip
+        self.ticks_per_match = ticks_per_match
+        self.client_model = client_model
+        self.synch_mode = synch_mode
+        self.sampler = CpuSampler()
+        # Running matches as [spec, process, started_at, least idle cores measured]
+        self._running = []
+        self._next_port = BASE_PORT
+
+    def run(self):
+        started = 0
+        last_start = 0
+        while started < self.num_matches or len(self._running) > 0:
+            time.sleep(SAMPLE_INTERVAL)
+            idle_cores = self.sampler.idle_cores()
+            self._update_running(idle_cores)
+
+            if started == self.num_matches or len(self._running) >= self.max_parallel:
+                continue
+            if time.monotonic() - last_start < MATCH_WARM_UP:
+                continue
+            # The first match is always started, so the farm cannot stall on a busy host
+            if len(self._running) > 0 and idle_cores < self.cores_per_match:
+                continue
+            self._start_match(started)
+            started += 1
+            last_start = time.monotonic()
+
+    def _start_match(self, index):
+        spec = self._match_spec(index)
+        process = _CONTEXT.Process(target=_run_match, name="Match-{0}".format(index),
+                                   args=(spec, self.team_names, self.num_players, self.udp_ip, self.ticks_per_match,
+                                         self.client_model, self.synch_mode))
+        process.start()
+        print("Started " + str(spec))
+        self._running.append([spec, process, time.monotonic(), self.sampler.cores])
+
+    def _match_spec(self, index) -> MatchSpec:
+        if self.matches is None:
+            return MatchSpec(index, self._allocate_ports(), self.farm_dir / "match_{0}".format(index))
+        variant, repetition, configuration = self.matches[index]
+        return MatchSpec(index, self._allocate_ports(), self.farm_dir / "{0}_{1}".format(variant, repetition),
+                         variant, configuration)
+
+    def _allocate_ports(self):
+        used = {port for spec, _, _, _ in self._running
+                for port in (spec.player_port, spec.trainer_port, spec.coach_port)}
+        while True:
+            ports = (self._next_port, self._next_port + 1, self._next_port + 2)
+            self._next_port += PORT_STRIDE
+            if not used.intersection(ports) and ports_are_free(self.udp_ip, ports):
+                return ports
+
+    def _update_running(self, idle_cores):
+        for match in list(self._running):
+            spec, process, started_at, least_idle = match
+            # The load of a match is first measured when it has warmed up
+            if time.monotonic() - started_at > MATCH_WARM_UP:
+                match[3] = min(least_idle, idle_cores)
+            if process.is_alive():
+                continue
+            process.join()
+            self._running.remove(match)
+            if process.exitcode != 0:
+                print(WARNING_PREFIX + "{0} exited with code {1}".format(spec, process.exitcode))
+            if match[3] < 1:
+                print(WARNING_PREFIX + "The host was overloaded during " + str(spec))
+            print("Finished " + str(spec))
+            statistics.append_to_csv("match_farm.csv",
+                                     "match, player_port, directory, exit_code, wall_seconds, least_idle_cores",
+                                     "{0}, {1}, {2}, {3}, {4:.1f}, {5:.2f}".format(
+                                         spec.index, spec.player_port, spec.directory, process.exitcode,
+                                         time.monotonic() - started_at, match[3]))
+
+
+def _run_match(spec: MatchSpec, team_names, num_players, udp_ip, ticks_per_match, client_model, synch_mode):
+    apply_configuration(spec.configuration)
+    # Everything this match writes goes to its own directory
+    statistics.stat_dir = spec.directory / "Statistics"
+    os.makedirs(statistics.stat_dir, exist_ok=True)
+    if spec.variant is not None:
+        with open(spec.directory / "variant.json", "w") as file:
+            json.dump({"variant": spec.variant, "configuration": spec.configuration}, file, indent=4)
+    with open(statistics.stat_dir / "game_number.txt", "w") as file:
+        file.write(str(spec.index + 1))
+    uppaal.use_working_directory(spec.directory / "uppaal")
+
+    soccersim = SoccerSim(team_names=team_names, num_players=num_players, trainer_mode=False, coaches_enabled=False,
+                          udp_player=spec.player_port, udp_trainer=spec.trainer_port, udp_coach=spec.coach_port,
+                          udp_ip=udp_ip, enable_monitor=False, client_model=client_model, synch_mode=synch_mode,
+                          log_dir=spec.directory / "logs")
+    soccersim.start()
+    soccersim.server_ready.wait()
+    fake_monitor = FakeMonitorClient(start_time=5, UDP_IP=udp_ip, UDP_PORT=spec.player_port)
+    fake_monitor.start()
+    try:
+        fake_monitor.thinker.tick_bus.wait_for_tick(ticks_per_match)
+    finally:
+        soccersim.stop()
+        soccersim.join()
+        fake_monitor.stop()
+        fake_monitor.join()
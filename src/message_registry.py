@@ -0,0 +1,111 @@
+import re
+import threading
+import time
+
+"""
+Dispatches messages from the server to handlers by the first word of the message, f.ex. "see" in (see 0 ((f c) 5 0)).
+A handler can also be registered for the first two words, f.ex. "ok look", which is tried before the first word.
+Messages without a handler are passed to the default handler.
+
+Every handler is called with the message and the arguments given to dispatch. The player, the online coach and the
+trainer each have a registry, and handlers common to them are registered in more than one.
+The number of calls and the time spent in every handler are counted, to show where the parsing time goes. Every thread
+counts on its own, so the clients do not wait for each other when dispatching, and the counts are added up when the
+statistics are read.
+"""
+
+# The first two words of a message: (ok look 926 ...) -> "ok", "look"
+_HEAD_RE = re.compile("\\(([^ ()]+)(?: ([^ ()]+))?")
+
+
+class HandlerStatistics:
+
+    def __init__(self, head: str, handler) -> None:
+        self.head = head
+        self.handler = handler.__name__
+        self.calls = 0
+        self.seconds = 0
+
+    def mean_us(self) -> float:
+        return 0 if self.calls == 0 else self.seconds / self.calls * 1000000
+
+
+class MessageRegistry:
+
+    def __init__(self, client: str, default_handler) -> None:
+        self.client = client
+        self._handlers = {}
+        # First words of the heads registered with two words
+        self._qualified_heads = set()
+        self._default = (default_handler, "default")
+        # {(handler, head): [calls, seconds]} of every thread that has dispatched since the statistics were reset
+        self._thread_counts = []
+        self._local = threading.local()
+        # Incremented when the statistics are reset, so the threads start counting again
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def register(self, heads: [str], handler) -> None:
+        for head in heads:
+            if head in self._handlers:
+                raise Exception("Handler for {0} messages already registered for the {1}".format(head, self.client))
+            words = head.split(" ")
+            if len(words) > 2:
+                raise Exception("Message heads have at most two words: " + head)
+            if len(words) == 2:
+                self._qualified_heads.add(words[0])
+            self._handlers[head] = (handler, head)
+
+    def dispatch(self, msg: str, *args):
+        matched = _HEAD_RE.match(msg)
+        entry = None
+        if matched is not None:
+            head = matched.group(1)
+            if head in self._qualified_heads and matched.group(2) is not None:
+                entry = self._handlers.get(head + " " + matched.group(2))
+            if entry is None:
+                entry = self._handlers.get(head)
+        if entry is None:
+            entry = self._default
+
+        started = time.perf_counter()
+        try:
+            return entry[0](msg, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            counts = self._counts_of_thread()
+            counted = counts.get(entry)
+            if counted is None:
+                counts[entry] = [1, elapsed]
+            else:
+                counted[0] += 1
+                counted[1] += elapsed
+
+    def _counts_of_thread(self) -> dict:
+        local = self._local
+        if getattr(local, "generation", None) != self._generation:
+            with self._lock:
+                local.generation = self._generation
+                local.counts = {}
+                self._thread_counts.append(local.counts)
+        return local.counts
+
+    # Statistics of the handlers that have been called, the most expensive first. Handlers, that are being called
+    # while the statistics are read, may be off by one call
+    def statistics(self) -> [HandlerStatistics]:
+        with self._lock:
+            thread_counts = list(self._thread_counts)
+        called = {}
+        for counts in thread_counts:
+            for (handler, head), (calls, seconds) in list(counts.items()):
+                stats = called.get(head)
+                if stats is None:
+                    stats = called[head] = HandlerStatistics(head, handler)
+                stats.calls += calls
+                stats.seconds += seconds
+        return sorted(called.values(), key=lambda stats: stats.seconds, reverse=True)
+
+    def reset_statistics(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._thread_counts = []
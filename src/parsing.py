@@ -1,14 +1,16 @@
 import math
 import re
 import pyclipper
-from time import time
+from time import time, perf_counter
 
 from shapely.geometry import Polygon
 
 from coaches.world_objects_coach import WorldViewCoach, PlayerViewCoach, BallOnlineCoach
 from configurations import WARNING_PREFIX, QUANTIZE_STEP_LANDMARKS, DRIBBLE_OR_PASS_STRAT_PREFIX
 from geometry import calculate_smallest_origin_angle_between, rotate_coordinate, get_object_position, \
-    calculate_full_origin_angle_radians, smallest_angle_difference, find_mean_angle
+    calculate_full_origin_angle_radians, smallest_angle_difference, find_mean_angle, Vector2D, inverse_y_axis
+from message_registry import MessageRegistry
+from percepts import SeePercept, BodyPercept, HearPercept, PERCEPTS
 from player import player, world_objects
 from math import sqrt
 
@@ -16,6 +18,7 @@ from player.player import PlayerState
 from player.world_objects import Coordinate, Ball, History
 from player.world_objects import ObservedPlayer
 from player.world_objects import PrecariousData
+from see_tokenizer import tokenize_see, parse_players, SeenFlag, SeenLine, SeenBall, SeenPlayer
 from utils import debug_msg, get_flag_quantize_range
 
 """
@@ -25,6 +28,8 @@ the message from the server for an online coach and updates this clients world v
 The division into more methods was due to the different clients having different needs and receiving 
 information using different protocols from the robocup server.
 
+Every entry method dispatches the message to a handler by the first word of the message, see message_registry.
+
 Additionally, the parsing of information from the soccer server includes some interpretation. For example
 the flag positions are analysed and used in combination to calculate the position of the player.
 """
@@ -124,131 +129,95 @@ def parse_pass_command(command):
     return pass_pairs
 
 
+# Messages from the connection are decoded here, when they are about to be parsed
+def _decode(msg) -> str:
+    if isinstance(msg, str):
+        return msg
+    return msg.decode()
+
+
+# In synchronous mode the server sends (think) to every client, when all messages of a cycle have been sent.
+# It is answered with (done) instead of being parsed.
+def is_think_message(msg) -> bool:
+    if isinstance(msg, str):
+        return msg.startswith("(think")
+    return msg.startswith(b"(think")
+
+
+_TIME_RE = re.compile("\\([^(]* ({0})".format(_SIGNED_INT_REGEX))
+
+
 def _update_time(msg, state: PlayerState):
-    comp_re = re.compile("\\([^(]* ({0})".format(_SIGNED_INT_REGEX))
-    state.world_view.sim_time = int(re.match(comp_re, msg).group(1))
+    state.world_view.sim_time = int(_TIME_RE.match(msg).group(1))
 
 
+# The messages are dispatched by their first word, to the handlers registered at the end of this module
 def parse_message_trainer(msg: str, world_view: WorldViewCoach):
-    if msg.startswith("(error"):
-        print("Trainer received error: {0}".format(msg))
-        return
-    # The server_param and player_param files do not contain a time stamp
-    # Can be used to get the configuration of the server and player
-    # server_param: clang_mess_per_cycle, olcoach_port = 6002 etc.
-    # player_param: General parameters of players, like max substitutions etc.
-    # player_type: The current player type and its stats, like max_speed, kick power etc.
-    if msg.startswith("(server_param") or msg.startswith("(player_param") or msg.startswith("(player_type"):
-        if msg.startswith("(server_param"):
-            print(msg)
-        return
-
-    if msg.startswith("(hear"):
-        _parse_hear_coach(msg, world_view)
-    elif msg.startswith("(init"):
-        # Init contains no information for trainer
-        return
-    elif msg.startswith("(ok look") or msg.startswith("(see_global"):
-        _parse_ok_look_online_coach(msg, world_view)
-        # Update time
-        comp_re = re.compile("\\([^(]* ({0})".format(_SIGNED_INT_REGEX))
-        world_view.sim_time = int(re.match(comp_re, msg).group(1))
-    elif msg.startswith("(change_player_type"):
-        # (change player type UNUM TYPE) if team player changed type. (change player type UNUM) if opponent player
-        # changed type. The type is not disclosed by the opponent team.
-        return
-    elif msg.startswith("(clang"):
-        # The players tell the coach which versions of commands they support.
-        # Example: (clang (ver (p "Team1" 6) 7 16))
-        return
-    elif msg.startswith("(ok eye") or msg.startswith("(ok"):
-        # (ok for general confirmations
-        # Simple confirmation, that vision mode was changed
-        return
-    else:
-        raise Exception("Unknown message received: " + msg)
+    TRAINER_MESSAGES.dispatch(_decode(msg), world_view, "Trainer")
 
 
 def parse_message_online_coach(msg: str, team: str, world_view: WorldViewCoach):
-    if msg.startswith("(error"):
-        print("Coach for team {0} received error: {1}".format(team, msg))
-        return
-    # The server_param and player_param files do not contain a time stamp
-    # Can be used to get the configuration of the server and player
-    # server_param: clang_mess_per_cycle, olcoach_port = 6002 etc.
-    # player_param: General parameters of players, like max substitutions etc.
-    # player_type: The current player type and its stats, like max_speed, kick power etc.
-    if msg.startswith("(server_param") or msg.startswith("(player_param") or msg.startswith("(player_type"):
-        if msg.startswith("(server_param"):
-            print(msg)
-        return
-
-    if msg.startswith("(hear"):
-        _parse_hear_coach(msg, world_view)
-    elif msg.startswith("(init"):
-        _parse_init_online_coach(msg, world_view)
-    elif msg.startswith("(ok look") or msg.startswith("(see_global"):
-        _parse_ok_look_online_coach(msg, world_view)
-        # Update time
-        comp_re = re.compile("\\([^(]* ({0})".format(_SIGNED_INT_REGEX))
-        world_view.sim_time = int(re.match(comp_re, msg).group(1))
-    elif msg.startswith("(change_player_type"):
-        # (change player type UNUM TYPE) if team player changed type. (change player type UNUM) if opponent player
-        # changed type. The type is not disclosed by the opponent team.
-        return
-    elif msg.startswith("(clang"):
-        # The players tell the coach which versions of commands they support.
-        # Example: (clang (ver (p "Team1" 6) 7 16))
-        return
-    elif msg.startswith("(ok eye") or msg.startswith("(ok"):
-        # (ok for general confirmations
-        # Simple confirmation, that vision mode was changed
-        return
-    else:
-        raise Exception("Unknown message received: " + msg)
+    ONLINE_COACH_MESSAGES.dispatch(_decode(msg), world_view, "Coach for team " + team)
 
 
 def parse_message_update_state(msg: str, ps: PlayerState):
-    if msg.startswith("(error"):
-        print("Player num {0}, team {1}, received error: {2}".format(ps.num, ps.team_name, msg))
+    if isinstance(msg, PERCEPTS):
+        apply_percept(msg, ps)
         return
-    # The server_param and player_param files do not contain a time stamp
-    # Can be used to get the configuration of the server and player
-    # server_param: clang_mess_per_cycle, olcoach_port = 6002 etc.
-    # player_param: General parameters of players, like max substitutions etc.
-    # player_type: The current player type and its stats, like max_speed, kick power etc.
-    # ok clang is just an ok message, that the coach language requested has been accepted.
-    if not (msg.startswith("(server_param") or msg.startswith("(player_param") or msg.startswith("(player_type")
-            or msg.startswith("(ok clang")):
-        pass
-        # _update_time(msg, ps)
-
-    if msg.startswith("(hear"):
-        _parse_hear(msg, ps)
-    elif msg.startswith("(sense_body"):
-        _update_time(msg, ps)
-        _parse_body_sense(msg, ps)
-    elif msg.startswith("(init"):
-        _parse_init(msg, ps)
-    elif msg.startswith("(see "):
-        last_update = ps.action_history.last_see_update
-        if ps.world_view.game_state == 'play_on' and msg.startswith("(see {0}".format(last_update)):
-            return  # Discard duplicate messages
-        _update_time(msg, ps)
-        _parse_see(msg, ps)
+    PLAYER_MESSAGES.dispatch(_decode(msg), ps)
+
+
+# The receive stage of a player, called by the connection with every message it receives. See, sense_body and hear
+# messages are returned as percepts, every other message is returned as it was received
+def read_percept(msg):
+    try:
+        return _read_percept(msg)
+    except Exception:
+        # Errors must not stop the I/O thread. The thinker reports them, when it parses the message itself
+        return msg
+
+
+def _read_percept(msg):
+    started = perf_counter()
+    received_at = getattr(msg, "received_at", None)
+    text = _decode(msg)
+    if text.startswith("(see "):
+        seen = tokenize_see(text, lazy_players=True)
+        if len(seen.lines) == 0:
+            debug_msg("NO LINES " + text, "PARSING")
+        return SeePercept(int(_TIME_RE.match(text).group(1)), tuple(seen.flags), tuple(seen.goals),
+                          tuple(seen.lines), seen.ball, tuple(seen.player_slices), seen.players_behind, received_at,
+                          perf_counter() - started)
+    if text.startswith("(sense_body"):
+        body_values, view_mode, collision, speed = _read_body_sense(text)
+        return BodyPercept(int(_TIME_RE.match(text).group(1)), tuple(body_values), view_mode, collision, speed,
+                           received_at, perf_counter() - started)
+    if text.startswith("(hear"):
+        words = text.split()
+        return HearPercept(int(words[1]), words[2], text, received_at, perf_counter() - started)
+    return msg
+
+
+# The server may send the see message of a cycle twice during play
+def _is_duplicate_see(time, ps: PlayerState):
+    return ps.world_view.game_state == 'play_on' and time == ps.action_history.last_see_update
+
+
+# Updates the state of the player from a percept of the receive stage
+def apply_percept(percept, ps: PlayerState):
+    started = perf_counter()
+    if isinstance(percept, SeePercept):
+        if _is_duplicate_see(percept.time, ps):
+            return
+        ps.world_view.sim_time = percept.time
+        _apply_see(percept, ps)
         ps.on_see_update()
-    elif msg.startswith("(server_param") or msg.startswith("(player_param") or msg.startswith("(player_type"):
-        return
-    elif msg.startswith("(change_player_type"):
-        # (change player type UNUM TYPE) if team player changed type. (change player type UNUM) if opponent player
-        # changed type. The type is not disclosed by the opponent team.
-        return
-    elif msg.startswith("(ok clang") or msg.startswith("(ok synch"):
-        # Simply a confirmation, that the requested coach language was accepted
-        # Confirm syncrhonized see
-        return
+    elif isinstance(percept, BodyPercept):
+        ps.world_view.sim_time = percept.time
+        _apply_body_sense(percept.values, percept.view_mode, percept.collision, percept.speed, ps)
     else:
-        raise Exception("Unknown message received: " + msg)
+        _apply_hear(percept.sender, percept.text, ps)
+    ps.statistics.register_percept(type(percept).__name__, percept.parse_seconds, perf_counter() - started)
 
 
 '''
@@ -273,36 +242,21 @@ New protocol 7-16:
 
 
 def _parse_see(msg, state: player.PlayerState):
-    regex2 = re.compile(_SEE_MSG_REGEX)
-    matches = regex2.findall(msg)
+    # The players are parsed, when the world view of the player is asked for them
+    seen = tokenize_see(msg, lazy_players=True)
+    if len(seen.lines) == 0:
+        print("NO LINES " + msg)
+    _apply_see(seen, state)
 
-    flag_strings = []
-    players = []
-    goals = []
-    lines = []
-    ball = None
-    for element in matches:
-        if str(element).startswith("((f") or str(element).startswith("((F"):
-            flag_strings.append(element)
-        elif str(element).startswith("((g") or str(element).startswith("((G"):
-            goals.append(element)
-        elif str(element).startswith("((p") or str(element).startswith("((P"):
-            players.append(element)
-        elif str(element).startswith("((l") or str(element).startswith("((L"):
-            lines.append(element)
-        elif str(element).startswith("((b") or str(element).startswith("((B"):
-            ball = element
-        else:
-            raise Exception("Unknown see element: " + str(element))
 
-    flags = create_flags(flag_strings, goals, state)
+# Updates the state from the objects of a see message, either see_tokenizer.SeeTokens or a percepts.SeePercept
+def _apply_see(seen, state: player.PlayerState):
+    flags = create_flags(seen.flags, seen.goals, state)
 
-    _parse_lines(lines, state)
-    if len(lines) == 0:
-        print("NO LINES " + msg)
+    _parse_lines(seen.lines, state)
 
     # Find angle from visible lines
-    new_global_angle = _approx_angle_lines(state, lines)
+    new_global_angle = _approx_angle_lines(state, seen.lines)
     if new_global_angle is not None:
         state.update_face_dir(new_global_angle)
 
@@ -315,32 +269,19 @@ def _parse_see(msg, state: player.PlayerState):
 
     # _approx_position(flags, state)
     # _approx_body_angle(flags, state)
-    _parse_players(players, state)
-    _parse_ball(ball, state)
+    state.players_close_behind = seen.players_behind
+    if len(seen.player_slices) > 0:
+        state.statistics.sees_with_players += 1
+        state.world_view.add_unparsed_players(state.now(), _player_parser(seen.player_slices, state))
+    _parse_ball(seen.ball, state)
 
 
-def _parse_lines(lines, ps):
+def _parse_lines(lines: [SeenLine], ps):
     ps.world_view.lines.clear()
     for line in lines:
-        if str(line).startswith("((L"):
-            continue
-        else:
-            _parse_line(line, ps)
-
-
-def _parse_line(text: str, ps: PlayerState):
-    line_regex = "\\(\\(l (r|l|b|t)\\)\\s({0}) ({1})".format(_REAL_NUM_REGEX, _SIGNED_INT_REGEX)
-    regular_expression = re.compile(line_regex)
-    matched = regular_expression.match(text)
-
-    line_side = matched.group(1)
-    line_distance = matched.group(2)
-    line_relative_angle = matched.group(3)
-
-    # Add information to WorldView
-    new_line = world_objects.Line(line_side=line_side, distance=line_distance, relative_angle=line_relative_angle)
-    ps.world_view.lines.append(new_line)
-    return matched
+        # Add information to WorldView
+        ps.world_view.lines.append(world_objects.Line(line_side=line.side, distance=line.distance,
+                                                      relative_angle=line.direction))
 
 
 def _parse_goals(goals, ps):
@@ -348,14 +289,15 @@ def _parse_goals(goals, ps):
         _parse_goal(goal, ps)
 
 
+_GOAL_RE = re.compile("\\(\\(g (r|l)\\)\\s({0}) ({1})".format(_REAL_NUM_REGEX, _SIGNED_INT_REGEX))
+
+
 def _parse_goal(text: str, ps: PlayerState):
     # Unknown see object (out of field of view)
     if text.startswith("((G"):
         return world_objects.Goal(None, None, None)
 
-    goal_regex = "\\(\\(g (r|l)\\)\\s({0}) ({1})".format(_REAL_NUM_REGEX, _SIGNED_INT_REGEX)
-    regular_expression = re.compile(goal_regex)
-    matched = regular_expression.match(text)
+    matched = _GOAL_RE.match(text)
 
     goal_side = matched.group(1)
     goal_distance = matched.group(2)
@@ -380,26 +322,15 @@ class Flag:
                ", direction: " + str(self.body_relative_direction)
 
 
-def create_flags(flag_strings, goal_flags, state: PlayerState):
-    known_flags_strings = []
-
-    # Remove flags out of field of view
-    for flag in flag_strings:
-        if not str(flag).startswith("((F)"):
-            known_flags_strings.append(flag)
-
-    for flag in goal_flags:
-        if "((G" not in flag:
-            known_flags_strings.append(flag)
-    ids = _extract_flag_identifiers(known_flags_strings)
-    coords = _extract_flag_coordinates(ids)
-    distances = _extract_flag_distances(known_flags_strings)
-    directions = _extract_flag_directions(known_flags_strings, state.body_state.neck_angle)
+def create_flags(seen_flags: [SeenFlag], seen_goals: [SeenFlag], state: PlayerState):
+    # Flags out of field of view are not included by tokenize_see
+    known_flags = list(seen_flags) + list(seen_goals)
+    coords = _extract_flag_coordinates([flag.identifier for flag in known_flags])
 
     flags = []
 
-    for i in range(len(known_flags_strings)):
-        flags.append(Flag(ids[i], coords[i], float(distances[i]), float(directions[i])))
+    for i, flag in enumerate(known_flags):
+        flags.append(Flag(flag.identifier, coords[i], flag.distance, flag.direction % 360))
 
     return flags
 
@@ -489,61 +420,21 @@ def use_expected_angles(state):
         state.action_history.turn_in_progress = False
 
 
-# ((flag g r b) 99.5 -5)
-# ((flag p l c) 27.1 10 -0 0)
-# distance, direction, dist_change, dir_change
-def _extract_flag_directions(flag_strings, neck_angle):
-    flag_directions = []
-    for flag_string in flag_strings:
-        # Remove the first part of the string *((flag p l c)*
-        removed_flag_name = flag_string.split(') ', 1)[1]
-        # Remove ) from the items
-        cur_flag = str(removed_flag_name).replace(")", "")
-        cur_flag = str(cur_flag).replace("(", "")
-
-        split_by_whitespaces = []
-        split_by_whitespaces = re.split('\\s+', cur_flag)
-
-        # We now have a list of elements like this:
-        # ['13.5', '-31', '2', '-5']
-
-        direction = float(split_by_whitespaces[1])
-        # direction += neck_angle  # Account for neck angle
-        direction %= 360
-        flag_directions.append(direction)
-    return flag_directions
-
-
 # Input ((b) 13.5 -31 0 0)
 # or ((b) 44.7 -20)
 # Or ((B) distance direction)
 # distance, direction, dist_change, dir_change
-def _parse_ball(ball_text: str, ps: player.PlayerState):
+def _parse_ball(seen_ball: SeenBall, ps: player.PlayerState):
     # If ball is not present at all or only seen behind the player
-    if ball_text is None:
+    if seen_ball is None:
         return
 
-    # Remove ) from the items
-    ball_text = str(ball_text).replace(")", "")
-    ball_text = str(ball_text).replace("(", "")
-
-    split_by_whitespaces = []
-    split_by_whitespaces = re.split('\\s+', ball_text)
-
-    # We now have a list of elements like this:
-    # ['b', '13.5', '-31', '2', '-5']
-
     # These are always included
-    distance = float(split_by_whitespaces[1])
-    relative_ball_dir = int(split_by_whitespaces[2])
+    distance = seen_ball.distance
+    relative_ball_dir = seen_ball.direction
     # These might be included depending on the distance and view of the player
-    distance_chng = None
-    dir_chng = None
-
-    # If we also know dist_change and dir_change
-    if len(split_by_whitespaces) > 3:
-        distance_chng = float(split_by_whitespaces[3])
-        dir_chng = float(split_by_whitespaces[4])
+    distance_chng = seen_ball.dist_chng
+    dir_chng = seen_ball.dir_chng
 
     ball_coord = None
     # The position of the ball can only be calculated, if the position of the player is known
@@ -575,34 +466,6 @@ def _parse_ball(ball_text: str, ps: player.PlayerState):
         ps.update_ball(new_ball, ps.now())
 
 
-# Parse this: (p "team"? num? goalie?)
-# Returns arguments in this order: team, num, is_goalie
-def _parse_player_obj_name(obj_name, ps: player.PlayerState):
-    # Remove "noise" in form of " and ( from the object name
-    obj_name = str(obj_name).replace("(", "")
-    obj_name = str(obj_name).replace("\"", "")
-
-    # Split by whitespaces to get a divided list like so:
-    # ['p', '"Team2"', '7']
-    split_by_whitespaces = re.split('\\s+', obj_name)
-
-    # If we have no info on who the player is
-    if len(split_by_whitespaces) == 1:
-        return None, None, None
-
-    # If we know the team of the player
-    if len(split_by_whitespaces) == 2:
-        return split_by_whitespaces[1], None, None
-
-    # If we know both team and player_num
-    if len(split_by_whitespaces) == 3:
-        return split_by_whitespaces[1], split_by_whitespaces[2], None
-
-    # If we know both the team, player_num and that the player is the goalie
-    if len(split_by_whitespaces) == 4:
-        return split_by_whitespaces[1], split_by_whitespaces[2], True
-
-
 # (b) 0 0 0 0)
 # X Y DELTAX DELTAY
 def _parse_ball_online_coach(ball, wv: WorldViewCoach):
@@ -627,10 +490,12 @@ def _parse_ball_online_coach(ball, wv: WorldViewCoach):
     wv.ball = new_ball
 
 
+_SEE_MSG_RE = re.compile(_SEE_MSG_REGEX)
+
+
 # (ok look 926 ((g r) 52.5 0) ((g l) -52.5 0) ((b) 0 0 0 0) ((p "Team1" 1 goalie) 33.9516 -18.3109 -0.0592537 0.00231559 -180 0) ((p "Team2" 1 goalie) 50 0 0 0 0 0))
 def _parse_ok_look_online_coach(msg, wv: WorldViewCoach):
-    regex2 = re.compile(_SEE_MSG_REGEX)
-    matches = regex2.findall(msg)
+    matches = _SEE_MSG_RE.findall(msg)
 
     players = []
     goals = []
@@ -714,124 +579,102 @@ def _parse_players_online_coach(players: [], wv: WorldViewCoach):
             possessor.has_ball = True
 
 
+# The position, angles and speed of the player, when a see message was received
+class _Observer:
+
+    def __init__(self, ps: player.PlayerState) -> None:
+        self.time = ps.now()
+        self.position: Coordinate = ps.position.get_value() if ps.position.is_value_known() else None
+        self.body_angle = ps.body_angle.get_value()
+        self.face_dir = ps.face_dir.get_value()
+        self.neck_angle = ps.body_state.neck_angle
+        self.speed = ps.body_state.speed
+
+    def velocity(self) -> Vector2D:
+        return Vector2D.velocity_to_xy(self.speed, inverse_y_axis(self.body_angle))
+
+
+# The players may be parsed some ticks after the see message, so they are placed relative to the player at the time of
+# the message
+def _player_parser(player_slices: [(str, str)], ps: player.PlayerState):
+    observer = _Observer(ps)
+
+    def parse():
+        ps.statistics.sees_with_players_parsed += 1
+        _parse_players(parse_players(player_slices), ps, observer)
+
+    return parse
+
+
 # ((p "team"? num?) Distance Direction DistChng? DirChng? BodyFacingDir? HeadFacingDir? [PointDir]?)
 # ((p "Team1" 5) 30 -41 0 0)
 # 1: (ObjName Distance Direction DistChange DirChange BodyFacingDir HeadFacingDir [PointDir] [t] [k]])
 # 2: (ObjName Distance Direction DistChange DirChange [PointDir] [t] [k]])
 # 3: (ObjName Distance Direction)
 # 4: (ObjName Direction)
-def _parse_players(players: [], ps: player.PlayerState):
+def _parse_players(players: [SeenPlayer], ps: player.PlayerState, observer: _Observer):
     if ps.is_test_player():
-        debug_msg(str(ps.now()) + " Parsing players: " + str(players), "PARSING")
+        debug_msg(str(observer.time) + " Parsing players: " + str(players), "PARSING")
     player_list = []
-    ps.players_close_behind = 0
-    for cur_player in players:
-        # Unknown see object (out of field of view)
-        if cur_player.startswith("((P"):
-            ps.players_close_behind += 1
-            continue
-        # Default values
-        team = None
-        num = None
-        is_goalie = None
-        distance = None
-        direction = None
-        dist_chng = None
-        dir_chng = None
-        body_dir = None
-        head_dir = None
-
-        # Get object name like (player Team1 5) or (player Team1 5 goalie)
-        obj_name = re.split('\\)+', cur_player)[0]
-        team, num, is_goalie = _parse_player_obj_name(obj_name, ps)
-
-        # The rest of the player like 9 0 0 0 0 0
-        # Start from index 1 to remove a white space
-        cur_player = re.split('\\)+', cur_player)[1][1:]
-
-        # Remove ),( and " from the items
-        cur_player = str(cur_player).replace(")", "")
-        cur_player = str(cur_player).replace("(", "")
-        cur_player = str(cur_player).replace("\"", "")
-
-        split_by_whitespaces = re.split('\\s+', cur_player)
-
-        for s in split_by_whitespaces:
-            if s == "t" or s == "k":
-                split_by_whitespaces.remove(s)
-
-        # We now have a list of elements like this:
-        # Diretion DistChange DirChange BodyFacingDir HeadFacingDir [PointDir]
-        # ['30', '-41', '0', '0' ]
-
-        # If only direction
-        if len(split_by_whitespaces) == 1:
+    observer_velocity = observer.velocity()
+    for seen in players:
+        # We don't save states of players without distance
+        if seen.distance is None:
             if ps.is_test_player():
-                debug_msg(str(ps.now()) + " Skipping parsing : " + str(cur_player), "PARSING")
-            # We don't save states of players without distance
+                debug_msg(str(observer.time) + " Skipping parsing : " + str(seen), "PARSING")
             continue
-        # If only distance and direction
-        elif len(split_by_whitespaces) == 2:
-            distance = float(split_by_whitespaces[0])
-            direction = float(split_by_whitespaces[1])
-        # If Distance Direction DistChange DirChange
-        elif len(split_by_whitespaces) == 4:
-            distance = float(split_by_whitespaces[0])
-            direction = float(split_by_whitespaces[1])
-            dist_chng = float(split_by_whitespaces[2])
-            dir_chng = float(split_by_whitespaces[3])
-        # If Distance Direction DistChange DirChange BodyFacingDir HeadFacingDir [PointDir]
-        elif len(split_by_whitespaces) >= 6:
-            distance = float(split_by_whitespaces[0])
-            direction = float(split_by_whitespaces[1])
-            dist_chng = float(split_by_whitespaces[2])
-            dir_chng = float(split_by_whitespaces[3])
-            body_dir = float(split_by_whitespaces[4])
-            head_dir = float(split_by_whitespaces[5])
-
-        my_pos: Coordinate = ps.position.get_value()
+        distance = seen.distance
+        direction = seen.direction
+
+        my_pos: Coordinate = observer.position
         other_player_coord = PrecariousData.unknown()
 
-        direction += ps.body_state.neck_angle  # Accommodates non-zero neck-angles
-        global_dir = None if ps.face_dir.get_value() is None else ps.face_dir.get_value() + direction
-        if ps.position.is_value_known():
+        direction += observer.neck_angle  # Accommodates non-zero neck-angles
+        global_dir = None if observer.face_dir is None else observer.face_dir + direction
+        if my_pos is not None:
             other_player_coord = get_object_position(object_rel_angle=direction, dist_to_obj=distance,
                                                      my_x=my_pos.pos_x, my_y=my_pos.pos_y,
-                                                     my_global_angle=ps.body_angle.get_value())
+                                                     my_global_angle=observer.body_angle)
 
-        new_player = ObservedPlayer(team=team, num=num, distance=distance, direction=direction, dist_chng=dist_chng
-                                    , dir_chng=dir_chng, body_dir=body_dir, head_dir=head_dir, is_goalie=is_goalie
-                                    , coord=other_player_coord, global_dir=global_dir,
-                                    observer_velocity=ps.get_y_north_velocity_vector())
+        new_player = ObservedPlayer(team=seen.team, num=seen.num, distance=distance, direction=direction,
+                                    dist_chng=seen.dist_chng, dir_chng=seen.dir_chng, body_dir=seen.body_dir,
+                                    head_dir=seen.head_dir, is_goalie=seen.is_goalie, coord=other_player_coord,
+                                    global_dir=global_dir, observer_velocity=observer_velocity)
 
-        ps.world_view.update_player_view(new_player)
+        ps.world_view.update_player_view(new_player, observer.time)
         player_list.append(new_player)
 
     if ps.is_test_player():
-        debug_msg(str(ps.now()) + " Finished parsing players: " + str(player_list), "PARSING")
+        debug_msg(str(observer.time) + " Finished parsing players: " + str(player_list), "PARSING")
+
+
+_INIT_COACH_RE = re.compile("\\(init ([lr]) .*\\)")
+_INIT_RE = re.compile("\\(init ([lr]) ([0-9]*)")
+
 
 def _parse_init_online_coach(msg, wv: WorldViewCoach):
-    regex = re.compile("\\(init ([lr]) .*\\)")
-    matched = regex.match(msg)
+    matched = _INIT_COACH_RE.match(msg)
     wv.side = matched.group(1)
 
 
 def _parse_init(msg, ps: player.PlayerState):
-    regex = re.compile("\\(init ([lr]) ([0-9]*)")
-    matched = regex.match(msg)
+    matched = _INIT_RE.match(msg)
     ps.world_view.side = matched.group(1)
     ps.num = int(matched.group(2))
 
 
+_HEAR_REFEREE_RE = re.compile("\\(hear ({0}) referee ({1})\\)".format(_SIGNED_INT_REGEX, _ROBOCUP_MSG_REGEX))
+# Dribble and pass instructions in the freeform messages of the online coach
+_COACH_DRIBBLE_RE = re.compile(r'.*freeform.* "\(([0-9]*) dribble.*')
+_COACH_PASS_RE = re.compile(r'.*freeform.* "\(([0-9]*) pass (\([^)]*\))\)"\)\).*')
+
+
 def _parse_hear_coach(text: str, coach_world_view):
-    split_by_whitespaces = re.split('\\s+', text)
+    split_by_whitespaces = text.split()
 
     sender = split_by_whitespaces[2]
     if sender == "referee":
-        regex_string = "\\(hear ({0}) referee ({1})\\)".format(_SIGNED_INT_REGEX, _ROBOCUP_MSG_REGEX)
-
-        regular_expression = re.compile(regex_string)
-        matched = regular_expression.match(text)
+        matched = _HEAR_REFEREE_RE.match(text)
 
         coach_world_view.game_state = matched.group(2)
 
@@ -845,11 +688,7 @@ def _parse_hear_coach(text: str, coach_world_view):
     elif sender == "coach":
         return
     else:
-        regex_string = "\\(hear ({0}) ({0}) ({1})\\)".format(_SIGNED_INT_REGEX, _ROBOCUP_MSG_REGEX)
-
-        regular_expression = re.compile(regex_string)
-        matched = regular_expression.match(text)
-
+        # (hear *time* *degrees* *msg*) from other players is not used
         return
 
 
@@ -858,15 +697,15 @@ def _parse_hear_coach(text: str, coach_world_view):
 # example: (hear 0 self *msg*)
 # Pattern: (hear *time* *degrees* *msg*)
 def _parse_hear(text: str, ps: PlayerState):
-    split_by_whitespaces = re.split('\\s+', text)
+    split_by_whitespaces = text.split()
     # time = int(split_by_whitespaces[1])
     # ps.world_view.sim_time = time  # Update players understanding of time
-    sender = split_by_whitespaces[2]
-    if sender == "referee":
-        regex_string = "\\(hear ({0}) referee ({1})\\)".format(_SIGNED_INT_REGEX, _ROBOCUP_MSG_REGEX)
+    _apply_hear(split_by_whitespaces[2], text, ps)
+
 
-        regular_expression = re.compile(regex_string)
-        matched = regular_expression.match(text)
+def _apply_hear(sender: str, text: str, ps: PlayerState):
+    if sender == "referee":
+        matched = _HEAR_REFEREE_RE.match(text)
 
         ps.world_view.game_state = matched.group(2)
 
@@ -879,14 +718,12 @@ def _parse_hear(text: str, ps: PlayerState):
     elif sender == "online_coach_left":
         if ps.world_view.side == "l":
             if "dribble" in text:
-                coach_command_pattern = r'.*freeform.* "\(([0-9]*) dribble.*'
                 ps.received_dribble_instruction = PrecariousData(True, ps.now())
-                if int(ps.num) == int(re.match(coach_command_pattern, text).group(1)):
+                if int(ps.num) == int(_COACH_DRIBBLE_RE.match(text).group(1)):
                     print(ps.now(), "Player : ", ps.num, "DRIBBLE ;);););));")
                 pass
             else:
-                coach_command_pattern = r'.*freeform.* "\(([0-9]*) pass (\([^)]*\))\)"\)\).*'
-                matches = re.match(coach_command_pattern, text)
+                matches = _COACH_PASS_RE.match(text)
                 if int(matches.group(1)) == int(ps.num):
                     coord = Coordinate.unmarshal(matches.group(2))
                     coord = Coordinate(coord.pos_x, -coord.pos_y)
@@ -899,11 +736,7 @@ def _parse_hear(text: str, ps: PlayerState):
     elif sender == "coach":
         return  # todo handle trainer input
     else:
-        regex_string = "\\(hear ({0}) ({0}) ({1})\\)".format(_SIGNED_INT_REGEX, _ROBOCUP_MSG_REGEX)
-
-        regular_expression = re.compile(regex_string)
-        matched = regular_expression.match(text)
-
+        # (hear *time* *degrees* *msg*) from other players is not used
         return
 
 
@@ -913,112 +746,118 @@ def _parse_hear(text: str, ps: PlayerState):
 # (card none)))
 
 # ALL COUNT COMMANDS MEAN: HOW MANY TIMES THE COMMAND HAS BEEN EXECUTED BY THE PLAYER SO FAR
-# Group [1] = time,
-# [2] = view mode,
-# [3] = stamina, [4] = effort, [5] = capacity,
-# [6] = speed, [7] = direction of speed,
-# [8] = head angle,
-# [9] = kick count,
-# [10] = dash count,
-# [11] = turn count,
-# [12] = say count,
-# [13] = turn neck count,
-# [14] = catch count,
-# [15] = move count,
-# [16] = change view count,
-# [17] = movable cycles, [18] = expire cycles, [19] = distance, [20] = direction, [21] = point to count
-# [22] = target, [23] = Unum, [24] = count,
-# [25] = expire cycles, [26] count,
-# [27] = collision,
-# [28] = charged, [29] = card
-
-def _parse_body_sense(text: str, state: PlayerState):
-    if "collision (ball" in text:
-        state.ball_collision_time = state.now()
-        # We have collided with the ball so we cannot count on our previously calculated speed
-        state.action_history.expected_speed = None
-
-    regex_string = ".*sense_body ({1}).*view_mode ({2})\\).*stamina ({0}) ({0}) ({0})\\).*speed ({0}) ({1})\\)"
-    regex_string += ".*head_angle ({1})\\).*kick ({1})\\).*dash ({1})\\).*turn ({1})\\)"
-    regex_string += ".*say ({1})\\).*turn_neck ({1})\\).*catch ({1})\\).*move ({1})\\).*change_view ({1})\\)"
-    regex_string += ".*movable ({1})\\).*expires ({1})\\).*target ({1}) ({1})\\).*count ({1})\\)\\)"
-    regex_string += ".*target (none|l|r)( {1})?\\).*count ({1})\\)\\)"
-    regex_string += ".*expires ({1})\\).*count ({1})\\)"
-    regex_string += ".*collision (none|{2})\\).*charged ({1})\\).*card (red|yellow|none)\\)\\)\\)"
-    regex_string = regex_string.format(_REAL_NUM_REGEX, _SIGNED_INT_REGEX, _ROBOCUP_MSG_REGEX)
+# The message is split into tokens: sense_body 0 view_mode high normal stamina 8000 1 130600 speed 0 0 ...
+# and the fields are found by name. Fields missing in older protocol versions leave the body state unchanged, and new
+# fields are ignored. Fields of a group, like the movable cycles in (arm (movable 0)), are searched for after the name
+# of the group.
+# (group, field, [(index of the value, type, attribute of BodyState)])
+_BODY_SENSE_FIELDS = [(None, "stamina", [(0, float, "stamina"), (1, float, "effort"), (2, float, "capacity")]),
+                      (None, "speed", [(1, int, "direction_of_speed")]),
+                      (None, "head_angle", [(0, int, "neck_angle")]),
+                      (None, "dash", [(0, int, "dash_count")]),
+                      ("arm", "movable", [(0, int, "arm_movable_cycles")]),
+                      ("arm", "expires", [(0, int, "arm_expire_cycles")]),
+                      ("arm", "target", [(0, float, "distance"), (1, int, "direction")]),
+                      ("focus", "target", [(0, str, "target")]),
+                      ("tackle", "expires", [(0, int, "tackle_expire_cycles")]),
+                      ("foul", "charged", [(0, int, "charged")]),
+                      ("foul", "card", [(0, str, "card")])]
+_BODY_SENSE_GROUPS = {"arm", "focus", "tackle", "collision", "foul"}
+# The token index of every field is learned from the first message, and checked for the following messages, which
+# almost always have the same layout. Several threads parse body sense messages, so the list is never changed, only
+# replaced by a new one when the layout has changed
+_body_sense_layout = [None] * len(_BODY_SENSE_FIELDS)
+
+
+# Returns the index of the token with the name of the field, or None if the field is not in the message
+def _find_body_sense_field(tokens, group, field):
+    start = 0
+    if group is not None:
+        if group not in tokens:
+            return None
+        start = tokens.index(group) + 1
+    for i in range(start, len(tokens)):
+        if tokens[i] == field:
+            return i
+        if group is not None and tokens[i] in _BODY_SENSE_GROUPS:
+            return None
+    return None
 
-    regular_expression = re.compile(regex_string)
-    matched = regular_expression.match(text)
 
-    # ps.body_state.time = int(matched.group(1))
-    state.body_state.view_mode = matched.group(2)
-    state.body_state.stamina = float(matched.group(3))
-    state.body_state.effort = float(matched.group(4))
-    state.body_state.capacity = float(matched.group(5))
+def _parse_body_sense(text: str, state: PlayerState):
+    _apply_body_sense(*_read_body_sense(text), state)
+
+
+# Returns ([(attribute of BodyState, value)], view_mode, collision, speed). Fields missing from the message are None
+def _read_body_sense(text: str):
+    global _body_sense_layout
+    # (collision none), or the objects collided with: (collision (ball) (player))
+    collision = None
+    collision_start = text.find("(collision ")
+    if collision_start != -1:
+        collision_start += 11
+        if text.startswith("(", collision_start):
+            collision = text[collision_start:text.find("))", collision_start) + 1]
+        else:
+            collision = text[collision_start:text.find(")", collision_start)]
+
+    tokens = text.replace("(", " ").replace(")", " ").split()
+    layout = _body_sense_layout
+    # The indices of the fields in this message
+    indices = list(layout)
+    body_values = []
+    for i, (group, field, values) in enumerate(_BODY_SENSE_FIELDS):
+        index = layout[i]
+        if index is None or index >= len(tokens) or tokens[index] != field:
+            index = _find_body_sense_field(tokens, group, field)
+            indices[i] = index
+            if index is None:
+                continue
+        for value_index, value_type, attribute in values:
+            if index + 1 + value_index >= len(tokens):
+                break
+            try:
+                value = value_type(tokens[index + 1 + value_index])
+            except ValueError:
+                # Fewer values than expected, f.ex. (stamina 8000 1) without capacity in older protocol versions
+                break
+            body_values.append((attribute, value))
+
+    # (view_mode high normal)
+    view_mode = None
+    if len(tokens) > 4 and tokens[2] == "view_mode":
+        view_mode = tokens[3] + " " + tokens[4]
+
+    if indices != layout:
+        _body_sense_layout = indices
+
+    speed = None
+    speed_index = indices[1]
+    if speed_index is not None and speed_index + 1 < len(tokens):
+        speed = float(tokens[speed_index + 1])
+    return body_values, view_mode, collision, speed
+
+
+def _apply_body_sense(body_values, view_mode, collision, speed, state: PlayerState):
+    body_state = state.body_state
+    if collision is not None:
+        if "(ball)" in collision:
+            state.ball_collision_time = state.now()
+            # We have collided with the ball so we cannot count on our previously calculated speed
+            state.action_history.expected_speed = None
+        body_state.collision = collision
+
+    for attribute, value in body_values:
+        setattr(body_state, attribute, value)
+    if view_mode is not None:
+        body_state.view_mode = view_mode
 
     expected_speed = state.action_history.expected_speed
     if expected_speed is not None:
-        state.body_state.speed = expected_speed
+        body_state.speed = expected_speed
         state.action_history.expected_speed = None
-    else:
-        state.body_state.speed = float(matched.group(6))
-
-    state.body_state.direction_of_speed = int(matched.group(7))
-    state.body_state.neck_angle = int(matched.group(8))
-    state.body_state.dash_count = int(matched.group(10))
-    state.body_state.arm_movable_cycles = int(matched.group(17))
-    state.body_state.arm_expire_cycles = int(matched.group(18))
-    state.body_state.distance = float(matched.group(19))
-    state.body_state.direction = int(matched.group(20))
-    state.body_state.target = matched.group(22)
-    state.body_state.tackle_expire_cycles = int(matched.group(25))
-    state.body_state.collision = matched.group(27)
-    state.body_state.charged = int(matched.group(28))
-    state.body_state.card = matched.group(29)
-
-    return matched
-
-
-# Example : (see 0 ((f r b) 48.9 29) ((f g r b) 42.5 -4) ((g r) 43.8 -13) ((f g r t) 45.6 -21)
-#           ((f p r b) 27.9 21) ((f p r c) 27.9 -21 0 0) ((P) 1 -179) ((p Team2 2) 1 0 0 0)
-#           ((P) 0.5 151) ((p Team2 4) 0.5 -28 0 0) ((l r) 42.5 90))
-def _parse_flags(text):
-    flag_regex = "\\(f [^)]*\\) {0} {0}".format(_REAL_NUM_REGEX)
-    return re.findall(flag_regex, text)
-
-
-def _match(regex_string, text):
-    regular_expression = re.compile(regex_string)
-    regex_match = regular_expression.match(text)
-    return regex_match
-
-
-def _extract_flag_identifiers(flags):
-    goal_flag_ident_regex = ".*\\(([^\\)]*)\\)"
-    flag_identifiers_regex = ".*\\(f ([^\\)]*)\\)"
-    flag_identifiers = []
-    for flag in flags:
-        if str(flag).startswith("((f"):
-            m = _match(flag_identifiers_regex, flag)
-            flag_identifiers.append(m.group(1).replace(" ", ""))
-        elif str(flag).startswith("((g"):
-            m = _match(goal_flag_ident_regex, flag)
-            flag_identifiers.append(m.group(1).replace(" ", ""))
-    return flag_identifiers
-
-
-def _extract_flag_distances(flags):
-    goal_flag_distance_regex = ".*\\([^\\)]*\\) ({0}) ".format(_REAL_NUM_REGEX)
-    flag_distance_regex = ".*\\(f [^\\)]*\\) ({0}) ".format(_REAL_NUM_REGEX)
-    flag_distances = []
-    for flag in flags:
-        if str(flag).startswith("((f"):
-            m = _match(flag_distance_regex, flag)
-            flag_distances.append(m.group(1).replace(" ", ""))
-        elif str(flag).startswith("((g"):
-            m = _match(goal_flag_distance_regex, flag)
-            flag_distances.append(m.group(1).replace(" ", ""))
-    return flag_distances
+    elif speed is not None:
+        body_state.speed = speed
 
 
 def _extract_flag_coordinates(flag_ids):
@@ -1029,14 +868,6 @@ def _extract_flag_coordinates(flag_ids):
     return coords
 
 
-def _zip_flag_coords_distance(flags):
-    flag_ids = _extract_flag_identifiers(flags)
-    flag_coords = _extract_flag_coordinates(flag_ids)
-    flag_distances = _extract_flag_distances(flags)
-
-    return zip(flag_coords, flag_distances)
-
-
 def _calculate_distance(coord1, coord2):
     x_dist = abs(coord1.pos_x - coord2.pos_x)
     y_dist = abs(coord1.pos_y - coord2.pos_y)
@@ -1356,3 +1187,101 @@ def parse_strat_player(state: PlayerState):
                 debug_msg(str(state.now()) + " DribbleOrPass result: " + strat, "DRIBBLE_PASS_MODEL")
 
     state.strategy_result_list.clear()
+
+
+# The handlers of the messages of every client type. Registered last, when the parsing functions are defined
+def _unknown_message(msg, *_):
+    raise Exception("Unknown message received: " + msg)
+
+
+def _ignore_message(msg, *_):
+    return
+
+
+# The messages of the online coach and the trainer are dispatched with the world view, and the name of the client
+# used in the output
+def _coach_error(msg, world_view: WorldViewCoach, client: str):
+    print("{0} received error: {1}".format(client, msg))
+
+
+# The server_param and player_param files do not contain a time stamp
+# Can be used to get the configuration of the server and player
+# server_param: clang_mess_per_cycle, olcoach_port = 6002 etc.
+# player_param: General parameters of players, like max substitutions etc.
+# player_type: The current player type and its stats, like max_speed, kick power etc.
+def _coach_server_param(msg, world_view: WorldViewCoach, client: str):
+    print(msg)
+
+
+def _coach_hear(msg, world_view: WorldViewCoach, client: str):
+    _parse_hear_coach(msg, world_view)
+
+
+def _coach_init(msg, world_view: WorldViewCoach, client: str):
+    _parse_init_online_coach(msg, world_view)
+
+
+def _coach_look(msg, world_view: WorldViewCoach, client: str):
+    _parse_ok_look_online_coach(msg, world_view)
+    # Update time
+    world_view.sim_time = int(_TIME_RE.match(msg).group(1))
+
+
+# (change player type UNUM TYPE) if team player changed type. (change player type UNUM) if opponent player
+# changed type. The type is not disclosed by the opponent team.
+_CHANGE_PLAYER_TYPE = ["change_player_type"]
+_PARAMS = ["player_param", "player_type"]
+
+ONLINE_COACH_MESSAGES = MessageRegistry("online coach", _unknown_message)
+ONLINE_COACH_MESSAGES.register(["error"], _coach_error)
+ONLINE_COACH_MESSAGES.register(["server_param"], _coach_server_param)
+ONLINE_COACH_MESSAGES.register(_PARAMS + _CHANGE_PLAYER_TYPE, _ignore_message)
+ONLINE_COACH_MESSAGES.register(["hear"], _coach_hear)
+ONLINE_COACH_MESSAGES.register(["init"], _coach_init)
+ONLINE_COACH_MESSAGES.register(["ok look", "see_global"], _coach_look)
+# The players tell the coach which versions of commands they support.
+# Example: (clang (ver (p "Team1" 6) 7 16))
+# (ok for general confirmations, f.ex. (ok eye on) when the vision mode was changed
+ONLINE_COACH_MESSAGES.register(["clang", "ok"], _ignore_message)
+
+TRAINER_MESSAGES = MessageRegistry("trainer", _unknown_message)
+TRAINER_MESSAGES.register(["error"], _coach_error)
+TRAINER_MESSAGES.register(["server_param"], _coach_server_param)
+TRAINER_MESSAGES.register(_PARAMS + _CHANGE_PLAYER_TYPE, _ignore_message)
+TRAINER_MESSAGES.register(["hear"], _coach_hear)
+# Init contains no information for trainer
+TRAINER_MESSAGES.register(["init"], _ignore_message)
+TRAINER_MESSAGES.register(["ok look", "see_global"], _coach_look)
+TRAINER_MESSAGES.register(["clang", "ok"], _ignore_message)
+
+
+def _player_error(msg, ps: PlayerState):
+    print("Player num {0}, team {1}, received error: {2}".format(ps.num, ps.team_name, msg))
+
+
+def _player_sense_body(msg, ps: PlayerState):
+    _update_time(msg, ps)
+    _parse_body_sense(msg, ps)
+
+
+def _player_see(msg, ps: PlayerState):
+    time = int(_TIME_RE.match(msg).group(1))
+    if _is_duplicate_see(time, ps):
+        return
+    ps.world_view.sim_time = time
+    _parse_see(msg, ps)
+    ps.on_see_update()
+
+
+PLAYER_MESSAGES = MessageRegistry("player", _unknown_message)
+PLAYER_MESSAGES.register(["error"], _player_error)
+PLAYER_MESSAGES.register(["hear"], _parse_hear)
+PLAYER_MESSAGES.register(["sense_body"], _player_sense_body)
+PLAYER_MESSAGES.register(["init"], _parse_init)
+PLAYER_MESSAGES.register(["see"], _player_see)
+PLAYER_MESSAGES.register(["server_param"] + _PARAMS + _CHANGE_PLAYER_TYPE, _ignore_message)
+# Simply a confirmation, that the requested coach language was accepted
+# Confirm syncrhonized see
+PLAYER_MESSAGES.register(["ok clang", "ok synch_see"], _ignore_message)
+
+MESSAGE_REGISTRIES = [PLAYER_MESSAGES, ONLINE_COACH_MESSAGES, TRAINER_MESSAGES]
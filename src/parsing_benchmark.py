@@ -0,0 +1,208 @@
+import random
+import re
+import time
+
+import parsing
+from player.player import PlayerState
+from player.world_objects import Coordinate
+from see_tokenizer import tokenize_see, SeeTokens, SeenFlag, SeenLine, SeenBall, SeenPlayer
+from statisticsmodule import statistics
+
+"""
+Measures how many perception messages per second the player's parser handles.
+The see messages are split into objects by see_tokenizer in one pass. legacy_tokenize_see does the same with the
+regular expressions and string replacements parsing used before, so the two can be compared on the same messages.
+Likewise, legacy_match_body_sense is the regular expression sense_body messages were parsed with before.
+Run from src with: python -m parsing_benchmark
+"""
+
+_SEE_MSG_REGEX = "\\(\\([^\\)]*\\)[^\\)]*\\)"
+_REAL_NUM_REGEX = "[-0-9]*\\.?[0-9]*"
+_SIGNED_INT_REGEX = "[-0-9]+"
+_ROBOCUP_MSG_REGEX = "[-0-9a-zA-Z ().+*/?<>_]*"
+
+
+# f.ex. "prc" -> "p r c" and "tl50" -> "t l 50"
+def _flag_name(identifier):
+    return " ".join(re.findall("[a-z]|[0-9]+", identifier))
+
+
+# See messages like the ones rcssserver sends, with random objects and values
+def example_see_messages(count, seed=1234) -> [str]:
+    rand = random.Random(seed)
+    flag_ids = [identifier for identifier in parsing._FLAG_COORDS if not identifier.startswith("g")
+                or len(identifier) == 3]
+    messages = []
+    for tick in range(count):
+        objects = []
+        for identifier in rand.sample(flag_ids, rand.randint(4, 20)):
+            distance, direction = round(rand.uniform(1, 100), 1), rand.randint(-45, 45)
+            if rand.random() < 0.3:
+                objects.append("((f {0}) {1} {2} {3} {4})".format(_flag_name(identifier), distance, direction,
+                                                                  rand.randint(-1, 1), rand.randint(-1, 1)))
+            else:
+                objects.append("((f {0}) {1} {2})".format(_flag_name(identifier), distance, direction))
+        if rand.random() < 0.5:
+            objects.append("((g {0}) {1} {2})".format(rand.choice("lr"), round(rand.uniform(5, 100), 1),
+                                                      rand.randint(-45, 45)))
+        for _ in range(rand.randint(0, 2)):
+            objects.append("((F) {0} {1})".format(round(rand.uniform(0, 3), 1), rand.randint(-180, 180)))
+        for side in rand.sample("lrtb", rand.randint(1, 2)):
+            objects.append("((l {0}) {1} {2})".format(side, round(rand.uniform(1, 60), 1), rand.randint(-89, 89)))
+        if rand.random() < 0.8:
+            ball = "((b) {0} {1}".format(round(rand.uniform(0.5, 50), 1), rand.randint(-45, 45))
+            if rand.random() < 0.5:
+                ball += " {0} {1}".format(round(rand.uniform(-1, 1), 2), round(rand.uniform(-3, 3), 1))
+            objects.append(ball + ")")
+        for _ in range(rand.randint(0, 14)):
+            objects.append(_example_player(rand))
+        rand.shuffle(objects)
+        messages.append("(see {0} {1})".format(tick, " ".join(objects)))
+    return messages
+
+
+def _example_player(rand):
+    if rand.random() < 0.1:
+        return "((P) {0} {1})".format(round(rand.uniform(0, 3), 1), rand.randint(-180, 180))
+    name = rand.choice(["p", "p \"Team1\"", "p \"Team2\" {0}".format(rand.randint(2, 11)),
+                        "p \"Team1\" 1 goalie"])
+    values = [str(round(rand.uniform(1, 60), 1)), str(rand.randint(-45, 45))]
+    layout = rand.choice(["direction", "distance", "changes", "facing", "pointing"])
+    if layout == "direction":
+        values = values[1:]
+    if layout in ["changes", "facing", "pointing"]:
+        values += [str(round(rand.uniform(-1, 1), 2)), str(round(rand.uniform(-3, 3), 1))]
+    if layout in ["facing", "pointing"]:
+        values += [str(rand.randint(-180, 180)), str(rand.randint(-90, 90))]
+    if layout == "pointing":
+        values.append(str(rand.randint(-180, 180)))
+    if layout != "direction" and rand.random() < 0.1:
+        values.append(rand.choice("tk"))
+    return "(({0}) {1})".format(name, " ".join(values))
+
+
+# The objects of a see message, extracted as parsing did before see_tokenizer
+def legacy_tokenize_see(msg) -> SeeTokens:
+    tokens = SeeTokens()
+    for element in re.compile(_SEE_MSG_REGEX).findall(msg):
+        if element.startswith("((f"):
+            identifier = re.compile(".*\\(f ([^\\)]*)\\)").match(element).group(1).replace(" ", "")
+            distance = re.compile(".*\\(f [^\\)]*\\) ({0}) ".format(_REAL_NUM_REGEX)).match(element).group(1)
+            tokens.flags.append(SeenFlag(identifier, float(distance), _legacy_direction(element)))
+        elif element.startswith("((g"):
+            identifier = re.compile(".*\\(([^\\)]*)\\)").match(element).group(1).replace(" ", "")
+            distance = re.compile(".*\\([^\\)]*\\) ({0}) ".format(_REAL_NUM_REGEX)).match(element).group(1)
+            tokens.goals.append(SeenFlag(identifier, float(distance), _legacy_direction(element)))
+        elif element.startswith("((l"):
+            matched = re.compile("\\(\\(l (r|l|b|t)\\)\\s({0}) ({1})".format(_REAL_NUM_REGEX, _SIGNED_INT_REGEX))\
+                .match(element)
+            tokens.lines.append(SeenLine(matched.group(1), float(matched.group(2)), float(matched.group(3))))
+        elif element.startswith("((b") or element.startswith("((B"):
+            values = re.split("\\s+", element.replace(")", "").replace("(", ""))
+            tokens.ball = SeenBall(float(values[1]), int(values[2]), *(
+                (float(values[3]), float(values[4])) if len(values) > 3 else (None, None)))
+        elif element.startswith("((P"):
+            tokens.players_behind += 1
+        elif element.startswith("((p"):
+            tokens.players.append(_legacy_player(element))
+    return tokens
+
+
+def _legacy_direction(element):
+    values = re.split("\\s+", element.split(") ", 1)[1].replace(")", "").replace("(", ""))
+    return float(values[1])
+
+
+def _legacy_player(element):
+    name = re.split("\\s+", re.split("\\)+", element)[0].replace("(", "").replace("\"", ""))
+    team = name[1] if len(name) > 1 else None
+    num = name[2] if len(name) > 2 else None
+    is_goalie = True if len(name) > 3 else None
+    values = re.split("\\s+", re.split("\\)+", element)[1][1:].replace(")", "").replace("(", "").replace("\"", ""))
+    values = [value for value in values if value != "t" and value != "k"]
+    if len(values) == 1:
+        return SeenPlayer(team, num, is_goalie, None, float(values[0]), None, None, None, None)
+    numbers = [float(value) for value in values]
+    if len(values) < 4:
+        return SeenPlayer(team, num, is_goalie, numbers[0], numbers[1], None, None, None, None)
+    if len(values) < 6:
+        return SeenPlayer(team, num, is_goalie, *numbers[:4], None, None)
+    return SeenPlayer(team, num, is_goalie, *numbers[:6])
+
+
+# sense_body messages with random values
+def example_sense_body_messages(count, seed=1234) -> [str]:
+    rand = random.Random(seed)
+    messages = []
+    for tick in range(count):
+        messages.append("(sense_body {0} (view_mode high {1}) (stamina {2} {3} {4}) (speed {5} {6}) (head_angle {7}) "
+                        "(kick {8}) (dash {9}) (turn {8}) (say 0) (turn_neck {8}) (catch 0) (move 0) (change_view 1) "
+                        "(arm (movable 0) (expires 0) (target 0 0) (count 0)) (focus (target none) (count 0)) "
+                        "(tackle (expires 0) (count 0)) (collision {10}) (foul  (charged 0) (card none)))".format(
+                            tick, rand.choice(["narrow", "normal", "wide"]), round(rand.uniform(2000, 8000), 2),
+                            round(rand.uniform(0.6, 1), 3), rand.randint(0, 130600), round(rand.uniform(0, 1.2), 2),
+                            rand.randint(-180, 180), rand.randint(-90, 90), tick // 10, tick,
+                            rand.choice(["none", "none", "(ball)", "(player)"])))
+    return messages
+
+
+def legacy_match_body_sense(msg):
+    regex_string = ".*sense_body ({1}).*view_mode ({2})\\).*stamina ({0}) ({0}) ({0})\\).*speed ({0}) ({1})\\)"
+    regex_string += ".*head_angle ({1})\\).*kick ({1})\\).*dash ({1})\\).*turn ({1})\\)"
+    regex_string += ".*say ({1})\\).*turn_neck ({1})\\).*catch ({1})\\).*move ({1})\\).*change_view ({1})\\)"
+    regex_string += ".*movable ({1})\\).*expires ({1})\\).*target ({1}) ({1})\\).*count ({1})\\)\\)"
+    regex_string += ".*target (none|l|r)( {1})?\\).*count ({1})\\)\\)"
+    regex_string += ".*expires ({1})\\).*count ({1})\\)"
+    regex_string += ".*collision (none|{2})\\).*charged ({1})\\).*card (red|yellow|none)\\)\\)\\)"
+    regex_string = regex_string.format(_REAL_NUM_REGEX, _SIGNED_INT_REGEX, _ROBOCUP_MSG_REGEX)
+    return re.compile(regex_string).match(msg)
+
+
+def _messages_per_second(function, messages, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for msg in messages:
+            function(msg)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return len(messages) / best
+
+
+def _player_state():
+    state = PlayerState()
+    state.position.set_value(Coordinate(-10, 5), 0)
+    state.face_dir.set_value(30, 0)
+    state.body_angle.set_value(30, 0)
+    return state
+
+
+# The players of a see message are only parsed, when the other players are used
+def _parse_see_on_player(use_players):
+    state = _player_state()
+
+    def parse(msg):
+        parsing._update_time(msg, state)
+        parsing._parse_see(msg, state)
+        if use_players:
+            len(state.world_view.other_players)
+        state.world_view.forget_players(state.now(), 20)
+
+    return parse
+
+
+if __name__ == "__main__":
+    see_messages = example_see_messages(2000)
+    sense_body_messages = example_sense_body_messages(2000)
+    results = [("sense_body, legacy regex", _messages_per_second(legacy_match_body_sense, sense_body_messages)),
+               ("sense_body, parsing._parse_body_sense", _messages_per_second(
+                   lambda msg, state=_player_state(): parsing._parse_body_sense(msg, state), sense_body_messages)),
+               ("see, legacy regex extraction", _messages_per_second(legacy_tokenize_see, see_messages)),
+               ("see, tokenize_see", _messages_per_second(tokenize_see, see_messages)),
+               ("see, parsing._parse_see", _messages_per_second(_parse_see_on_player(False), see_messages, repeat=1)),
+               ("see, parsing._parse_see with players", _messages_per_second(_parse_see_on_player(True), see_messages,
+                                                                            repeat=1))]
+    for name, rate in results:
+        print("{0}: {1:.0f} messages per second".format(name, rate))
+        statistics.append_to_csv("parsing_benchmark.csv", "parser, messages_per_second",
+                                 "{0}, {1:.0f}".format(name, rate))
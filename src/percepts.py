@@ -0,0 +1,44 @@
+from collections import namedtuple
+
+"""
+Immutable records of what a player perceives in a see, sense_body or hear message.
+When configurations.PARSE_IN_RECEIVE_STAGE is set, the connection of a player turns every received see, sense_body and
+hear message into a percept with parsing.read_percept, in the I/O thread. The thinker then only applies the percept to
+the player state, see parsing.apply_percept. The percepts consist of tuples, numbers and strings only, so they can also
+be sent between processes.
+
+Like a client_connection.Datagram, a percept has the time it was received and startswith, so the perception mailbox and
+the thinker treat it as the message it was read from.
+"""
+
+
+class _Percept:
+    __slots__ = ()
+    HEAD = b""
+
+    # Only prefixes up to the first word of the message can be checked, f.ex. b"(see "
+    def startswith(self, prefix: bytes) -> bool:
+        return self.HEAD.startswith(prefix)
+
+
+# The objects of a see message as in see_tokenizer.SeeTokens. The players are (name, values) slices, that are parsed
+# when they are needed
+class SeePercept(_Percept, namedtuple("SeePercept", ["time", "flags", "goals", "lines", "ball", "player_slices",
+                                                     "players_behind", "received_at", "parse_seconds"])):
+    __slots__ = ()
+    HEAD = b"(see "
+
+
+# values are (attribute of BodyState, value). Fields missing from the message are None
+class BodyPercept(_Percept, namedtuple("BodyPercept", ["time", "values", "view_mode", "collision", "speed",
+                                                       "received_at", "parse_seconds"])):
+    __slots__ = ()
+    HEAD = b"(sense_body "
+
+
+class HearPercept(_Percept, namedtuple("HearPercept", ["time", "sender", "text", "received_at", "parse_seconds"])):
+    __slots__ = ()
+    HEAD = b"(hear "
+
+
+PERCEPTS = (SeePercept, BodyPercept, HearPercept)
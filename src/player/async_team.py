@@ -0,0 +1,76 @@
+import asyncio
+import threading
+
+from player.async_thinker import AsyncThinker
+
+"""
+Runs a whole team of AsyncThinkers on a single asyncio event loop in one thread.
+This is the asyncio alternative to starting a player_client.Client (and its two threads) for every player.
+"""
+
+
+class AsyncTeam(threading.Thread):
+
+    def __init__(self, team: str, num_players: int, UDP_PORT, UDP_IP, synch_mode: bool = False,
+                 capture_dir=None) -> None:
+        super().__init__()
+        self.team = team
+        self.num_players = num_players
+        self.udp_port = UDP_PORT
+        self.udp_ip = UDP_IP
+        self.synch_mode = synch_mode
+        # If given, the traffic of every player is recorded to a file in this directory
+        self.capture_dir = capture_dir
+        self.thinkers: [AsyncThinker] = []
+        # Set when the goalie has been accepted by the server, so the other team can connect safely afterwards
+        self.goalie_connected = threading.Event()
+        self._stop_event = threading.Event()
+        self._loop: asyncio.AbstractEventLoop = None
+        self._stop_requested: asyncio.Event = None
+
+    def run(self) -> None:
+        super().run()
+        asyncio.run(self._run_team())
+
+    async def _run_team(self):
+        self._stop_requested = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        if self._stop_event.is_set():
+            self._stop_requested.set()
+        tasks = []
+        for player_num in range(self.num_players):
+            # Everyone but the goalie get their player type from the server depending on their unum
+            player_type = "goalie" if player_num == 0 else "NaN"
+            capture_file = None
+            if self.capture_dir is not None:
+                capture_file = self.capture_dir / "{0}_{1}.rccap".format(self.team, player_num + 1)
+            thinker = AsyncThinker(self.team, player_type, self.synch_mode, capture_file)
+            self.thinkers.append(thinker)
+            tasks.append(asyncio.ensure_future(thinker.run_async(self.udp_ip, self.udp_port)))
+            if player_num == 0:
+                # Make sure, the goalie connects first to get unum 1
+                waiters = [asyncio.ensure_future(thinker.initialized.wait()),
+                           asyncio.ensure_future(self._stop_requested.wait())]
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+                for waiter in waiters:
+                    waiter.cancel()
+                if self._stop_requested.is_set():
+                    break
+                self.goalie_connected.set()
+
+        await self._stop_requested.wait()
+        for thinker in self.thinkers:
+            thinker.stop()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._stop_requested.set)
+        except RuntimeError:
+            pass  # The loop has already finished
+
+    def player_states(self):
+        return [thinker.player_state for thinker in self.thinkers]
@@ -0,0 +1,95 @@
+import asyncio
+
+import parsing
+import traffic_capture
+from async_connection import AsyncConnection
+from configurations import GOALIE_MODEL_TEAMS, PARSE_IN_RECEIVE_STAGE
+from player import player_thinker
+from player.perception_mailbox import AsyncPerceptionMailbox
+from player.playerstrategy import determine_objective
+from uppaal import goalie_strategy
+
+"""
+Runs the decisions of player_thinker.Thinker as a coroutine on an asyncio event loop.
+The think loop is driven by incoming messages instead of a timer. An action is performed once per server cycle,
+when the messages received for a new cycle (sense_body and see) have been processed. If the server runs in
+synchronous mode, the action is performed when the server sends (think) instead.
+The thread that Thinker inherits is never started.
+"""
+
+
+class AsyncThinker(player_thinker.Thinker):
+
+    def __init__(self, team_name: str, player_type: str, synch_mode: bool = False, capture_file=None):
+        super().__init__(team_name, player_type, synch_mode)
+        # If given, the traffic of the player is recorded to this file
+        self.capture_file = capture_file
+        self.player_conn: AsyncConnection = None
+        # Must be created on the event loop that runs the thinker
+        self.input_queue = AsyncPerceptionMailbox()
+        self.initialized = asyncio.Event()
+        # Set when a sense_body message has been received, which the server sends once every cycle
+        self._new_cycle = False
+
+    def stop(self) -> None:
+        super().stop()
+        # Wake the think loop, so it can see that it should stop
+        self.input_queue.put_nowait(None)
+
+    async def run_async(self, UDP_IP, UDP_PORT):
+        loop = asyncio.get_running_loop()
+        recorder = None if self.capture_file is None else traffic_capture.TrafficRecorder(self.capture_file)
+        receive_stage = parsing.read_percept if PARSE_IN_RECEIVE_STAGE else None
+        _, self.player_conn = await loop.create_datagram_endpoint(
+            lambda: AsyncConnection(UDP_IP, UDP_PORT, self, recorder=recorder, receive_stage=receive_stage),
+            local_addr=("0.0.0.0", 0))
+        try:
+            if await self._init_player():
+                await self._think_async()
+        finally:
+            self.player_conn.stop()
+
+    async def _init_player(self):
+        self.player_conn.action_queue.put(self.init_string())
+        init_msg: str = await self.input_queue.get()
+        if init_msg is None:
+            return False  # Stopped before the server answered
+        parsing.parse_message_update_state(init_msg, self.player_state)
+        self.initialized.set()
+
+        self.player_conn.action_queue.put("(synch_see)")
+        self.position_player()
+        # The port has already been switched when the init message was received, so no need to wait here
+        self.player_conn.action_queue.put("(clang (ver 8 8))")
+
+        if self.player_state.player_type == "goalie" and self.player_state.team_name in GOALIE_MODEL_TEAMS:
+            self.player_state.goalie_position_dict = goalie_strategy.get_result_dict()
+        return True
+
+    async def _think_async(self):
+        self.player_state.current_objective = determine_objective(self.player_state)
+
+        while not self._stop_event.is_set():
+            self._handle_async_message(await self.input_queue.get())
+            # Process everything that arrived in the same burst, before deciding
+            while not self.input_queue.empty():
+                self._handle_async_message(self.input_queue.get_nowait())
+
+            self.update_strategy_generation()
+
+            if self._stop_event.is_set():
+                break
+            # Act once per server cycle, or when the server asks for it in synchronous mode
+            if self.synch_mode and self._think_requested:
+                self.perform_synchronized_action()
+            elif not self.synch_mode and self._new_cycle:
+                self._new_cycle = False
+                self.on_action_tick()
+                self.player_conn.action_queue.end_cycle()
+
+    def _handle_async_message(self, msg):
+        if msg is None:
+            return
+        if msg.startswith(b"(sense_body"):
+            self._new_cycle = True
+        self.handle_message(msg)
@@ -0,0 +1,221 @@
+import math
+import os
+import selectors
+import threading
+import time
+
+import client_connection
+import parsing
+import traffic_capture
+from configurations import COALESCE_COMMANDS, GOALIE_MODEL_TEAMS, PARSE_IN_RECEIVE_STAGE, WARNING_PREFIX
+from player import player_thinker
+from player.playerstrategy import determine_objective
+from uppaal import goalie_strategy
+
+"""
+Runs many players on a few threads, instead of three threads (client, connection and thinker) per player.
+Every scheduler thread owns a number of agents, and steps through them round-robin. A step receives the datagrams
+waiting on the socket of the agent, parses them, acts if it is time to act and sends the queued commands.
+The agents use the same Thinker and Connection as the threaded client model, but their threads are never started.
+
+An agent, whose step raises an exception, is marked as crashed and disconnected, so the other agents of the
+scheduler keep playing.
+
+The CPU time spent in the steps of every agent is accounted, so the cost of the players can be compared with the
+threaded client model.
+"""
+
+# Longest time a scheduler waits for datagrams, before it steps through its agents again
+_MAX_WAIT = 0.01
+
+
+class CooperativeAgent:
+    # Same interface as player_client.Client, so SoccerSim can start and stop both in the same way
+
+    def __init__(self, scheduler, team: str, UDP_PORT, UDP_IP, player_type, synch_mode=False,
+                 capture_file=None) -> None:
+        self.scheduler = scheduler
+        self.think = player_thinker.Thinker(team, player_type, synch_mode)
+        recorder = None if capture_file is None else traffic_capture.TrafficRecorder(capture_file)
+        receive_stage = parsing.read_percept if PARSE_IN_RECEIVE_STAGE else None
+        self.player_conn = client_connection.Connection(UDP_PORT=UDP_PORT, UDP_IP=UDP_IP, think=self.think,
+                                                        schedule_player_commands=True, coalesce=COALESCE_COMMANDS,
+                                                        recorder=recorder, receive_stage=receive_stage)
+        self.think.player_conn = self.player_conn
+        self.initialized = threading.Event()
+        self.stopped = threading.Event()
+        # Set when a step raised an exception, and the agent was disconnected
+        self.crashed = False
+        # Not used in synchronous mode, where the player acts when the server sends (think)
+        self.next_action_time = math.inf
+
+        # Time accounting
+        self.cpu_seconds = 0
+        self.steps = 0
+        self.longest_step = 0
+
+    # Connects to the server. Returns when the server has answered, so the players get their unum in order
+    def start(self, timeout=5) -> None:
+        self.player_conn.action_queue.put(self.think.init_string())
+        self.scheduler.add(self)
+        self.initialized.wait(timeout)
+
+    def stop(self) -> None:
+        self.think.stop()
+        self.scheduler.remove(self)
+
+    def join(self, timeout=1) -> None:
+        self.stopped.wait(timeout)
+
+    def step(self, readable: bool) -> None:
+        started = time.thread_time()
+        if readable:
+            self.player_conn._on_readable()
+
+        if not self.initialized.is_set():
+            self._initialize()
+        else:
+            while not self.think.input_queue.empty():
+                self.think.handle_message(self.think.input_queue.get_nowait())
+            self.think.update_strategy_generation()
+            if self.think.synch_mode:
+                self.think.act_if_requested()
+            else:
+                self.next_action_time = self.think.act_if_due(self.next_action_time)
+
+        self.player_conn._flush_actions()
+
+        duration = time.thread_time() - started
+        self.cpu_seconds += duration
+        self.steps += 1
+        self.longest_step = max(self.longest_step, duration)
+
+    # The same steps as Thinker.start and Thinker.run, without waiting
+    def _initialize(self):
+        if self.think.input_queue.empty():
+            return
+        parsing.parse_message_update_state(self.think.input_queue.get_nowait(), self.think.player_state)
+        self.player_conn.action_queue.put("(synch_see)")
+        self.think.position_player()
+        # The port has already been switched when the init message was received
+        self.player_conn.action_queue.put("(clang (ver 8 8))")
+
+        state = self.think.player_state
+        if state.player_type == "goalie" and state.team_name in GOALIE_MODEL_TEAMS:
+            state.goalie_position_dict = goalie_strategy.get_result_dict()
+        state.current_objective = determine_objective(state)
+        self.next_action_time = time.monotonic() + 0.1
+        self.initialized.set()
+
+    def time_text(self):
+        mean = 0 if self.steps == 0 else self.cpu_seconds / self.steps * 1000
+        return "cpu: {0:.3f} s, steps: {1}, mean step: {2:.3f} ms, longest step: {3:.3f} ms".format(
+            self.cpu_seconds, self.steps, mean, self.longest_step * 1000)
+
+
+class CooperativeScheduler(threading.Thread):
+
+    def __init__(self, name="CooperativeScheduler") -> None:
+        super().__init__(name=name)
+        self._stop_event = threading.Event()
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self.agents: [CooperativeAgent] = []
+        # Agents added and removed by other threads. Only the scheduler thread changes the agents and the selector
+        self._to_add = []
+        self._to_remove = []
+
+    def add(self, agent: CooperativeAgent) -> None:
+        with self._lock:
+            self._to_add.append(agent)
+
+    def remove(self, agent: CooperativeAgent) -> None:
+        with self._lock:
+            self._to_remove.append(agent)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def run(self) -> None:
+        super().run()
+        while not self._stop_event.is_set():
+            self._process_pending()
+            readable = set()
+            if len(self.agents) > 0:
+                readable = {key.data for key, _ in self._selector.select(self._wait_time())}
+            else:
+                time.sleep(_MAX_WAIT)
+            for agent in list(self.agents):
+                try:
+                    agent.step(agent in readable)
+                except Exception as e:
+                    self._crash(agent, e)
+
+        self._process_pending()
+        for agent in self.agents:
+            self._disconnect(agent)
+        self._selector.close()
+
+    # Wait for datagrams until the next agent should act
+    def _wait_time(self):
+        next_action_time = min(agent.next_action_time for agent in self.agents)
+        return max(0.0, min(_MAX_WAIT, next_action_time - time.monotonic()))
+
+    def _process_pending(self):
+        with self._lock:
+            to_add = self._to_add
+            to_remove = self._to_remove
+            self._to_add = []
+            self._to_remove = []
+        for agent in to_add:
+            self.agents.append(agent)
+            self._selector.register(agent.player_conn.sock, selectors.EVENT_READ, agent)
+            # Send the init message right away
+            agent.player_conn._flush_actions()
+        for agent in to_remove:
+            if agent in self.agents:
+                self.agents.remove(agent)
+                self._disconnect(agent)
+
+    def _crash(self, agent: CooperativeAgent, error: Exception):
+        state = agent.think.player_state
+        print(WARNING_PREFIX + "Player {0} of {1} crashed and is disconnected: {2!r}".format(state.num,
+                                                                                          state.team_name, error))
+        agent.crashed = True
+        agent.think.stop()
+        self.agents.remove(agent)
+        self._disconnect(agent)
+
+    def _disconnect(self, agent: CooperativeAgent):
+        self._selector.unregister(agent.player_conn.sock)
+        agent.player_conn.stop()
+        agent.stopped.set()
+
+
+# A number of scheduler threads, that the agents are spread over
+class CooperativeRuntime:
+
+    def __init__(self, num_threads: int = None) -> None:
+        if num_threads is None:
+            num_threads = os.cpu_count() or 1
+        self.schedulers = [CooperativeScheduler("CooperativeScheduler-{0}".format(i)) for i in range(num_threads)]
+        self.agents: [CooperativeAgent] = []
+
+    def start(self) -> None:
+        for scheduler in self.schedulers:
+            scheduler.start()
+
+    def stop(self) -> None:
+        for scheduler in self.schedulers:
+            scheduler.stop()
+
+    def join(self) -> None:
+        for scheduler in self.schedulers:
+            scheduler.join()
+
+    def create_agent(self, team: str, UDP_PORT, UDP_IP, player_type, synch_mode=False,
+                     capture_file=None) -> CooperativeAgent:
+        scheduler = self.schedulers[len(self.agents) % len(self.schedulers)]
+        agent = CooperativeAgent(scheduler, team, UDP_PORT, UDP_IP, player_type, synch_mode, capture_file)
+        self.agents.append(agent)
+        return agent
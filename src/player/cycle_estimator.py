@@ -0,0 +1,57 @@
+import math
+
+from configurations import SERVER_CYCLE_LENGTH, ACTION_OFFSET_IN_CYCLE
+
+"""
+Estimates when the server cycles begin, so commands can be sent at a fixed point inside every cycle.
+The server sends sense_body at the beginning of every cycle. The arrival times of these messages are used to
+estimate the cycle boundaries and the jitter of the arrivals online. Sending at a wall clock interval instead,
+slowly drifts relative to the server, which causes commands to land in the wrong cycle or to collide.
+"""
+
+
+class ServerCycleEstimator:
+
+    def __init__(self, cycle_length=SERVER_CYCLE_LENGTH, action_offset=ACTION_OFFSET_IN_CYCLE, smoothing=0.1):
+        self.cycle_length = cycle_length
+        # Time after the cycle boundary at which to act
+        self.action_offset = action_offset
+        self.smoothing = smoothing
+        # Mean absolute deviation of the sense_body arrivals from the estimated boundaries
+        self.jitter = 0.0
+        # Estimated time of a recent cycle boundary and its index
+        self._boundary = None
+        self._boundary_index = 0
+        self._last_action_cycle = None
+
+    def has_estimate(self):
+        return self._boundary is not None
+
+    def register_sense_body(self, arrival_time):
+        if self._boundary is None:
+            self._boundary = arrival_time
+            return
+
+        cycles_since_boundary = max(0, round((arrival_time - self._boundary) / self.cycle_length))
+        predicted_boundary = self._boundary + cycles_since_boundary * self.cycle_length
+        error = arrival_time - predicted_boundary
+        self.jitter += self.smoothing * (abs(error) - self.jitter)
+        self._boundary = predicted_boundary + self.smoothing * error
+        self._boundary_index += cycles_since_boundary
+
+    def cycle_index(self, time):
+        return self._boundary_index + math.floor((time - self._boundary) / self.cycle_length)
+
+    # The time to act in the first cycle, that has not been acted in yet
+    def next_action_time(self, now):
+        cycle = self.cycle_index(now)
+        if self._last_action_cycle is not None and cycle <= self._last_action_cycle:
+            cycle = self._last_action_cycle + 1
+        # Leave room for late arrivals of this cycle's sensor information, but still act well within the cycle
+        offset = min(self.action_offset + 2 * self.jitter, self.cycle_length * 0.8)
+        return self._boundary + (cycle - self._boundary_index) * self.cycle_length + offset
+
+    def register_action(self, now):
+        if self._boundary is None:
+            return
+        self._last_action_cycle = self.cycle_index(now)
@@ -0,0 +1,150 @@
+import asyncio
+import collections
+import queue
+import threading
+import time
+
+"""
+Input queue for the player thinker, that only keeps the newest perception.
+When the thinker falls behind (f.ex. while a strategy thread holds the GIL), parsing every stale see and sense_body
+message would only make it fall further behind. The mailbox therefore replaces a queued see message by a newer see
+message, and a queued sense_body message by a newer sense_body message. Every other message, such as hear messages
+with play mode changes from the referee, is kept in the order it was received.
+
+The mailbox can be used in place of a queue.Queue (put, get, get_nowait, empty and qsize).
+AsyncPerceptionMailbox does the same for the asyncio thinker, in place of an asyncio.Queue.
+"""
+
+_SEE = "(see "
+_SENSE_BODY = "(sense_body"
+
+
+def _starts_with(msg, prefix: str):
+    # None is put to wake a waiting thinker, and is not a message
+    if msg is None:
+        return False
+    if isinstance(msg, str):
+        return msg.startswith(prefix)
+    return msg.startswith(prefix.encode())
+
+
+class PerceptionMailbox:
+
+    def __init__(self) -> None:
+        self._not_empty = threading.Condition()
+        # Entries are [message]. Replaced messages are left behind as empty entries to keep the order of the others.
+        self._entries = collections.deque()
+        self._size = 0
+        self._queued_see = None
+        self._queued_sense_body = None
+        self.dropped_see = 0
+        self.dropped_sense_body = 0
+
+    def put(self, msg, block=True, timeout=None):
+        with self._not_empty:
+            self._put(msg)
+            self._not_empty.notify()
+
+    # Queues the messages of one receive burst under a single lock acquisition
+    def put_all(self, messages):
+        with self._not_empty:
+            for msg in messages:
+                self._put(msg)
+            self._not_empty.notify()
+
+    def _put(self, msg):
+        entry = [msg]
+        if _starts_with(msg, _SEE):
+            if self._queued_see is not None:
+                self._queued_see.clear()
+                self._size -= 1
+                self.dropped_see += 1
+            self._queued_see = entry
+        elif _starts_with(msg, _SENSE_BODY):
+            if self._queued_sense_body is not None:
+                self._queued_sense_body.clear()
+                self._size -= 1
+                self.dropped_sense_body += 1
+            self._queued_sense_body = entry
+        self._entries.append(entry)
+        self._size += 1
+
+    def get(self, block=True, timeout=None):
+        with self._not_empty:
+            if not block:
+                if self._size == 0:
+                    raise queue.Empty
+            elif timeout is None:
+                while self._size == 0:
+                    self._not_empty.wait()
+            else:
+                end_time = time.monotonic() + timeout
+                while self._size == 0:
+                    remaining = end_time - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Empty
+                    self._not_empty.wait(remaining)
+
+            while True:
+                entry = self._entries.popleft()
+                if len(entry) > 0:
+                    break
+            if entry is self._queued_see:
+                self._queued_see = None
+            elif entry is self._queued_sense_body:
+                self._queued_sense_body = None
+            self._size -= 1
+            return entry[0]
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def empty(self):
+        return self._size == 0
+
+    def qsize(self):
+        return self._size
+
+    def dropped_messages_text(self):
+        return "see: {0}, sense_body: {1}".format(self.dropped_see, self.dropped_sense_body)
+
+
+# Must be created and used on the event loop that runs the thinker
+class AsyncPerceptionMailbox:
+
+    def __init__(self) -> None:
+        self._mailbox = PerceptionMailbox()
+        self._not_empty = asyncio.Event()
+
+    @property
+    def dropped_see(self):
+        return self._mailbox.dropped_see
+
+    @property
+    def dropped_sense_body(self):
+        return self._mailbox.dropped_sense_body
+
+    def put_nowait(self, msg):
+        self._mailbox.put(msg)
+        self._not_empty.set()
+
+    async def get(self):
+        while self._mailbox.empty():
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self._mailbox.get_nowait()
+
+    def get_nowait(self):
+        try:
+            return self._mailbox.get_nowait()
+        except queue.Empty:
+            raise asyncio.QueueEmpty
+
+    def empty(self):
+        return self._mailbox.empty()
+
+    def qsize(self):
+        return self._mailbox.qsize()
+
+    def dropped_messages_text(self):
+        return self._mailbox.dropped_messages_text()
@@ -1,4 +1,5 @@
 import math
+import threading
 
 import configurations
 from geometry import calculate_full_origin_angle_radians, is_angle_in_range, smallest_angle_difference, get_xy_vector, \
@@ -19,6 +20,11 @@ PASSED_MODE = "PASSED"
 CATCH_MODE = "CATCH"
 
 
+# A strategy may still be generated for the previous scenario, so is_generating_strategy is kept too
+_KEPT_ON_SCENARIO_RESET = ["team_name", "num", "player_type", "starting_position", "playing_position",
+                           "objective_behaviour", "goalie_position_dict", "is_generating_strategy", "statistics"]
+
+
 class PlayerState:
 
     def __init__(self):
@@ -47,6 +53,8 @@ class PlayerState:
 
         self.is_generating_strategy = False
         self.strategy_result_list: [] = []
+        # Counts the scenario resets, so strategies generated for an earlier scenario can be discarded
+        self.scenario = 0
 
         self.dribble_or_pass_strat = PrecariousData.unknown()
         self.last_dribble_pass_strat = -9999
@@ -61,6 +69,25 @@ class PlayerState:
         self.statistics = Statistics()
         super().__init__()
 
+    # Forgets everything observed and decided in the previous scenario of a trainer session. Who the player is, its
+    # positions in the formation and its statistics are kept
+    def reset_for_scenario(self):
+        reset_state = PlayerState()
+        for name in _KEPT_ON_SCENARIO_RESET:
+            setattr(reset_state, name, getattr(self, name))
+        reset_state.world_view.side = self.world_view.side
+        reset_state.world_view.sim_time = self.world_view.sim_time
+        reset_state.scenario = self.scenario + 1
+        # Replaces the result list and the scenario number in one step
+        self.__dict__.update(reset_state.__dict__)
+
+    # Called by the strategy workers. A result generated for an earlier scenario is discarded
+    def add_strategy_result(self, result, scenario):
+        # The list is looked up before the scenario number, so a reset in between is noticed
+        result_list = self.strategy_result_list
+        if self.scenario == scenario:
+            result_list.append(result)
+
     def get_y_north_velocity_vector(self):
         return Vector2D.velocity_to_xy(self.body_state.speed, inverse_y_axis(self.body_angle.get_value()))
 
@@ -289,8 +316,7 @@ class PlayerState:
 
     def on_see_update(self):
         # Delete old observations of players
-        self.world_view.other_players = list(filter(lambda op: self.now() - op.last_updated_time < 20,
-                                                    self.world_view.other_players))
+        self.world_view.forget_players(self.now(), 20)
 
         self.action_history.three_see_updates_ago = self.action_history.two_see_updates_ago
         self.action_history.two_see_updates_ago = self.action_history.last_see_update
@@ -435,6 +461,17 @@ class Statistics(object):
         self.missed_ticks_history = []
         self.applied_possession_strategies = 0
         self.outdated_possession_strategies = 0
+        self.parse_latency = LatencyHistogram()
+        # See messages with players in them, and how many of them the players were parsed of
+        self.sees_with_players = 0
+        self.sees_with_players_parsed = 0
+        self.percept_times = PerceptTimes()
+
+    def register_parse_latency(self, seconds):
+        self.parse_latency.register(seconds)
+
+    def register_percept(self, kind, parse_seconds, apply_seconds):
+        self.percept_times.register(kind, parse_seconds, apply_seconds)
 
     def register_missed_tick(self):
         self.current_missed_ticks += 1
@@ -452,10 +489,81 @@ class Statistics(object):
     def print_to_file(self, player_num, player_team):
         pass
 
+    def total_missed_ticks(self):
+        return sum(self.missed_ticks_history) + self.current_missed_ticks
+
     def missed_ticks_text(self):
         return str(self.missed_ticks_history).replace('[', '').replace(']', '')
 
 
+# Time spent on the percepts of each kind, when messages are parsed in the receive stage. Parsing is done in the I/O
+# thread, and applying the percept to the player state in the thinker
+class PerceptTimes:
+
+    def __init__(self) -> None:
+        self.counts = {}
+        self.parse_seconds = {}
+        self.apply_seconds = {}
+
+    def register(self, kind, parse_seconds, apply_seconds):
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        self.parse_seconds[kind] = self.parse_seconds.get(kind, 0) + parse_seconds
+        self.apply_seconds[kind] = self.apply_seconds.get(kind, 0) + apply_seconds
+
+    def add(self, other):
+        for kind, count in other.counts.items():
+            self.counts[kind] = self.counts.get(kind, 0) + count
+            self.parse_seconds[kind] = self.parse_seconds.get(kind, 0) + other.parse_seconds[kind]
+            self.apply_seconds[kind] = self.apply_seconds.get(kind, 0) + other.apply_seconds[kind]
+
+    def mean_parse_us(self, kind):
+        return self.parse_seconds[kind] / self.counts[kind] * 1000000
+
+    def mean_apply_us(self, kind):
+        return self.apply_seconds[kind] / self.counts[kind] * 1000000
+
+
+# Distribution of latencies with a resolution of 1 ms. Everything above MAX_MS is counted in the last bucket.
+class LatencyHistogram:
+    MAX_MS = 100
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (self.MAX_MS + 1)
+        self.count = 0
+        self.total_seconds = 0
+
+    def register(self, seconds):
+        self.buckets[min(int(seconds * 1000), self.MAX_MS)] += 1
+        self.count += 1
+        self.total_seconds += seconds
+
+    def add(self, other):
+        for i, amount in enumerate(other.buckets):
+            self.buckets[i] += amount
+        self.count += other.count
+        self.total_seconds += other.total_seconds
+
+    # Returns the upper bound in ms of the bucket containing the given percentile
+    def percentile(self, percent):
+        if self.count == 0:
+            return 0
+        threshold = self.count * percent / 100
+        accumulated = 0
+        for i, amount in enumerate(self.buckets):
+            accumulated += amount
+            if accumulated >= threshold:
+                return i + 1
+        return self.MAX_MS + 1
+
+    def mean_ms(self):
+        return 0 if self.count == 0 else self.total_seconds / self.count * 1000
+
+    def text(self):
+        return "count: {0}, mean: {1:.2f} ms, p50: {2} ms, p90: {3} ms, p99: {4} ms\n{5}".format(
+            self.count, self.mean_ms(), self.percentile(50), self.percentile(90), self.percentile(99),
+            str(self.buckets).replace('[', '').replace(']', ''))
+
+
 class ActionHistory:
     def __init__(self) -> None:
         self.turn_history = ViewFrequency()
@@ -556,7 +664,10 @@ class BodyState:
 class WorldView:
     def __init__(self, sim_time):
         self.sim_time = sim_time
-        self.other_players: [PrecariousData] = []
+        self._other_players: [PrecariousData] = []
+        # (tick, parse function) of the see messages, whose players have not been parsed yet, oldest first
+        self._unparsed_players = []
+        self._unparsed_players_lock = threading.Lock()
         self.ball: PrecariousData = PrecariousData.unknown()
         self.goals = []
         self.lines = []
@@ -566,6 +677,27 @@ class WorldView:
     def __repr__(self) -> str:
         return super().__repr__()
 
+    # The players of see messages are parsed, the first time the other players are needed after the see message
+    @property
+    def other_players(self) -> [PrecariousData]:
+        if len(self._unparsed_players) > 0:
+            with self._unparsed_players_lock:
+                for _, parse in self._unparsed_players:
+                    parse()
+                self._unparsed_players.clear()
+        return self._other_players
+
+    def add_unparsed_players(self, tick, parse):
+        with self._unparsed_players_lock:
+            self._unparsed_players.append((tick, parse))
+
+    # Forgets the players not seen within max_age ticks. The players of see messages this old, that have not been
+    # parsed yet, are never parsed
+    def forget_players(self, now, max_age):
+        with self._unparsed_players_lock:
+            self._other_players = [op for op in self._other_players if now - op.last_updated_time < max_age]
+            self._unparsed_players = [(tick, parse) for tick, parse in self._unparsed_players if now - tick < max_age]
+
     def is_marked(self, team, max_data_age, min_distance=3):
         opponents: [ObservedPlayer] = self.get_teammates(team, max_data_age=max_data_age)
         for opponent in opponents:
@@ -709,14 +841,16 @@ class WorldView:
 
         return free_team_mates
 
-    def update_player_view(self, observed_player: ObservedPlayer):
-        for i, data_point in enumerate(self.other_players):
+    # The time is the tick of the see message the player was observed in, and the current tick by default
+    def update_player_view(self, observed_player: ObservedPlayer, time=None):
+        time = self.sim_time if time is None else time
+        for i, data_point in enumerate(self._other_players):
             p = data_point.get_value()
             if p.num == observed_player.num and p.team == observed_player.team:
-                self.other_players[i].set_value(observed_player, self.sim_time)
+                self._other_players[i].set_value(observed_player, time)
                 return
         # Add new data point if player does not already exist in list
-        self.other_players.append(PrecariousData(observed_player, self.sim_time))
+        self._other_players.append(PrecariousData(observed_player, time))
 
     def ball_speed(self):
         t1 = self.ball.get_value().last_position.last_updated_time
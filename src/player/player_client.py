@@ -1,19 +1,29 @@
+from configurations import COALESCE_COMMANDS, PARSE_IN_RECEIVE_STAGE
 from player import player_thinker
 import client_connection
+import parsing
 import threading
+import traffic_capture
 import time
 
 
 class Client(threading.Thread):
 
     # Start up the player
-    def __init__(self, team: str, UDP_PORT, UDP_IP, player_type) -> None:
+    def __init__(self, team: str, UDP_PORT, UDP_IP, player_type, reactor=None, synch_mode=False,
+                 capture_file=None) -> None:
         # Init thinker thread
         super().__init__()
         self._stop_event = threading.Event()
-        self.think = player_thinker.Thinker(team, player_type)
-        # Init player connection thread
-        self.player_conn = client_connection.Connection(UDP_PORT=UDP_PORT, UDP_IP=UDP_IP, think=self.think)
+        self.think = player_thinker.Thinker(team, player_type, synch_mode)
+        # Record the traffic of the player, so it can be replayed without the server
+        recorder = None if capture_file is None else traffic_capture.TrafficRecorder(capture_file)
+        # Init player connection thread. Messages are optionally parsed into percepts before they reach the thinker
+        receive_stage = parsing.read_percept if PARSE_IN_RECEIVE_STAGE else None
+        self.player_conn = client_connection.Connection(UDP_PORT=UDP_PORT, UDP_IP=UDP_IP, think=self.think,
+                                                        reactor=reactor, schedule_player_commands=True,
+                                                        coalesce=COALESCE_COMMANDS, recorder=recorder,
+                                                        receive_stage=receive_stage)
         # Give reference of connection to thinker thread
         self.think.player_conn = self.player_conn
 
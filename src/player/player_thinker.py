@@ -3,9 +3,11 @@ import re
 import threading
 import queue
 
-from configurations import GOALIE_MODEL_TEAMS
+from configurations import GOALIE_MODEL_TEAMS, SERVER_CYCLE_LENGTH
 from player import player
 import client_connection
+from player.cycle_estimator import ServerCycleEstimator
+from player.perception_mailbox import AsyncPerceptionMailbox, PerceptionMailbox
 from player.player import PlayerState
 import time
 import parsing
@@ -13,13 +15,13 @@ from player.playerstrategy import determine_objective
 from player.startup_positions import goalie_pos, defenders_pos, midfielders_pos, strikers_pos
 from player.world_objects import Coordinate
 from statisticsmodule import statistics
-from uppaal import strategy, goalie_strategy
+from uppaal import strategy, goalie_strategy, strategy_pool
 from utils import debug_msg
 
 
 class Thinker(threading.Thread):
 
-    def __init__(self, team_name: str, player_type: str):
+    def __init__(self, team_name: str, player_type: str, synch_mode: bool = False):
         super().__init__()
         self._stop_event = threading.Event()
         self.player_state: PlayerState = player.PlayerState()
@@ -29,28 +31,40 @@ class Thinker(threading.Thread):
         # Connection with the server
         self.player_conn: client_connection.Connection = None
 
-        # Messages from the server that has not yet been processed
-        self.input_queue = queue.Queue()
+        # Messages from the server that has not yet been processed. Only the newest see and sense_body are kept.
+        self.input_queue = PerceptionMailbox()
+        # Used to schedule actions relative to the server cycles
+        self.cycle_estimator = ServerCycleEstimator()
         self.is_positioned = False
 
+        # If the server runs in synchronous mode, the player acts when the server sends (think) instead of on a timer
+        self.synch_mode = synch_mode
+        self._think_requested = False
+        # Set when the server has answered the init message, and the player has been positioned
+        self.initialized = threading.Event()
+        # Set by a trainer session, when the player should forget the previous scenario. See request_scenario_reset
+        self._scenario_reset_requested = False
+        self.scenario_reset_done = threading.Event()
+
+        # The strategy this player has requested from the shared strategy pool, if any
+        self._strategy_request: strategy_pool.StrategyRequest = None
+
     def start(self) -> None:
         # Send init messages to the server
         super().start()
-        if self.player_state.player_type == "goalie":
-            init_string = "(init " + self.player_state.team_name + "(goalie)" + "(version 16))"
-        else:
-            init_string = "(init " + self.player_state.team_name + " (version 16))"
-
-        self.player_conn.action_queue.put(init_string)
+        self.player_conn.action_queue.put(self.init_string())
         init_msg: str = self.input_queue.get()
         parsing.parse_message_update_state(init_msg, self.player_state)
         self.player_conn.action_queue.put("(synch_see)")
         self.position_player()
+        self.initialized.set()
 
     def run(self) -> None:
         super().run()
-        # Wait for client connection thread to receive the correct new port
-        time.sleep(1.5)
+        # The connection has switched to the port of the player, when the init message has been received
+        while not self.initialized.wait(0.1):
+            if self._stop_event.is_set():
+                return
         # Set accepted coach language versions
         self.player_conn.action_queue.put("(clang (ver 8 8))")
 
@@ -61,53 +75,158 @@ class Thinker(threading.Thread):
 
     def stop(self) -> None:
         self._stop_event.set()
+        # A strategy, that is still waiting in the pool, is of no use anymore
+        if self._strategy_request is not None:
+            self._strategy_request.cancel()
 
     def think(self):
+        if self.synch_mode:
+            self.think_synchronized()
+            return
         self.player_state.current_objective = determine_objective(self.player_state)
-        time_since_action = 0
-        last_time = time.time()
+        next_action_time = time.monotonic() + 0.1
 
         # Enter loop until player client is terminated
         while not self._stop_event.is_set():
-            while not self.input_queue.empty():
+            # Sleep until a message arrives or it is time to act, whichever comes first
+            try:
+                msg = self.input_queue.get(timeout=max(0.0, next_action_time - time.monotonic()))
                 # Parse message and update player state / world view
-                msg: str = self.input_queue.get()
-                if msg.startswith("(sense_body"):
-                    can_send = True
-                parsing.parse_message_update_state(msg, self.player_state)
-
-                # Move player back to starting positions after goal.
-                if self.player_state.should_reset_to_start_position:
-                    self.move_back_to_start_pos()
-
-            # Check if some strategy has been provided by UPPAAL
-            if len(self.player_state.strategy_result_list) > 0:
-                parsing.parse_strat_player(self.player_state)
-                self.player_state.statistics.register_finished_strategy_generation()
-
-            # Evaluate the current state of the game to see if any of the strategy models can be used:
-            if not self.player_state.is_generating_strategy and strategy.has_applicable_strat_player(self.player_state):
-                self.player_state.is_generating_strategy = True
-                threading.Thread(target=generate_strategy, args=(self.player_state, )).start()
-
-            # Ensure that server action messages are sent at a fixed interval of 100ms
-            current_time = time.time()
-            time_since_action += current_time - last_time
-            last_time = current_time
-            if time_since_action >= 0.1:
-                # Gathering statistics about the amount of ticks spent generating a strategy
-                if self.player_state.is_generating_strategy:
-                    self.player_state.statistics.register_missed_tick()
-                if self.player_state.now() == 5900:
-                    statistics.print_to_file(self.player_state.statistics.missed_ticks_text(),
-                                             "missed_ticks_" + str(self.player_state.num)
-                                             + str(self.player_state.world_view.side))
-                    
-                time_since_action -= 0.1
-                time_since_action %= 0.08  # discard queued updates if more than 80 ms behind
-                self.perform_action()
-
-            time.sleep(0.05)
+                self.handle_message(msg)
+                while not self.input_queue.empty():
+                    self.handle_message(self.input_queue.get())
+            except queue.Empty:
+                pass
+
+            self.update_strategy_generation()
+            next_action_time = self.act_if_due(next_action_time)
+
+    # Send actions at a fixed point inside every server cycle. Returns the time of the next action.
+    # Until the cycles have been estimated, actions are sent at a fixed interval of 100ms
+    def act_if_due(self, next_action_time):
+        current_time = time.monotonic()
+        if self.cycle_estimator.has_estimate():
+            next_action_time = self.cycle_estimator.next_action_time(current_time)
+        if current_time >= next_action_time:
+            time_behind = current_time - next_action_time
+            # discard queued updates if more than 80 ms behind
+            next_action_time = current_time + 0.1 - (time_behind % 0.08)
+            self.cycle_estimator.register_action(current_time)
+            self.on_action_tick()
+            self.player_conn.action_queue.end_cycle()
+            if self.cycle_estimator.has_estimate():
+                next_action_time = self.cycle_estimator.next_action_time(current_time)
+        return next_action_time
+
+    # The server waits for (done) from every client before simulating the next cycle
+    def think_synchronized(self):
+        self.player_state.current_objective = determine_objective(self.player_state)
+
+        while not self._stop_event.is_set():
+            try:
+                self.handle_message(self.input_queue.get(timeout=SERVER_CYCLE_LENGTH))
+                while not self.input_queue.empty():
+                    self.handle_message(self.input_queue.get())
+            except queue.Empty:
+                pass
+
+            self.update_strategy_generation()
+
+            if not self._stop_event.is_set():
+                self.act_if_requested()
+
+    def act_if_requested(self):
+        if self._think_requested:
+            self.perform_synchronized_action()
+
+    # The steps below are shared by all client models (threaded, asyncio etc.)
+    def handle_message(self, msg):
+        if self._scenario_reset_requested:
+            self.reset_for_scenario()
+
+        if parsing.is_think_message(msg):
+            self._think_requested = True
+            return
+
+        # The server sends sense_body once every cycle, so the commands are scheduled for the new cycle from now on
+        if not isinstance(msg, str) and msg.startswith(b"(sense_body"):
+            self.player_conn.action_queue.start_cycle()
+
+        # Time from the datagram was received until it is parsed
+        received_at = getattr(msg, "received_at", None)
+        if received_at is not None:
+            self.player_state.statistics.register_parse_latency(time.monotonic() - received_at)
+            if msg.startswith(b"(sense_body"):
+                self.cycle_estimator.register_sense_body(received_at)
+
+        parsing.parse_message_update_state(msg, self.player_state)
+
+        # Move player back to starting positions after goal.
+        if self.player_state.should_reset_to_start_position:
+            self.move_back_to_start_pos()
+
+    # May be called from any thread. The player resets when it handles its next message, which the server sends
+    # every cycle, and sets scenario_reset_done
+    def request_scenario_reset(self):
+        self.scenario_reset_done.clear()
+        self._scenario_reset_requested = True
+
+    # Clears the state of the player and moves it back to its starting position, so a trainer session can run the
+    # next scenario without reconnecting the player
+    def reset_for_scenario(self):
+        self._scenario_reset_requested = False
+        if self._strategy_request is not None:
+            self._strategy_request.cancel()
+        self.player_state.reset_for_scenario()
+        self.player_state.current_objective = determine_objective(self.player_state)
+        self.move_back_to_start_pos()
+        self.scenario_reset_done.set()
+
+    def update_strategy_generation(self):
+        # Check if some strategy has been provided by UPPAAL
+        if len(self.player_state.strategy_result_list) > 0:
+            parsing.parse_strat_player(self.player_state)
+            self.player_state.statistics.register_finished_strategy_generation()
+
+        # Evaluate the current state of the game to see if any of the strategy models can be used:
+        if not self.player_state.is_generating_strategy and strategy.has_applicable_strat_player(self.player_state):
+            self.player_state.is_generating_strategy = True
+            self.start_strategy_generation()
+
+    # The strategies of all players in the process are generated by a pool with a limited number of workers
+    def start_strategy_generation(self):
+        scenario = self.player_state.scenario
+        self._strategy_request = strategy_pool.shared_pool().submit(
+            self.player_state, lambda state: generate_strategy(state, scenario))
+
+    def on_action_tick(self):
+        # Gathering statistics about the amount of ticks spent generating a strategy
+        if self.player_state.is_generating_strategy:
+            self.player_state.statistics.register_missed_tick()
+        if self.player_state.now() == 5900:
+            statistics.print_to_file(self.player_state.statistics.missed_ticks_text(),
+                                     "missed_ticks_" + str(self.player_state.num)
+                                     + str(self.player_state.world_view.side))
+            statistics.print_to_file(self.player_state.statistics.parse_latency.text(),
+                                     "parse_latency_" + str(self.player_state.num)
+                                     + str(self.player_state.world_view.side))
+            if isinstance(self.input_queue, (PerceptionMailbox, AsyncPerceptionMailbox)):
+                statistics.print_to_file(self.input_queue.dropped_messages_text(),
+                                         "dropped_messages_" + str(self.player_state.num)
+                                         + str(self.player_state.world_view.side))
+        self.perform_action()
+
+    def perform_synchronized_action(self):
+        # If several (think) messages were queued, the server has already moved on, so the player only acts once
+        self._think_requested = False
+        self.on_action_tick()
+        # The commands of the cycle are queued before (done), so the server receives them first
+        self.player_conn.action_queue.put("(done)")
+
+    def init_string(self):
+        if self.player_state.player_type == "goalie":
+            return "(init " + self.player_state.team_name + "(goalie)" + "(version 16))"
+        return "(init " + self.player_state.team_name + " (version 16))"
 
     # Called every 100ms
     def perform_action(self):
@@ -130,14 +249,18 @@ class Thinker(threading.Thread):
         if self.player_state.is_test_player():  # Debugging
             debug_msg("{0} Commands: {1}".format(self.player_state.world_view.sim_time, commands), "MESSAGES")
 
-        for command in commands:
-            if command is not None:
-                self.player_conn.action_queue.put(command)
+        # All commands of this cycle are handed to the connection together, so they can share a datagram.
+        # Urgent commands are sent before, and are not replaced by, less urgent commands still waiting to be sent
+        commands = [command for command in commands if command is not None]
+        if len(commands) > 0:
+            urgent = self.player_state.current_objective.last_command_urgent
+            self.player_conn.action_queue.put(commands, urgent=urgent)
 
     def move_back_to_start_pos(self):
         move_action = "(move {0} {1})".format(self.player_state.starting_position.pos_x
                                               , self.player_state.starting_position.pos_y)
-        self.player_conn.action_queue.put(move_action)
+        # Must not be replaced by commands planned before the goal
+        self.player_conn.action_queue.put(move_action, urgent=True)
         self.player_state.should_reset_to_start_position = False
 
     def position_player(self):
@@ -173,7 +296,7 @@ class Thinker(threading.Thread):
             raise Exception("Could not position player: " + str(self.player_state))
         self.player_state.starting_position = Coordinate(pos[0], pos[1])
         self.player_state.objective_behaviour = pos[2]
-        self.player_conn.action_queue.put(move_action)
+        self.player_conn.action_queue.put(move_action, urgent=True)
         self.is_positioned = True
 
     def assign_position(self):
@@ -194,7 +317,7 @@ class Thinker(threading.Thread):
                             + str(self.player_state.num) + " for player " + str(self.player_state))
 
 
-def generate_strategy(state: PlayerState):
+def generate_strategy(state: PlayerState, scenario: int):
     result = strategy.generate_strategy_player(state)
-    state.strategy_result_list.append(result)
+    state.add_strategy_result(result, scenario)
     state.is_generating_strategy = False
@@ -27,6 +27,8 @@ class Objective:
         self.planned_commands: [Command] = []
         self.last_command_update_time = -1
         self.has_processed_see_update = False
+        # Whether the command returned by the latest call to get_next_commands was urgent
+        self.last_command_urgent = False
 
     def should_recalculate(self, state: PlayerState):
         # Don't recalculate if there are any un-executed urgent commands
@@ -45,9 +47,11 @@ class Objective:
             self.has_processed_see_update = True
 
         if self.commands_executed >= len(self.planned_commands):
+            self.last_command_urgent = False
             return []  # All planned commands have been executed, so don't do anything until next planning
 
         next_command = self.planned_commands[self.commands_executed]
+        self.last_command_urgent = next_command.urgent
         # Execute functions associated with command (such as projecting direction or position values)
         next_command.execute_attached_functions()
         self.commands_executed += 1
@@ -0,0 +1,150 @@
+import math
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from configurations import WARNING_PREFIX
+from player.player_client import Client
+
+"""
+Runs the players of a match in a pool of processes, so parsing and decision making are not serialized on one GIL.
+Every process runs a group of players as player_client.Clients. The players connect to the server one group at a time,
+in the same order as with the threaded client model, so the goalie of every team still gets unum 1.
+The processes are started first, and the players connect when connect_players is called.
+
+When the runtime is stopped, every process sends a PlayerSummary for each of its players back, with the statistics
+that SoccerSim collects after a match. A process that exits before it is stopped, or a player thread that dies, is
+reported as crashed.
+"""
+
+# The processes are forked, since spawning would run main.py again in every process. The runtime must therefore be
+# started before the parent process starts any threads, so no locks are copied to the children in a held state.
+_CONTEXT = multiprocessing.get_context("fork")
+
+
+# Number of players in each process, when spreading the players evenly over the CPU cores
+def default_players_per_process(num_players):
+    return max(1, math.ceil(num_players / (os.cpu_count() or 1)))
+
+
+# The statistics of a player, that are sent back to the parent process when the player stops
+class PlayerSummary:
+
+    def __init__(self, client: Client, crashed: bool) -> None:
+        state = client.think.player_state
+        self.team_name = state.team_name
+        self.num = state.num
+        self.side = state.world_view.side
+        self.statistics = state.statistics
+        self.connection_statistics = client.player_conn.statistics
+        self.dropped_see = client.think.input_queue.dropped_see
+        self.dropped_sense_body = client.think.input_queue.dropped_sense_body
+        self.crashed = crashed
+
+
+class ProcessTeamRuntime:
+
+    def __init__(self, team_names: [str], num_players: int, UDP_PORT, UDP_IP, players_per_process: int = None,
+                 synch_mode: bool = False) -> None:
+        # Players are given as (team, player type) in the order they should connect
+        players = []
+        for team in team_names:
+            for player_num in range(num_players):
+                players.append((team, "goalie" if player_num == 0 else "NaN"))
+        if players_per_process is None:
+            players_per_process = default_players_per_process(len(players))
+        self.groups = [players[i:i + players_per_process] for i in range(0, len(players), players_per_process)]
+
+        self._stop_event = _CONTEXT.Event()
+        # Process i may connect its players, when event i is set. It sets event i + 1 when its players have connected
+        self._connect_turns = [_CONTEXT.Event() for _ in range(len(self.groups) + 1)]
+        self._summaries = _CONTEXT.Queue()
+        self.processes = [_CONTEXT.Process(target=_run_player_group,
+                                           args=(group, UDP_PORT, UDP_IP, synch_mode, self._connect_turns[i],
+                                                 self._connect_turns[i + 1], self._stop_event, self._summaries),
+                                           name="PlayerGroup-{0}".format(i))
+                          for i, group in enumerate(self.groups)]
+        self.summaries: [PlayerSummary] = []
+        self._stopped = False
+
+    def start(self) -> None:
+        # See _CONTEXT
+        if threading.active_count() > 1:
+            raise Exception("Player processes must be started before any other threads, but these are running: "
+                            + ", ".join(thread.name for thread in threading.enumerate()
+                                        if thread is not threading.current_thread()))
+        for process in self.processes:
+            process.start()
+
+    def connect_players(self) -> None:
+        self._connect_turns[0].set()
+
+    # Waits until all players have connected to the server. Returns False on timeout, or if a process crashed
+    def wait_until_connected(self, timeout=None) -> bool:
+        end_time = None if timeout is None else time.monotonic() + timeout
+        while not self._connect_turns[-1].wait(0.1):
+            if len(self.crashed_processes()) > 0:
+                return False
+            if end_time is not None and time.monotonic() > end_time:
+                return False
+        return True
+
+    def crashed_processes(self):
+        return [process for process in self.processes if process.exitcode not in (None, 0)]
+
+    def stop(self) -> None:
+        if self._stopped:
+            return
+        self._stopped = True
+        self._stop_event.set()
+        # Let the processes waiting for their turn see the stop event
+        for turn in self._connect_turns:
+            turn.set()
+
+        # Every process that has not crashed reports once
+        reports = len(self.processes) - len(self.crashed_processes())
+        for _ in range(reports):
+            try:
+                self.summaries.extend(self._summaries.get(timeout=10))
+            except queue.Empty:
+                print(WARNING_PREFIX + "Player processes did not report their statistics")
+                break
+
+    def join(self, timeout=None) -> None:
+        for process in self.processes:
+            process.join(timeout)
+        for process in self.crashed_processes():
+            print(WARNING_PREFIX + "{0} exited with code {1}".format(process.name, process.exitcode))
+
+    def player_states(self):
+        return self.summaries
+
+
+def _run_player_group(group, UDP_PORT, UDP_IP, synch_mode, my_turn, next_turn, stop_event, summaries):
+    clients = []
+    my_turn.wait()
+    try:
+        for team, player_type in group:
+            if stop_event.is_set():
+                break
+            # Returns when the server has answered, so the goalie connects first and gets unum 1
+            client = Client(team, UDP_PORT, UDP_IP, player_type, synch_mode=synch_mode)
+            client.start()
+            clients.append(client)
+    finally:
+        next_turn.set()
+
+    crashed = set()
+    while not stop_event.wait(1):
+        for client in clients:
+            if client not in crashed and not client.think.is_alive():
+                crashed.add(client)
+                print(WARNING_PREFIX + "Player {0} of {1} stopped unexpectedly".format(
+                    client.think.player_state.num, client.think.player_state.team_name))
+
+    for client in clients:
+        client.stop()
+        client.join()
+    summaries.put([PlayerSummary(client, client in crashed) for client in clients])
@@ -0,0 +1,103 @@
+from collections import namedtuple
+
+"""
+Splits the see message of a player into typed tuples in one pass, without regular expressions:
+
+(see 0 ((f r t) 55.7 3) ((g r) 66.7 34) ((l r) 42.5 90) ((b) 13.5 -31 0 0) ((p "Team2" 2) 9 0 0 0 0 0) ((P) 1 -179))
+
+Every object is written as ((name) values), and neither the name nor the values contain parentheses. The objects are
+therefore found by searching for "((" and the two following ")". Objects the player only senses close behind it, are
+written with an uppercase name. Of these, only the players are counted. An uppercase ball is parsed like a ball.
+
+With lazy_players, the players are only cut out of the message as (name, values) slices, and parsed by parse_players
+when they are needed.
+"""
+
+# f.ex. SeenFlag("rt", 55.7, 3.0) for ((f r t) 55.7 3). The identifier is the key in parsing._FLAG_COORDS
+SeenFlag = namedtuple("SeenFlag", ["identifier", "distance", "direction"])
+# f.ex. SeenLine("r", 42.5, 90.0) for ((l r) 42.5 90)
+SeenLine = namedtuple("SeenLine", ["side", "distance", "direction"])
+SeenBall = namedtuple("SeenBall", ["distance", "direction", "dist_chng", "dir_chng"])
+# The team and number are None, when the player is too far away to be recognized. is_goalie is True or None
+SeenPlayer = namedtuple("SeenPlayer", ["team", "num", "is_goalie", "distance", "direction", "dist_chng", "dir_chng",
+                                       "body_dir", "head_dir"])
+
+
+class SeeTokens:
+
+    def __init__(self) -> None:
+        self.flags: [SeenFlag] = []
+        self.goals: [SeenFlag] = []
+        self.lines: [SeenLine] = []
+        self.ball: SeenBall = None
+        self.players: [SeenPlayer] = []
+        # (name, values) of the players, f.ex. ('p "Team2" 2', " 9 0 0 0 0 0"), if the players are parsed lazily
+        self.player_slices: [(str, str)] = []
+        # Players sensed close behind, ((P) 1 -179)
+        self.players_behind = 0
+
+
+def tokenize_see(msg: str, lazy_players=False) -> SeeTokens:
+    tokens = SeeTokens()
+    start = msg.find("((")
+    while start != -1:
+        name_end = msg.index(")", start + 2)
+        values_end = msg.index(")", name_end + 1)
+        name = msg[start + 2:name_end]
+        kind = name[0]
+        if kind == "f":
+            values = msg[name_end + 1:values_end].split()
+            tokens.flags.append(SeenFlag(name[2:].replace(" ", ""), float(values[0]), float(values[1])))
+        elif kind == "p":
+            if lazy_players:
+                tokens.player_slices.append((name, msg[name_end + 1:values_end]))
+            else:
+                tokens.players.append(_player(name, msg[name_end + 1:values_end].split()))
+        elif kind == "l":
+            values = msg[name_end + 1:values_end].split()
+            tokens.lines.append(SeenLine(name[2], float(values[0]), float(values[1])))
+        elif kind == "g":
+            values = msg[name_end + 1:values_end].split()
+            tokens.goals.append(SeenFlag(name.replace(" ", ""), float(values[0]), float(values[1])))
+        elif kind == "b" or kind == "B":
+            tokens.ball = _ball(msg[name_end + 1:values_end].split())
+        elif kind == "P":
+            tokens.players_behind += 1
+        elif kind != "F" and kind != "G" and kind != "L":
+            raise Exception("Unknown see element: " + msg[start:values_end + 1])
+        start = msg.find("((", values_end)
+    return tokens
+
+
+def parse_players(player_slices: [(str, str)]) -> [SeenPlayer]:
+    return [_player(name, values.split()) for name, values in player_slices]
+
+
+# distance direction [dist_chng dir_chng]
+def _ball(values) -> SeenBall:
+    if len(values) > 3:
+        return SeenBall(float(values[0]), int(values[1]), float(values[2]), float(values[3]))
+    return SeenBall(float(values[0]), int(values[1]), None, None)
+
+
+# Name: p ["team" [num [goalie]]]
+# Values: [distance] direction [dist_chng dir_chng [body_dir head_dir]] [point_dir] [t|k]
+def _player(name, values) -> SeenPlayer:
+    parts = name.replace("\"", "").split()
+    team = parts[1] if len(parts) > 1 else None
+    num = parts[2] if len(parts) > 2 else None
+    is_goalie = True if len(parts) > 3 else None
+
+    # Tackling and kicking players are marked with t and k
+    if values[-1] == "t" or values[-1] == "k":
+        values = values[:-1]
+    if len(values) == 1:
+        # Players seen without distance are not used
+        return SeenPlayer(team, num, is_goalie, None, float(values[0]), None, None, None, None)
+    if len(values) < 4:
+        return SeenPlayer(team, num, is_goalie, float(values[0]), float(values[1]), None, None, None, None)
+    if len(values) < 6:
+        return SeenPlayer(team, num, is_goalie, float(values[0]), float(values[1]), float(values[2]),
+                          float(values[3]), None, None)
+    return SeenPlayer(team, num, is_goalie, float(values[0]), float(values[1]), float(values[2]), float(values[3]),
+                      float(values[4]), float(values[5]))
@@ -1,18 +1,49 @@
+import os
 import threading
 import time
+from pathlib import Path
 
+import client_connection
+import parsing
 import player.player_client as client
 import signal
 import subprocess
 
 from coaches.coach.coach import Coach
 from coaches.trainer.trainer_client import Trainer
-from statisticsmodule import log_parser
+from client_connection import ConnectionStatistics
+from io_reactor import IOReactor
+from player.async_team import AsyncTeam
+from player.cooperative_scheduler import CooperativeRuntime
+from player.player import LatencyHistogram, PerceptTimes
+from player.process_runtime import ProcessTeamRuntime
+from configurations import WARNING_PREFIX
+from statisticsmodule import log_parser, statistics
+from uppaal import strategy_pool
+
+# Client models for the players
+# Threaded: Every player runs a client, a connection and a thinker thread
+# Async: Every team runs all of its players on a single asyncio event loop
+# Process: The players are spread over a pool of processes, each running a group of threaded clients
+# Cooperative: The players are stepped round-robin by one scheduler thread per CPU core
+THREADED_CLIENT_MODEL = "threaded"
+ASYNC_CLIENT_MODEL = "async"
+PROCESS_CLIENT_MODEL = "process"
+COOPERATIVE_CLIENT_MODEL = "cooperative"
+
+
+# CPU time of this process, and of the child processes that have exited and been waited for, which includes the player
+# processes once they are joined. The server and monitor are only waited for after the statistics are saved
+def _cpu_time():
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
 
 
 class SoccerSim(threading.Thread):
     def __init__(self, team_names: [str], num_players: int, trainer_mode: bool, coaches_enabled: bool, udp_player: int,
-                 udp_trainer: int, udp_coach: int, udp_ip: str, enable_monitor: bool) -> None:
+                 udp_trainer: int, udp_coach: int, udp_ip: str, enable_monitor: bool, shared_io_reactor: bool = False,
+                 client_model: str = THREADED_CLIENT_MODEL, synch_mode: bool = False, capture_dir: Path = None,
+                 players_per_process: int = None, log_dir: Path = None) -> None:
         super().__init__()
         self.team_names = team_names
         self.num_players = num_players
@@ -35,18 +66,74 @@ class SoccerSim(threading.Thread):
         self.enable_monitor = enable_monitor
 
         self.has_init_clients = False
+        # Set when the server answers, and when all clients have been accepted by the server
+        self.server_ready = threading.Event()
+        self.clients_ready = threading.Event()
+        self.client_model = client_model
+        # In synchronous mode the server simulates the next cycle as soon as all clients have sent (done),
+        # instead of every 100ms
+        self.synch_mode = synch_mode
+        # If given, the traffic of every player is recorded to a file in this directory. See traffic_replay
+        self.capture_dir = capture_dir
+        if capture_dir is not None and not capture_dir.exists():
+            os.makedirs(capture_dir)
+
+        # If enabled, a single I/O thread serves the sockets of all clients instead of one thread per connection
+        self.shared_io_reactor = shared_io_reactor
+        self.io_reactor: IOReactor = None
+        if shared_io_reactor:
+            self.io_reactor = IOReactor()
+
+        # With the process client model, all players run in this runtime. By default the players are spread evenly over
+        # the CPU cores
+        self.players_per_process = players_per_process
+        self.process_runtime: ProcessTeamRuntime = None
+        # With the cooperative client model, all players are stepped by the scheduler threads of this runtime
+        self.cooperative_runtime: CooperativeRuntime = None
+
+        # The server is run in this directory, and writes its .rcg and .rcl logs here. By default it runs in the
+        # working directory of this process, and the logs are read from src
+        self.log_dir = log_dir
+        if log_dir is not None and not log_dir.exists():
+            os.makedirs(log_dir)
+
+        # Used to measure the CPU time spent by the clients during a match
+        self._cpu_time_at_start = 0
+        self._wall_time_at_start = 0
+        self._stopped = False
 
     def start(self) -> None:
+        self._cpu_time_at_start = _cpu_time()
+        self._wall_time_at_start = time.time()
+        if self.client_model == PROCESS_CLIENT_MODEL:
+            # Must happen before any threads are started, since the processes are forked. The strategy workers of a
+            # previous game may still be running
+            strategy_pool.shutdown_shared_pool()
+            self.process_runtime = ProcessTeamRuntime(self.team_names, self.num_players, self.udp_port_player,
+                                                      self.udp_ip, self.players_per_process, self.synch_mode)
+            self.process_runtime.start()
+        if self.io_reactor is not None:
+            self.io_reactor.start()
+        if self.client_model == COOPERATIVE_CLIENT_MODEL:
+            self.cooperative_runtime = CooperativeRuntime()
+            self.cooperative_runtime.start()
         super().start()
         # server::say_coach_cnt_max=-1
         # server::freeform_send_period=1
         # server::freeform_wait_period=0
+        synch_mode = " server::synch_mode = true" if self.synch_mode else ""
+        # The ports are given, so several servers can run on the same host
+        ports = " server::port={0} server::coach_port={1} server::olcoach_port={2}".format(
+            self.udp_port_player, self.udp_port_trainer, self.udp_port_coach)
+        log_dir = ""
+        if self.log_dir is not None:
+            log_dir = " server::game_log_dir={0} server::text_log_dir={0}".format(self.log_dir)
         if self.trainer_mode:
-            self.soccer_sim = subprocess.Popen(["exec rcssserver server::say_coach_cnt_max=-1 server::freeform_send_period=6000 server::freeform_wait_period=-1 server::coach = true server::clang_mess_delay = 0 player::player_types = 1"],
-                                                shell=True)
+            self.soccer_sim = subprocess.Popen(["exec rcssserver server::say_coach_cnt_max=-1 server::freeform_send_period=6000 server::freeform_wait_period=-1 server::coach = true server::clang_mess_delay = 0 player::player_types = 1" + synch_mode + ports + log_dir],
+                                                shell=True, cwd=self.log_dir)
         else:
-            self.soccer_sim = subprocess.Popen(["exec rcssserver server::say_coach_cnt_max=-1 server::freeform_send_period=6000 server::freeform_wait_period=-1 server::coach = false server::clang_mess_delay = 0 player::player_types = 1"],
-                                                shell=True)
+            self.soccer_sim = subprocess.Popen(["exec rcssserver server::say_coach_cnt_max=-1 server::freeform_send_period=6000 server::freeform_wait_period=-1 server::coach = false server::clang_mess_delay = 0 player::player_types = 1" + synch_mode + ports + log_dir],
+                                                shell=True, cwd=self.log_dir)
 
         # Use soccerwindow2: exec soccerwindow2 --kill-server --geometry=1440x900 --gradient 1 --field-grass-type lines
         # Use regular monitor: exec rcssmonitor --show-status-bar 1 --show-kick-accel-area 1 --show-catch-area 1 --geometry=1280x800
@@ -57,36 +144,81 @@ class SoccerSim(threading.Thread):
     def run(self) -> None:
         super().run()
         # Make sure the server is running before connecting players
-        time.sleep(2)
-        for team in self.team_names:
-            for player_num in range(self.num_players):
-                if player_num == 0:
-                    t = client.Client(team, self.udp_port_player, self.udp_ip, "goalie")
-                    t.start()
-                    # Make sure, the goalie connects first to get unum 0
-                    time.sleep(0.3)
-                else:
-                    # Everyone else get their player type from the server depending on their unum
-                    t = client.Client(team, self.udp_port_player, self.udp_ip, "NaN")
-                    t.start()
-                self.player_threads.append(t)
+        if not client_connection.wait_for_server(self.udp_ip, self.udp_port_player):
+            print(WARNING_PREFIX + "The server did not answer. Connecting the clients anyway")
+        self.server_ready.set()
+        if self.process_runtime is not None:
+            self._connect_player_processes()
+        else:
+            self._start_players()
 
         if self.trainer_mode:
-            self.trainer = Trainer(self.udp_port_trainer, self.udp_ip)
+            self.trainer = Trainer(self.udp_port_trainer, self.udp_ip, reactor=self.io_reactor,
+                                   synch_mode=self.synch_mode)
             self.trainer.start()
 
         if self.coaches_enabled:
-            self.coach_1 = Coach(self.team_names[0], self.udp_port_coach, self.udp_ip)
+            self.coach_1 = Coach(self.team_names[0], self.udp_port_coach, self.udp_ip, reactor=self.io_reactor,
+                                 synch_mode=self.synch_mode)
             self.coach_1.start()
 
             if len(self.team_names) > 1:
-                self.coach_2 = Coach(self.team_names[1], self.udp_port_coach, self.udp_ip)
+                self.coach_2 = Coach(self.team_names[1], self.udp_port_coach, self.udp_ip, reactor=self.io_reactor,
+                                     synch_mode=self.synch_mode)
                 self.coach_2.start()
 
         self.has_init_clients = True
+        self.clients_ready.set()
 
+    def _start_players(self):
+        for team in self.team_names:
+            if self.client_model == ASYNC_CLIENT_MODEL:
+                t = AsyncTeam(team, self.num_players, self.udp_port_player, self.udp_ip, self.synch_mode,
+                              self.capture_dir)
+                t.start()
+                # Make sure, the goalie of this team has connected before the next team connects
+                t.goalie_connected.wait(5)
+                self.player_threads.append(t)
+                continue
+
+            for player_num in range(self.num_players):
+                # Starting a player returns when the server has answered its init message, so the goalie connects
+                # first and gets unum 1
+                if player_num == 0:
+                    t = self._create_player(team, player_num, "goalie")
+                    t.start()
+                else:
+                    # Everyone else get their player type from the server depending on their unum
+                    t = self._create_player(team, player_num, "NaN")
+                    t.start()
+                self.player_threads.append(t)
 
-    def stop(self) -> None:
+    def _create_player(self, team, player_num, player_type):
+        if self.cooperative_runtime is not None:
+            return self.cooperative_runtime.create_agent(team, self.udp_port_player, self.udp_ip, player_type,
+                                                         self.synch_mode, self._capture_file(team, player_num))
+        return client.Client(team, self.udp_port_player, self.udp_ip, player_type, reactor=self.io_reactor,
+                             synch_mode=self.synch_mode, capture_file=self._capture_file(team, player_num))
+
+    def _connect_player_processes(self):
+        self.process_runtime.connect_players()
+        if not self.process_runtime.wait_until_connected(timeout=60):
+            print(WARNING_PREFIX + "Not all player processes connected to the server")
+        self.player_threads.append(self.process_runtime)
+
+    # Players are numbered in the order they connect, since the unum is not known before the server answers
+    def _capture_file(self, team, player_num):
+        if self.capture_dir is None:
+            return None
+        return self.capture_dir / "{0}_{1}.rccap".format(team, player_num + 1)
+
+
+    # The logs are parsed as a single game, unless parse_logs is False, f.ex. when a trainer session parses every
+    # scenario on its own. Only the first call has an effect
+    def stop(self, parse_logs: bool = True) -> None:
+        if self._stopped:
+            return
+        self._stopped = True
         for player in self.player_threads:
             player.stop()
             player.join()
@@ -101,9 +233,201 @@ class SoccerSim(threading.Thread):
         if self.trainer_mode:
             self.trainer.stop()
             self.trainer.join()
+        if self.io_reactor is not None:
+            self.io_reactor.stop()
+            self.io_reactor.join()
+        if self.cooperative_runtime is not None:
+            self.cooperative_runtime.stop()
+            self.cooperative_runtime.join()
+            self._register_agent_time()
+
+        self._register_cpu_usage()
+        self._register_missed_ticks()
+        self._register_connection_statistics()
+        self._register_parse_latency()
+        self._register_skipped_player_parsing()
+        self._register_percept_times()
+        self._register_dropped_messages()
+        self._register_strategy_pool()
+        self._register_message_handlers()
+
         if self.soccer_monitor is not None:
             self.soccer_monitor.send_signal(signal.SIGINT)
             self.soccer_monitor.wait(3)
         self.soccer_sim.send_signal(signal.SIGINT)
         self.soccer_sim.wait(3)
-        log_parser.parse_logs()
\ No newline at end of file
+        if parse_logs:
+            log_parser.parse_logs(self.log_dir)
+
+    # Saves the CPU time used by this process and the player processes during the match, so the different client
+    # models can be compared
+    def _register_cpu_usage(self):
+        cpu_time = _cpu_time() - self._cpu_time_at_start
+        wall_time = time.time() - self._wall_time_at_start
+        io_model = "shared_reactor" if self.shared_io_reactor else "thread_per_connection"
+        synch_mode = ", synch_mode" if self.synch_mode else ""
+        print("CPU time used by clients: {0:.2f}s over {1:.2f}s ({2}, {3}{4})".format(cpu_time, wall_time,
+                                                                                   self.client_model, io_model,
+                                                                                   synch_mode))
+        statistics.append_to_csv("cpu_usage.csv", "client_model, io_model, cpu_seconds, wall_seconds",
+                                 "{0}, {1}, {2:.3f}, {3:.3f}".format(self.client_model, io_model, cpu_time,
+                                                                     wall_time))
+
+    # Saves the queueing of the strategy requests of the players run by this process
+    def _register_strategy_pool(self):
+        metrics = strategy_pool.shared_pool_metrics()
+        if metrics is None:
+            return
+        print("Strategy pool: " + metrics.text())
+        statistics.append_to_csv("strategy_pool.csv",
+                                 "submitted, completed, failed, dropped, expired, stale, cancelled, "
+                                 "max_queue_depth, mean_wait_ms, p99_wait_ms, longest_wait_ms",
+                                 "{0}, {1}, {2}, {3}, {4}, {5}, {6}, {7}, {8:.3f}, {9}, {10:.3f}".format(
+                                     metrics.submitted, metrics.completed, metrics.failed, metrics.dropped,
+                                     metrics.expired, metrics.stale, metrics.cancelled, metrics.max_queue_depth,
+                                     metrics.wait_time.mean_ms(), metrics.wait_time.percentile(99),
+                                     metrics.longest_wait * 1000))
+
+    # Saves how often each message handler of the clients in this process was called, and the time spent in it.
+    # The counts start over for the next match
+    def _register_message_handlers(self):
+        for registry in parsing.MESSAGE_REGISTRIES:
+            for stats in registry.statistics():
+                statistics.append_to_csv("message_handlers.csv", "client, message, handler, calls, total_ms, mean_us",
+                                         "{0}, {1}, {2}, {3}, {4:.3f}, {5:.3f}".format(
+                                             registry.client, stats.head, stats.handler, stats.calls,
+                                             stats.seconds * 1000, stats.mean_us()))
+            registry.reset_statistics()
+
+    # Saves the CPU time each player used in the steps of the cooperative schedulers
+    def _register_agent_time(self):
+        for agent in self.cooperative_runtime.agents:
+            state = agent.think.player_state
+            statistics.append_to_csv("agent_time.csv", "team, num, cpu_seconds, steps, longest_step_ms",
+                                     "{0}, {1}, {2:.3f}, {3}, {4:.3f}".format(state.team_name, state.num,
+                                                                              agent.cpu_seconds, agent.steps,
+                                                                              agent.longest_step * 1000))
+
+    def player_states(self):
+        states = []
+        for player in self.player_threads:
+            if isinstance(player, (AsyncTeam, ProcessTeamRuntime)):
+                states.extend(player.player_states())
+            else:
+                states.append(player.think.player_state)
+        return states
+
+    # The thinkers of the players, that run in this process
+    def player_thinkers(self):
+        thinkers = []
+        for player in self.player_threads:
+            if isinstance(player, AsyncTeam):
+                thinkers.extend(player.thinkers)
+            elif not isinstance(player, ProcessTeamRuntime):
+                thinkers.append(player.think)
+        return thinkers
+
+    def connections(self):
+        connections = []
+        for player in self.player_threads:
+            if isinstance(player, AsyncTeam):
+                connections.extend(t.player_conn for t in player.thinkers if t.player_conn is not None)
+            elif isinstance(player, ProcessTeamRuntime):
+                continue  # The connections are in the player processes
+            else:
+                connections.append(player.player_conn)
+        for coach in [self.coach_1, self.coach_2]:
+            if coach is not None:
+                connections.append(coach.coach_conn)
+        if self.trainer is not None:
+            connections.append(self.trainer.connection)
+        return connections
+
+    # Saves how many commands were sent, and how many datagrams (and sendto calls) were saved by coalescing them.
+    # Also how many commands were dropped, because a newer command for the same cycle replaced them
+    def _register_connection_statistics(self):
+        total = ConnectionStatistics()
+        for connection in self.connections():
+            total.add(connection.statistics)
+        # The connections of players in other processes are not available here, only their statistics
+        if self.process_runtime is not None:
+            for summary in self.process_runtime.summaries:
+                total.add(summary.connection_statistics)
+        print("Sent {0} commands in {1} datagrams, saved {2} datagrams".format(total.messages_sent,
+                                                                                total.datagrams_sent,
+                                                                                total.saved_datagrams()))
+        if total.truncated_datagrams > 0:
+            print("Dropped {0} truncated datagrams from the server".format(total.truncated_datagrams))
+        if total.receive_errors > 0:
+            print("Failed to receive {0} times".format(total.receive_errors))
+        superseded = sum(total.superseded_commands.values())
+        if superseded > 0:
+            print("Dropped {0} superseded commands: {1}".format(superseded, dict(total.superseded_commands)))
+        statistics.append_to_csv("connection_statistics.csv",
+                                 "messages_sent, datagrams_sent, datagrams_saved, truncated_datagrams, "
+                                 "superseded_commands, receive_errors",
+                                 "{0}, {1}, {2}, {3}, {4}, {5}".format(total.messages_sent, total.datagrams_sent,
+                                                                       total.saved_datagrams(),
+                                                                       total.truncated_datagrams, superseded,
+                                                                       total.receive_errors))
+
+    # Saves the amount of ticks the players missed while generating strategies, tagged with the client model
+    def _register_missed_ticks(self):
+        for team in self.team_names:
+            missed_ticks = sum(state.statistics.total_missed_ticks() for state in self.player_states()
+                               if state.team_name == team)
+            statistics.append_to_csv("missed_ticks_by_client_model.csv", "client_model, team, missed_ticks",
+                                     "{0}, {1}, {2}".format(self.client_model, team, missed_ticks))
+
+    # Saves the distribution of the time from a message is received until the player parses it
+    def _register_parse_latency(self):
+        latency = LatencyHistogram()
+        for state in self.player_states():
+            latency.add(state.statistics.parse_latency)
+        print("Receive to parse latency: " + latency.text().split("\n")[0])
+        statistics.append_to_csv("parse_latency.csv", "client_model, messages, mean_ms, p50_ms, p90_ms, p99_ms",
+                                 "{0}, {1}, {2:.3f}, {3}, {4}, {5}".format(self.client_model, latency.count,
+                                                                           latency.mean_ms(), latency.percentile(50),
+                                                                           latency.percentile(90),
+                                                                           latency.percentile(99)))
+
+    # Saves how many of the see messages with players in them, the players were never parsed of, because the players
+    # did not need them
+    def _register_skipped_player_parsing(self):
+        for team in self.team_names:
+            states = [state for state in self.player_states() if state.team_name == team]
+            sees = sum(state.statistics.sees_with_players for state in states)
+            parsed = sum(state.statistics.sees_with_players_parsed for state in states)
+            skipped = 0 if sees == 0 else 1 - parsed / sees
+            print("Player parsing skipped for {0:.1%} of the see messages of {1}".format(skipped, team))
+            statistics.append_to_csv("skipped_player_parsing.csv",
+                                     "client_model, team, sees_with_players, sees_parsed, skipped_fraction",
+                                     "{0}, {1}, {2}, {3}, {4:.3f}".format(self.client_model, team, sees, parsed,
+                                                                          skipped))
+
+    # Saves the time spent parsing messages into percepts in the receive stage, and applying them in the thinkers
+    def _register_percept_times(self):
+        times = PerceptTimes()
+        for state in self.player_states():
+            times.add(state.statistics.percept_times)
+        for kind in sorted(times.counts):
+            statistics.append_to_csv("percept_times.csv", "client_model, percept, count, mean_parse_us, mean_apply_us",
+                                     "{0}, {1}, {2}, {3:.1f}, {4:.1f}".format(self.client_model, kind,
+                                                                              times.counts[kind],
+                                                                              times.mean_parse_us(kind),
+                                                                              times.mean_apply_us(kind)))
+
+    # Saves how many stale perception messages each player skipped, because newer ones had arrived
+    def _register_dropped_messages(self):
+        dropped = []
+        for player in self.player_threads:
+            if isinstance(player, ProcessTeamRuntime):
+                dropped.extend((summary.team_name, summary.num, summary.dropped_see, summary.dropped_sense_body)
+                               for summary in player.summaries)
+        for thinker in self.player_thinkers():
+            mailbox = thinker.input_queue
+            dropped.append((thinker.player_state.team_name, thinker.player_state.num, mailbox.dropped_see,
+                            mailbox.dropped_sense_body))
+        for team, num, dropped_see, dropped_sense_body in dropped:
+            statistics.append_to_csv("dropped_messages.csv", "team, num, dropped_see, dropped_sense_body",
+                                     "{0}, {1}, {2}, {3}".format(team, num, dropped_see, dropped_sense_body))
@@ -6,14 +6,15 @@ from datetime import datetime
 import math
 
 from statisticsmodule.statistics import Game, Team, Stage, Player, Ball
-from statisticsmodule import statistics
+from statisticsmodule import statistics, show_parser
 from parsing import _ROBOCUP_MSG_REGEX, _SIGNED_INT_REGEX, _REAL_NUM_REGEX
 from geometry import get_distance_between_coords, Coordinate, smallest_angle_difference
 from player import playerstrategy
 
+# rcssserver is run in src, unless SoccerSim is given a log directory
+DEFAULT_LOG_DIR = Path(__file__).parent.parent
 SERVER_LOG_PATTERN = '*.rcg'
 ACTION_LOG_PATTERN = '*.rcl'
-__HEX_REGEX = "0[xX][0-9a-fA-F]+"
 
 _LOWEST_STAMINA = 1000
 _HIGHEST_DIST_GOALIE = 1.2
@@ -26,27 +27,41 @@ _GAME_NUMBER = 1
 
 POSSESSION_GAME_LENGTH = 6000
 
+# Commands of which the server executes at most one per cycle
+BODY_COMMANDS = ["dash", "turn", "kick", "catch", "move", "tackle"]
+_BODY_COMMAND_LINE_RE = re.compile("([0-9]+),([0-9]+)\tRecv (.*)_([0-9]+): (.*)")
+_BODY_COMMAND_RE = re.compile("\\((?:{0})[ )]".format("|".join(BODY_COMMANDS)))
+
 
 # Main method, this file parses information from the log into stat files.
-def parse_logs():
+# The logs are read from log_dir, where rcssserver was run, and the stat files are written to stat_dir.
+# By default the logs are read from src and the stat files are written to statistics.stat_dir.
+# The game number is read from game_number.txt in stat_dir, unless it is given
+def parse_logs(log_dir: Path = None, stat_dir: Path = None, game_number: int = None):
+    if log_dir is None:
+        log_dir = DEFAULT_LOG_DIR
+    if stat_dir is None:
+        stat_dir = statistics.stat_dir
+
     game = statistics.Game()
-    server_log_name = get_newest_server_log()
-    action_log_name = get_newest_action_log()
+    server_log_name = get_newest_server_log(log_dir)
+    action_log_name = get_newest_action_log(log_dir)
     parse_log_name(server_log_name, game)
 
-    stat_dir = Path(__file__).parent.parent / "Statistics"
-
     game_number_path = stat_dir / "game_number.txt"
 
-    try:
-        with open(game_number_path, "r") as file:
-            global _GAME_NUMBER
-            _GAME_NUMBER = int(file.readline())
-    except:
-        print("number not in file")
+    global _GAME_NUMBER
+    if game_number is not None:
+        _GAME_NUMBER = game_number
+    else:
+        try:
+            with open(game_number_path, "r") as file:
+                _GAME_NUMBER = int(file.readline())
+        except:
+            print("number not in file")
 
     # init number of players
-    with open(Path(__file__).parent.parent / action_log_name, 'r') as file:
+    with open(log_dir / action_log_name, 'r') as file:
         for line in file:
             if "init" in line and "Coach" not in line:
                 parse_init_action(line, game)
@@ -54,7 +69,7 @@ def parse_logs():
                 continue
 
     # parsing server log file
-    with open(Path(__file__).parent.parent / server_log_name, 'r') as file:
+    with open(log_dir / server_log_name, 'r') as file:
         for line in file:
             if line.startswith("(show "):
                 parse_show_line(line, game)
@@ -62,8 +77,10 @@ def parse_logs():
                 continue
 
     # parsing action log
-    with open(Path(__file__).parent.parent / action_log_name, 'r') as file:
+    body_commands = {}
+    with open(log_dir / action_log_name, 'r') as file:
         for line in file:
+            parse_body_commands(line, body_commands)
             if "kick " in line:
                 parse_kick_action(line, game)
             elif "goal_" in line and "kick" not in line:
@@ -97,6 +114,8 @@ def parse_logs():
         for goal in game.goals:
             file.write(goal + "\n")
 
+    write_body_command_file(log_directory, body_commands)
+
     file_kicks = open(os.path.join(log_directory, "kicks.csv"), "w")
     file_real_kicks = open(os.path.join(log_directory, "kicks_successes.csv"), "w")
     file_step_kicks = open(os.path.join(log_directory, "step_kicks.csv"), "w")
@@ -119,8 +138,8 @@ def parse_logs():
     for file in csv_files:
         write_file_title(file, game)
 
-    write_fieldprogress_file(game)
-    write_possession_file(game)
+    write_fieldprogress_file(game, stat_dir)
+    write_possession_file(game, stat_dir)
 
     '''
     for entry in playerstrategy.__BIP_TEST_L:
@@ -226,8 +245,10 @@ def calculate_possession(game: Game):
             break
 
 
-def write_possession_file(game):
-    possession_dir = Path(__file__).parent.parent / "Statistics" / "possession"
+def write_possession_file(game, stat_dir: Path = None):
+    if stat_dir is None:
+        stat_dir = statistics.stat_dir
+    possession_dir = stat_dir / "possession"
     if not possession_dir.exists():
         os.makedirs(possession_dir)
 
@@ -554,8 +575,10 @@ def calculate_fieldprogress_length(start_ball: Ball, last_ball: Ball):
     return start_dist - end_dist
 
 
-def write_fieldprogress_file(game: Game):
-    fieldprogress_dir = Path(__file__).parent.parent / "Statistics" / "fieldprogress"
+def write_fieldprogress_file(game: Game, stat_dir: Path = None):
+    if stat_dir is None:
+        stat_dir = statistics.stat_dir
+    fieldprogress_dir = stat_dir / "fieldprogress"
     if not fieldprogress_dir.exists():
         os.makedirs(fieldprogress_dir)
     team_name = "no team name"
@@ -573,16 +596,16 @@ def write_fieldprogress_file(game: Game):
 
 
 # Gets the newest server log ".rcg"
-def get_newest_server_log():
-    server_log_path = os.listdir(Path(__file__).parent.parent)
+def get_newest_server_log(log_dir: Path = None):
+    server_log_path = os.listdir(DEFAULT_LOG_DIR if log_dir is None else log_dir)
     server_log_names = fnmatch.filter(server_log_path, SERVER_LOG_PATTERN)
     server_log_names.sort(reverse=True)
     return server_log_names[0]
 
 
 # Gets the newest action log ".rcl"
-def get_newest_action_log():
-    actions_log_path = os.listdir(Path(__file__).parent.parent)
+def get_newest_action_log(log_dir: Path = None):
+    actions_log_path = os.listdir(DEFAULT_LOG_DIR if log_dir is None else log_dir)
     action_logs = fnmatch.filter(actions_log_path, ACTION_LOG_PATTERN)
     action_logs.sort(reverse=True)
     return action_logs[0]
@@ -640,6 +663,43 @@ def parse_kick_action(txt, game: Game):
             game.real_kick_dict[(tick, player.side)] = 1
 
 
+# Counts the body commands every player sent in every cycle. Each cycle is identified by (time, stoppage time).
+# Example: 12,0	Recv Team_1_3: (dash 100)(turn_neck 10)
+def parse_body_commands(txt, body_commands: {}):
+    matched = _BODY_COMMAND_LINE_RE.match(txt)
+    if matched is None:
+        return
+    cycle = (int(matched.group(1)), int(matched.group(2)))
+    player = (matched.group(3), int(matched.group(4)))
+    amount = len(_BODY_COMMAND_RE.findall(matched.group(5)))
+
+    player_cycles = body_commands.setdefault(player, {})
+    player_cycles[cycle] = player_cycles.get(cycle, 0) + amount
+
+
+# Returns the amount of cycles with no body command and with more than one, from the first command of the player
+def count_body_command_cycles(body_commands: {}):
+    all_cycles = set()
+    for player_cycles in body_commands.values():
+        all_cycles.update(player_cycles.keys())
+
+    result = {}
+    for player, player_cycles in body_commands.items():
+        first_cycle = min(player_cycles.keys())
+        cycles = [c for c in all_cycles if c >= first_cycle]
+        no_command = sum(1 for c in cycles if player_cycles.get(c, 0) == 0)
+        multiple_commands = sum(1 for c in cycles if player_cycles.get(c, 0) > 1)
+        result[player] = (len(cycles), no_command, multiple_commands)
+    return result
+
+
+def write_body_command_file(log_directory, body_commands: {}):
+    with open(os.path.join(log_directory, "body_commands.csv"), "w") as file:
+        file.write("team, unum, cycles, cycles_without_body_command, cycles_with_several_body_commands\n")
+        for (team, unum), counts in sorted(count_body_command_cycles(body_commands).items()):
+            file.write("{0}, {1}, {2}, {3}, {4}\n".format(team, unum, counts[0], counts[1], counts[2]))
+
+
 def parse_goal_action(txt, game: Game):
     goal_regex = "({0}),{0}\t\\(referee goal_(r|l)_{0}\\)".format(_SIGNED_INT_REGEX)
     goal_re = re.compile(goal_regex)
@@ -684,41 +744,26 @@ def parse_log_name(log_name, game: Game):
 
 # Parses the lines of the server log starting with "((show"
 def parse_show_line(txt, game: Game):
-    regex_string = "\\(show ({0}) (\\(\\([^\\)]*\\)[^\\)]*\\)) (.*)".format(_SIGNED_INT_REGEX)
-    regular_expression = re.compile(regex_string)
-    matched = regular_expression.match(txt)
-
-    tick = int(matched.group(1))
+    tick = show_parser.show_tick(txt)
     if len(game.show_time) == tick:
         return
 
+    frame = show_parser.parse_show(txt)
     stage = Stage()
-    '''
-    try:
-        stage.team_l_kicks = game.show_time.index(tick-1).team_l_kicks
-        stage.team_r_kicks = game.show_time.index(tick - 1).team_r_kicks
-    except ValueError:
-        print("valueerror")
-    '''
-
-    ball_txt = matched.group(2)
-    parse_ball(ball_txt, stage)
+    parse_ball(frame, stage)
 
     # For use in goalie positioning
     if stage.is_ball_outside_field() and game.ball_first_time_outside_field is None:
         game.ball_first_time_outside_field = tick
 
     # log file always has 22 players, even the ones not initiated
-    players = re.findall(r'\(\([^)]*\)[^)]*\)[^)]*\)[^)]*\)', matched.group(3))
-    for p in players:
-        player = parse_player(p)
+    for side, unum in frame.present_players():
+        player = parse_player(frame, side, unum)
         # check if the parsed player is initiated
-
         for team in game.teams:
             if team.side == player.side and player.no in range(1, team.number_of_players + 1):
                 stage.players.append(player)
                 if player.no == 1:
-                    # player.print_player()
                     stage.goalies.append(player)
 
     distance_to_ball(stage)
@@ -728,16 +773,9 @@ def parse_show_line(txt, game: Game):
     game.show_time.insert(tick, stage)
 
 
-# Parses ball from show msg
-def parse_ball(txt, stage: Stage):
-    regex_string = "\\(\\(b\\) ({0}) ({0}) ({0}) ({0})".format(_REAL_NUM_REGEX)
-    regular_expression = re.compile(regex_string)
-    matched = regular_expression.match(txt)
-
-    stage.ball.x_coord = float(matched.group(1))
-    stage.ball.y_coord = float(matched.group(2))
-    stage.ball.delta_x = float(matched.group(3))
-    stage.ball.delta_y = float(matched.group(4))
+# Copies the ball of a show message to the stage
+def parse_ball(frame: show_parser.ShowFrame, stage: Stage):
+    stage.ball.x_coord, stage.ball.y_coord, stage.ball.delta_x, stage.ball.delta_y = frame.ball.tolist()
 
 
 def distance_to_ball(stage: Stage):
@@ -762,18 +800,14 @@ def insert_kicks(stage: Stage):
 # ((r 10) 0 0 30 -37 0 0 0 0 (v h 90) (s 8000 1 1 130600) (c 0 0 0 0 0 0 0 0 0 0 0))
 
 # Parses a player from show msg
-def parse_player(txt):
-    regex_string = "\\(\\((l|r) ({0})\\) ({0}) ({2}|0) ({1}) ({1}) ({1}) ({1}) ({1}) ({1}) \\(v [h|l] {0}\\) \\(s " \
-                   "({1}) {1} {1} {1}\\) \\(c ({0}) ".format(_SIGNED_INT_REGEX, _REAL_NUM_REGEX, __HEX_REGEX)
-    regular_expression = re.compile(regex_string)
-    matched = regular_expression.match(txt)
-
+def parse_player(frame: show_parser.ShowFrame, side, unum):
+    row = frame.player(side, unum)
     player = Player()
-    player.side = matched.group(1)
-    player.no = int(matched.group(2))
-    player.x_coord = float(matched.group(5))
-    player.y_coord = float(matched.group(6))
-    player.stamina = float(matched.group(11))
-    player.kicks = int(matched.group(12))
+    player.side = side
+    player.no = unum
+    player.x_coord = float(row[show_parser.X])
+    player.y_coord = float(row[show_parser.Y])
+    player.stamina = float(row[show_parser.STAMINA])
+    player.kicks = int(row[show_parser.KICKS])
 
     return player
@@ -0,0 +1,76 @@
+import re
+from pathlib import Path
+
+from statisticsmodule import log_parser
+
+"""
+Splits the logs of a trainer session, where many scenarios are run on the same server, into one pair of logs per
+scenario. Every segment looks like the logs of a game of its own: the ticks start over from 0, and the game id in the
+file names is made unique by appending the number of the scenario. The segments can therefore be parsed by
+log_parser.parse_logs like the logs of any other game.
+
+A segment contains the ticks from the start of its scenario until the start of the next. Lines without a tick,
+like the parameters in the beginning of the server log, and the init messages of the clients are copied to every
+segment.
+"""
+
+# (show 120 ...), (playmode 120 play_on), (team 120 Team1 Team2 0 0), (msg 120 1 "...")
+_SERVER_LOG_TICK_RE = re.compile("^\\((?:show|playmode|team|msg) (?P<tick>[0-9]+)")
+# 120,0\tRecv Team1_2: (dash 100)
+_ACTION_LOG_TICK_RE = re.compile("^(?P<tick>[0-9]+),[0-9]+\t")
+# 20210101120000-Team1_0-vs-Team2_0.rcg
+_LOG_NAME_RE = re.compile("^([0-9]+)(-.*)$")
+
+
+# Returns the part of a log between start_tick (inclusive) and end_tick (exclusive), with the ticks starting from 0
+def segment_lines(lines, start_tick, end_tick, tick_re, always_included=lambda line: False):
+    segment = []
+    for line in lines:
+        matched = tick_re.match(line)
+        if matched is None:
+            segment.append(line)
+            continue
+        tick = int(matched.group("tick"))
+        tick_start, tick_end = matched.span("tick")
+        if start_tick <= tick < end_tick:
+            segment.append(line[:tick_start] + str(tick - start_tick) + line[tick_end:])
+        elif always_included(line):
+            segment.append(line[:tick_start] + "0" + line[tick_end:])
+    return segment
+
+
+def segment_log_name(log_name, scenario):
+    matched = _LOG_NAME_RE.match(log_name)
+    return "{0}{1:04d}{2}".format(matched.group(1), scenario, matched.group(2))
+
+
+# Writes the logs of every scenario to a directory of its own in out_dir, and returns the directories.
+# Segments are given as (start_tick, end_tick) in the order the scenarios were run
+def split_logs(log_dir: Path, segments: [(int, int)], out_dir: Path) -> [Path]:
+    server_log_name = log_parser.get_newest_server_log(log_dir)
+    action_log_name = log_parser.get_newest_action_log(log_dir)
+    with open(log_dir / server_log_name, "r") as file:
+        server_log = file.readlines()
+    with open(log_dir / action_log_name, "r") as file:
+        action_log = file.readlines()
+
+    directories = []
+    for scenario, (start_tick, end_tick) in enumerate(segments):
+        directory = out_dir / "scenario_{0}".format(scenario)
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / segment_log_name(server_log_name, scenario), "w") as file:
+            file.writelines(segment_lines(server_log, start_tick, end_tick, _SERVER_LOG_TICK_RE))
+        with open(directory / segment_log_name(action_log_name, scenario), "w") as file:
+            file.writelines(segment_lines(action_log, start_tick, end_tick, _ACTION_LOG_TICK_RE,
+                                          lambda line: "(init " in line))
+        directories.append(directory)
+    return directories
+
+
+# Splits the logs of a session and parses every scenario as a game of its own
+def parse_segments(log_dir: Path, segments: [(int, int)], first_game_number=1, stat_dir: Path = None):
+    for scenario, directory in enumerate(split_logs(log_dir, segments, log_dir / "segments")):
+        try:
+            log_parser.parse_logs(directory, stat_dir, first_game_number + scenario)
+        except Exception as e:
+            print("Log parser failed for scenario {0}: {1}".format(scenario, e))
@@ -0,0 +1,94 @@
+import re
+
+import numpy
+
+"""
+Parses the show messages of rcssserver into arrays. A show message holds the exact state of the ball and every player
+in a tick. The same format is found in the server log (.rcg), and in the messages sent to a monitor:
+
+(show 120 ((b) 1.2 -3.4 0.5 0) ((l 1) 0 0x9 -50 0 0 0 0 0 (v h 180) (s 8000 1 1 130600) (c 0 0 0 0 0 0 0 0 0 0 0)) ...)
+
+Messages sent to a monitor also contain the play mode and the score, f.ex. (show 120 (pm 2) (tm Team1 Team2 0 0) ...).
+Optional parts of a player, like the point direction or the focus, are skipped, so messages of different protocol
+versions can be parsed.
+
+The players are kept in a (22, len(PLAYER_COLUMNS)) array, with the left players in rows 0-10 and the right players in
+rows 11-21. Rows of players that are not in the message are NaN.
+"""
+
+MAX_PLAYERS_PER_TEAM = 11
+BALL_COLUMNS = ("x", "y", "vx", "vy")
+PLAYER_COLUMNS = ("type", "state", "x", "y", "vx", "vy", "body", "neck", "stamina", "effort", "recovery", "kicks")
+# Column indices
+X, Y, VX, VY, BODY, NECK = 2, 3, 4, 5, 6, 7
+STAMINA, EFFORT, RECOVERY, KICKS = 8, 9, 10, 11
+STATE = 1
+
+_PLAYER_START_RE = re.compile("\\(\\(([lr]) ([0-9]+)\\)")
+_PLAY_MODE_RE = re.compile("\\(pm ([0-9]+)\\)")
+
+
+class ShowFrame:
+
+    def __init__(self, tick: int, ball: numpy.ndarray, players: numpy.ndarray, play_mode: int = None) -> None:
+        self.tick = tick
+        self.ball = ball
+        self.players = players
+        # Only sent to monitors
+        self.play_mode = play_mode
+
+    # The row of a player in players
+    @staticmethod
+    def row(side: str, unum: int) -> int:
+        return (0 if side == "l" else MAX_PLAYERS_PER_TEAM) + unum - 1
+
+    def player(self, side: str, unum: int) -> numpy.ndarray:
+        return self.players[ShowFrame.row(side, unum)]
+
+    # (side, unum) of the players in the message
+    def present_players(self) -> [(str, int)]:
+        return [("l" if row < MAX_PLAYERS_PER_TEAM else "r", row % MAX_PLAYERS_PER_TEAM + 1)
+                for row in range(2 * MAX_PLAYERS_PER_TEAM) if not numpy.isnan(self.players[row, STATE])]
+
+
+def show_tick(txt: str) -> int:
+    return int(txt[6:txt.index(" ", 6)])
+
+
+def parse_show(txt: str) -> ShowFrame:
+    tick = show_tick(txt)
+    play_mode = None
+    matched = _PLAY_MODE_RE.search(txt, 0, txt.find("((b)"))
+    if matched is not None:
+        play_mode = int(matched.group(1))
+
+    ball_start = txt.index("((b) ") + 5
+    ball_end = txt.index(")", ball_start)
+    ball = numpy.array([float(value) for value in txt[ball_start:ball_end].split()[:4]])
+
+    players = numpy.full((2 * MAX_PLAYERS_PER_TEAM, len(PLAYER_COLUMNS)), numpy.nan)
+    starts = list(_PLAYER_START_RE.finditer(txt, ball_end))
+    for i, start in enumerate(starts):
+        end = starts[i + 1].start() if i + 1 < len(starts) else len(txt)
+        unum = int(start.group(2))
+        if not 1 <= unum <= MAX_PLAYERS_PER_TEAM:
+            continue
+        _parse_player(txt[start.end():end], players[ShowFrame.row(start.group(1), unum)])
+    return ShowFrame(tick, ball, players, play_mode)
+
+
+# Fills the row of a player from the part of the message after "((l 1)"
+def _parse_player(txt: str, row: numpy.ndarray):
+    # type state x y vx vy body neck [point_x point_y] (v h 180) ...
+    fields = txt[:txt.index("(")].split()
+    row[0] = int(fields[0])
+    # The state is written in hexadecimal, f.ex. 0x9
+    row[STATE] = int(fields[1], 0)
+    row[X:NECK + 1] = [float(value) for value in fields[2:8]]
+
+    stamina_start = txt.index("(s ") + 3
+    stamina = txt[stamina_start:txt.index(")", stamina_start)].split()
+    row[STAMINA:RECOVERY + 1] = [float(value) for value in stamina[:3]]
+
+    counts_start = txt.index("(c ") + 3
+    row[KICKS] = int(txt[counts_start:txt.index(")", counts_start)].split()[0])
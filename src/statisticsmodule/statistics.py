@@ -131,6 +131,21 @@ def print_to_file(text, file_name):
     pass
 
 
+# Appends a row to a csv file in the statistics directory. The header is written if the file is new.
+def append_to_csv(file_name, header, row):
+    try:
+        if not stat_dir.exists():
+            stat_dir.mkdir(parents=True)
+        path = stat_dir / file_name
+        write_header = not path.exists() or path.stat().st_size == 0
+        with open(path, "a") as file:
+            if write_header:
+                file.write(header + "\n")
+            file.write(row + "\n")
+    except Exception:
+        print("Could not write to file : " + str(file_name))
+
+
 if __name__ == "__main__":
     all_ticks = []
     for num in range(11):
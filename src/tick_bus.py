@@ -0,0 +1,51 @@
+import threading
+
+"""
+Lets the code running the matches wait for the simulation to reach a tick, without polling the world view of a client.
+The trainer, the coaches and the fake monitor publish the tick of every message they parse to a TickBus of their own.
+Other threads can block in wait_for_tick, or subscribe a callback, that is called on the thread of the publishing
+client every time the tick advances. Callbacks should therefore return quickly.
+"""
+
+
+class TickBus:
+
+    def __init__(self) -> None:
+        self.tick = -1
+        self._condition = threading.Condition()
+        self._subscribers = []
+        self._closed = False
+
+    # Called by the client parsing the messages. Ticks that are not newer than the current tick are ignored
+    def publish(self, tick: int) -> None:
+        # Most messages belong to the tick already published, so check without the lock first
+        if tick <= self.tick:
+            return
+        with self._condition:
+            if tick <= self.tick:
+                return
+            self.tick = tick
+            self._condition.notify_all()
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(tick)
+
+    # Blocks until the given tick has been reached. Returns False on timeout, or if the bus was closed before
+    def wait_for_tick(self, tick: int, timeout: float = None) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: self.tick >= tick or self._closed, timeout) and self.tick >= tick
+
+    def subscribe(self, callback) -> None:
+        with self._condition:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback) -> None:
+        with self._condition:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    # Wakes everyone waiting, f.ex. when the client publishing the ticks stops
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
@@ -0,0 +1,83 @@
+import queue
+import struct
+import threading
+import time
+
+"""
+Capture of the UDP traffic of a single client, that can be replayed without a server by traffic_replay.
+A capture file starts with a header, and is followed by one record per datagram:
+    monotonic timestamp (double), direction (byte), payload length (uint32), payload
+The recorder writes the records from a background thread, so the connection never waits for the disk.
+Captures are enabled by giving client_connection.Connection a TrafficRecorder.
+"""
+
+CAPTURE_HEADER = b"RCCAP\x01"
+INBOUND = 0
+OUTBOUND = 1
+_RECORD_HEADER = struct.Struct("<dBI")
+
+
+class CaptureRecord:
+    __slots__ = ["timestamp", "direction", "payload"]
+
+    def __init__(self, timestamp, direction, payload) -> None:
+        self.timestamp = timestamp
+        self.direction = direction
+        self.payload = payload
+
+    def __repr__(self) -> str:
+        direction = "in" if self.direction == INBOUND else "out"
+        return "{0:.4f} {1} {2}".format(self.timestamp, direction, self.payload)
+
+
+class TrafficRecorder:
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(CAPTURE_HEADER)
+        self._records = queue.SimpleQueue()
+        self.records_written = 0
+        self._writer = threading.Thread(target=self._write_records, name="TrafficRecorder", daemon=True)
+        self._writer.start()
+
+    # The payload must not change after being recorded, so memoryviews of receive buffers are copied
+    def record(self, direction, payload, timestamp=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self._records.put((timestamp, direction, bytes(payload)))
+
+    # Writes the remaining records and closes the file
+    def close(self):
+        if self._file is None:
+            return
+        self._records.put(None)
+        self._writer.join()
+        self._file.close()
+        self._file = None
+
+    def _write_records(self):
+        while True:
+            record = self._records.get()
+            if record is None:
+                return
+            timestamp, direction, payload = record
+            self._file.write(_RECORD_HEADER.pack(timestamp, direction, len(payload)))
+            self._file.write(payload)
+            self.records_written += 1
+
+
+def read_capture(path):
+    with open(path, "rb") as file:
+        header = file.read(len(CAPTURE_HEADER))
+        if header != CAPTURE_HEADER:
+            raise Exception("Not a traffic capture: " + str(path))
+        while True:
+            record_header = file.read(_RECORD_HEADER.size)
+            if len(record_header) < _RECORD_HEADER.size:
+                return  # The last record may be incomplete, if the recorder was not closed
+            timestamp, direction, length = _RECORD_HEADER.unpack(record_header)
+            payload = file.read(length)
+            if len(payload) < length:
+                return
+            yield CaptureRecord(timestamp, direction, payload)
@@ -0,0 +1,87 @@
+import threading
+import time
+
+from client_connection import Datagram
+from player.playerstrategy import determine_objective
+from traffic_capture import read_capture, INBOUND
+
+"""
+Replays a capture made by traffic_capture.TrafficRecorder into a player thinker, without running rcssserver.
+A capture can be replayed in two ways:
+    feed: Puts the received datagrams into the input queue of a running thinker, at the recorded speed or faster.
+    step: Drives the thinker directly from the replaying thread. Every received message is handled in order, and the
+          player acts after every sense_body, so the same capture always gives the same commands.
+          Strategies from UPPAAL are not generated during a step replay.
+"""
+
+
+# Stands in for the connection of a thinker during a replay, and keeps everything the thinker sends
+class ReplayConnection:
+
+    def __init__(self) -> None:
+        self.action_queue = _CollectingQueue()
+
+    def sent_messages(self) -> [str]:
+        return self.action_queue.messages
+
+
+class _CollectingQueue:
+
+    def __init__(self) -> None:
+        self.messages = []
+
+    def put(self, item, block=True, timeout=None, urgent=False):
+        if isinstance(item, str):
+            item = [item]
+        self.messages.extend(msg for msg in item if msg is not None)
+
+    def start_cycle(self):
+        pass
+
+    def end_cycle(self):
+        pass
+
+
+class CaptureReplayer:
+
+    def __init__(self, path, speed=1.0) -> None:
+        self.path = path
+        # 2.0 replays twice as fast as recorded. 0 replays as fast as possible
+        self.speed = speed
+
+    def inbound_records(self):
+        return (record for record in read_capture(self.path) if record.direction == INBOUND)
+
+    def feed(self, think, stop_event: threading.Event = None):
+        start_time = time.monotonic()
+        first_timestamp = None
+        for record in self.inbound_records():
+            if stop_event is not None and stop_event.is_set():
+                return
+            if first_timestamp is None:
+                first_timestamp = record.timestamp
+            if self.speed > 0:
+                delay = start_time + (record.timestamp - first_timestamp) / self.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            think.input_queue.put(Datagram(record.payload, time.monotonic()))
+
+    def step(self, thinker) -> [str]:
+        if thinker.player_conn is None:
+            thinker.player_conn = ReplayConnection()
+        initialized = False
+        for record in self.inbound_records():
+            msg = Datagram(record.payload, time.monotonic())
+            thinker.handle_message(msg)
+            if not initialized:
+                if msg.startswith(b"(init"):
+                    # The same steps as Thinker.start and Thinker.think
+                    thinker.position_player()
+                    thinker.player_state.current_objective = determine_objective(thinker.player_state)
+                    initialized = True
+                continue
+            if msg.startswith(b"(sense_body"):
+                thinker.on_action_tick()
+        if isinstance(thinker.player_conn, ReplayConnection):
+            return thinker.player_conn.sent_messages()
+        return []
@@ -1,7 +1,31 @@
+import os
+import shutil
 from pathlib import Path
 
 VERIFYTA_PATH = Path(__file__).parent / 'bin' / 'verifyta'
 QUERIES_PATH = Path(__file__).parent.parent / 'uppaal' / 'queries'
 MODELS_PATH = Path(__file__).parent.parent / 'uppaal' / 'models'
 OUTPUT_DIR_PATH = Path(__file__).parent.parent / 'uppaal' / 'outputdir'
-STATIC_MODEL_RESULTS = Path(__file__).parent.parent / 'uppaal' / 'staticmodels_results'
\ No newline at end of file
+STATIC_MODEL_RESULTS = Path(__file__).parent.parent / 'uppaal' / 'staticmodels_results'
+
+
+# Copies the files of source into destination, keeping files already in destination. Unlike
+# shutil.copytree(dirs_exist_ok=True) this works on Python 3.7
+def _copy_tree(source: Path, destination: Path):
+    for directory, _, files in os.walk(str(source)):
+        target = destination / Path(directory).relative_to(source)
+        os.makedirs(str(target), exist_ok=True)
+        for file in files:
+            shutil.copy2(os.path.join(directory, file), str(target / file))
+
+
+# Makes the strategies of this process use copies of the models and queries in the given directory, so several
+# matches can generate strategies at the same time without overwriting each others model and output files
+def use_working_directory(directory: Path):
+    global QUERIES_PATH, MODELS_PATH, OUTPUT_DIR_PATH
+    _copy_tree(QUERIES_PATH, directory / 'queries')
+    _copy_tree(MODELS_PATH, directory / 'models')
+    _copy_tree(OUTPUT_DIR_PATH, directory / 'outputdir')
+    QUERIES_PATH = directory / 'queries'
+    MODELS_PATH = directory / 'models'
+    OUTPUT_DIR_PATH = directory / 'outputdir'
@@ -7,6 +7,7 @@ from coaches.world_objects_coach import WorldViewCoach, PlayerViewCoach
 from configurations import DRIBBLE_OR_PASS_STRAT_PREFIX, DRIBBLE_INDICATOR, PASS_INDICATOR, GOALIE_MODEL_TEAMS, \
     STAMINA_MODEL_TEAMS, DRIBBLE_OR_PASS_TEAMS
 from geometry import Coordinate
+import uppaal
 from uppaal import goalie_strategy
 from uppaal.uppaal_model import UppaalModel, UppaalStrategy, execute_verifyta, Regressor
 from player.player import PlayerState
@@ -99,7 +100,7 @@ def _find_applicable_strat_player(state: PlayerState) -> _StrategyGenerator:
     if state.team_name in DRIBBLE_OR_PASS_TEAMS and state.needs_dribble_or_pass_strat():
         print(state.now(), " DRIBBLE STRAT - Player : ", state.num)
 
-        possession_dir = Path(__file__).parent / "models" / "possessionmodel"
+        possession_dir = uppaal.MODELS_PATH / "possessionmodel"
         if not possession_dir.exists():
             os.makedirs(possession_dir)
 
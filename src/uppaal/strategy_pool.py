@@ -0,0 +1,189 @@
+import collections
+import os
+import threading
+import time
+
+from configurations import STRATEGY_WORKERS, STRATEGY_QUEUE_LENGTH, STRATEGY_REQUEST_DEADLINE, \
+    STRATEGY_MAX_AGE_CYCLES, WARNING_PREFIX
+from player.player import LatencyHistogram
+
+"""
+A pool of worker threads, that generates the UPPAAL strategies of all players in a process.
+Every strategy runs verifyta in a subprocess, so at most one strategy per CPU core is generated at a time, and the
+rest of the requests wait in a queue of limited length. If the queue is full, the oldest request is dropped.
+
+A waiting request is cancelled instead of generated, if
+    its deadline (seconds after it was submitted) has passed,
+    the game has moved on more than max_age_cycles since it was submitted, so the state it describes is stale,
+    or it was cancelled by the player.
+When a request is dropped or cancelled, the player is free to request a new strategy.
+"""
+
+
+class StrategyRequest:
+
+    def __init__(self, state, generate, deadline) -> None:
+        self.state = state
+        self.generate = generate
+        self.sim_time = state.now()
+        self.submitted_at = time.monotonic()
+        self.deadline = self.submitted_at + deadline
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def is_stale(self, max_age_cycles):
+        return self.state.now() - self.sim_time > max_age_cycles
+
+
+class StrategyPoolMetrics:
+
+    def __init__(self) -> None:
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        # Requests removed from the queue before being generated
+        self.dropped = 0
+        self.expired = 0
+        self.stale = 0
+        self.cancelled = 0
+        self.max_queue_depth = 0
+        # Time from a request was submitted until a worker started generating it
+        self.wait_time = LatencyHistogram()
+        self.longest_wait = 0
+
+    def text(self):
+        return "submitted: {0}, completed: {1}, failed: {2}, dropped: {3}, expired: {4}, stale: {5}, " \
+               "cancelled: {6}, max queue depth: {7}, longest wait: {8:.3f} s, wait time: {9}".format(
+                self.submitted, self.completed, self.failed, self.dropped, self.expired, self.stale,
+                self.cancelled, self.max_queue_depth, self.longest_wait, self.wait_time.text().split("\n")[0])
+
+
+class StrategyPool:
+
+    def __init__(self, max_workers: int = None, max_queue_length=STRATEGY_QUEUE_LENGTH,
+                 deadline=STRATEGY_REQUEST_DEADLINE, max_age_cycles=STRATEGY_MAX_AGE_CYCLES) -> None:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        self.max_workers = max_workers
+        self.max_queue_length = max_queue_length
+        self.deadline = deadline
+        self.max_age_cycles = max_age_cycles
+        self.metrics = StrategyPoolMetrics()
+        self._requests = collections.deque()
+        self._condition = threading.Condition()
+        self._workers = []
+        self._shut_down = False
+
+    # Queues generate(state). The player must not submit another request, until state.is_generating_strategy is reset
+    def submit(self, state, generate, deadline=None) -> StrategyRequest:
+        request = StrategyRequest(state, generate, self.deadline if deadline is None else deadline)
+        dropped = None
+        with self._condition:
+            if self._shut_down:
+                raise Exception("Strategy pool has been shut down")
+            if len(self._requests) >= self.max_queue_length:
+                dropped = self._requests.popleft()
+                self.metrics.dropped += 1
+            self._requests.append(request)
+            self.metrics.submitted += 1
+            self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, len(self._requests))
+            # Workers are started when needed, so processes without strategy teams do not start any
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name="StrategyWorker-{0}".format(len(self._workers)),
+                                          daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._condition.notify()
+        if dropped is not None:
+            dropped.state.is_generating_strategy = False
+        return request
+
+    def queue_depth(self):
+        with self._condition:
+            return len(self._requests)
+
+    # Lets the workers finish the strategies they are generating. Waiting requests are cancelled
+    def shutdown(self, timeout=None):
+        with self._condition:
+            self._shut_down = True
+            waiting = list(self._requests)
+            self._requests.clear()
+            self.metrics.cancelled += len(waiting)
+            self._condition.notify_all()
+        for request in waiting:
+            request.state.is_generating_strategy = False
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while len(self._requests) == 0 and not self._shut_down:
+                    self._condition.wait()
+                if self._shut_down:
+                    return
+                request = self._requests.popleft()
+                skip_reason = self._skip_reason(request)
+                if skip_reason is None:
+                    wait = time.monotonic() - request.submitted_at
+                    self.metrics.wait_time.register(wait)
+                    self.metrics.longest_wait = max(self.metrics.longest_wait, wait)
+
+            if skip_reason is not None:
+                request.state.is_generating_strategy = False
+                continue
+
+            try:
+                request.generate(request.state)
+                with self._condition:
+                    self.metrics.completed += 1
+            except Exception as e:
+                request.state.is_generating_strategy = False
+                with self._condition:
+                    self.metrics.failed += 1
+                print(WARNING_PREFIX + "Strategy generation failed for player {0}: {1}".format(request.state.num, e))
+
+    # Counts and returns why a request should not be generated, or None if it should
+    def _skip_reason(self, request: StrategyRequest):
+        if request.cancelled:
+            self.metrics.cancelled += 1
+            return "cancelled"
+        if time.monotonic() > request.deadline:
+            self.metrics.expired += 1
+            return "expired"
+        if request.is_stale(self.max_age_cycles):
+            self.metrics.stale += 1
+            return "stale"
+        return None
+
+
+_shared_pool: StrategyPool = None
+_shared_pool_lock = threading.Lock()
+
+
+# The pool shared by all players of this process
+def shared_pool() -> StrategyPool:
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = StrategyPool(STRATEGY_WORKERS)
+        return _shared_pool
+
+
+# Stops the workers of the shared pool, f.ex. before forking player processes. A new pool is created, when a strategy
+# is requested again
+def shutdown_shared_pool(timeout=None):
+    global _shared_pool
+    with _shared_pool_lock:
+        pool = _shared_pool
+        _shared_pool = None
+    if pool is not None:
+        pool.shutdown(timeout)
+
+
+# Metrics of the shared pool, or None if no strategies were requested in this process
+def shared_pool_metrics() -> StrategyPoolMetrics:
+    with _shared_pool_lock:
+        return None if _shared_pool is None else _shared_pool.metrics
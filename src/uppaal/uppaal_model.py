@@ -9,7 +9,8 @@ from pathlib import Path
 from shutil import copymode, move, copyfile
 from tempfile import mkstemp
 
-from uppaal import MODELS_PATH, OUTPUT_DIR_PATH, QUERIES_PATH, VERIFYTA_PATH
+import uppaal
+from uppaal import VERIFYTA_PATH
 
 
 class UppaalStrategy:
@@ -19,7 +20,7 @@ class UppaalStrategy:
     # and then parsing the output file
 
     def __init__(self, strategy_name: str) -> None:
-        self.path_to_strat_file = os.path.normpath(str(OUTPUT_DIR_PATH) + strategy_name)
+        self.path_to_strat_file = os.path.normpath(str(uppaal.OUTPUT_DIR_PATH) + strategy_name)
         self.strategy_text = ""
         if not os.path.exists(self.path_to_strat_file):
             f = open(Path(self.path_to_strat_file), "x")
@@ -250,8 +251,8 @@ class UppaalModel:
     def __init__(self, strategy_name) -> None:
         self.strategy_name = strategy_name
         self.xml_file_name = strategy_name + ".xml"
-        self.queries_path = os.path.normpath(str(QUERIES_PATH) + strategy_name + ".q")
-        self.path = os.path.normpath(str(MODELS_PATH) + self.xml_file_name)
+        self.queries_path = os.path.normpath(str(uppaal.QUERIES_PATH) + strategy_name + ".q")
+        self.path = os.path.normpath(str(uppaal.MODELS_PATH) + self.xml_file_name)
         self.tree = ET.parse(self.path)
         self.root = self.tree.getroot()
 
@@ -444,12 +445,12 @@ def _update_queries_write_path(model: UppaalModel):
                 strat = re.search(',.*\)', stripped_line)
                 strat_name = strat.group(0)[1:-1]
                 strat_file_name = model.strategy_name
-                newline = 'saveStrategy("' + os.path.normpath(str(OUTPUT_DIR_PATH) + strat_file_name) + '",' + strat_name + ')' + '\n'
+                newline = 'saveStrategy("' + os.path.normpath(str(uppaal.OUTPUT_DIR_PATH) + strat_file_name) + '",' + strat_name + ')' + '\n'
                 _replace_in_file(query_path, l, newline)
                 # This does not work for more than one saveStrategy call
                 break
 
-    return str(OUTPUT_DIR_PATH / strat_file_name)
+    return str(uppaal.OUTPUT_DIR_PATH / strat_file_name)
 
 
 def _replace_in_file(file_path, pattern, subst):
@@ -0,0 +1,99 @@
+from unittest import TestCase
+
+import parsing
+from parsing import _parse_body_sense
+from parsing_benchmark import example_sense_body_messages, legacy_match_body_sense
+from player.player import PlayerState
+
+BODY = "(sense_body 312 (view_mode low narrow) (stamina 6523.41 0.856 120433) (speed 0.58 -31) (head_angle -45) " \
+       "(kick 12) (dash 201) (turn 33) (say 2) (turn_neck 17) (catch 0) (move 1) (change_view 4) " \
+       "(arm (movable 3) (expires 7) (target 12 -40) (count 2)) (focus (target l 7) (count 3)) " \
+       "(tackle (expires 5) (count 1)) (collision (ball)) (foul  (charged 2) (card yellow)))"
+BODY_BALL_AND_PLAYER = "(sense_body 4001 (view_mode high wide) (stamina 3000.5 0.6 0) (speed 1.02 90) " \
+                       "(head_angle 90) (kick 0) (dash 1200) (turn 5) (say 0) (turn_neck 0) (catch 3) (move 0) " \
+                       "(change_view 0) (arm (movable 0) (expires 0) (target 0 0) (count 0)) " \
+                       "(focus (target r 11) (count 1)) (tackle (expires 0) (count 0)) (collision (ball) (player)) " \
+                       "(foul  (charged 0) (card red)))"
+# Protocol version 7, without capacity, arm, focus, tackle, collision and foul
+BODY_OLD_PROTOCOL = "(sense_body 10 (view_mode high normal) (stamina 7000 0.9) (speed 0.3 12) (head_angle 20) " \
+                    "(kick 1) (dash 5) (turn 2) (say 0) (turn_neck 1))"
+
+
+def _parsed(msg, sim_time=9):
+    state = PlayerState()
+    state.world_view.sim_time = sim_time
+    _parse_body_sense(msg, state)
+    return state
+
+
+class TestBodySense(TestCase):
+    def test_parse_body_sense(self):
+        state = _parsed(BODY)
+        body = state.body_state
+        self.assertEqual(body.view_mode, "low narrow")
+        self.assertEqual((body.stamina, body.effort, body.capacity), (6523.41, 0.856, 120433.0))
+        self.assertEqual((body.speed, body.direction_of_speed, body.neck_angle), (0.58, -31, -45))
+        self.assertEqual(body.dash_count, 201)
+        self.assertEqual((body.arm_movable_cycles, body.arm_expire_cycles), (3, 7))
+        self.assertEqual((body.distance, body.direction), (12.0, -40))
+        self.assertEqual(body.target, "l")
+        self.assertEqual(body.tackle_expire_cycles, 5)
+        self.assertEqual(body.collision, "(ball)")
+        self.assertEqual((body.charged, body.card), (2, "yellow"))
+        self.assertEqual(state.ball_collision_time, 9)
+
+    def test_collision_with_ball_and_player(self):
+        state = _parsed(BODY_BALL_AND_PLAYER)
+        self.assertEqual(state.body_state.collision, "(ball) (player)")
+        self.assertEqual(state.body_state.card, "red")
+        self.assertEqual(state.body_state.target, "r")
+        self.assertEqual(state.ball_collision_time, 9)
+
+    # A collision with the ball makes the expected speed useless, so the sensed speed is used
+    def test_ball_collision_clears_expected_speed(self):
+        state = PlayerState()
+        state.action_history.expected_speed = 0.77
+        _parse_body_sense(BODY, state)
+        self.assertEqual(state.body_state.speed, 0.58)
+        self.assertIsNone(state.action_history.expected_speed)
+
+    # Missing fields leave the body state unchanged
+    def test_older_protocol(self):
+        state = _parsed(BODY)
+        _parse_body_sense(BODY_OLD_PROTOCOL, state)
+        body = state.body_state
+        self.assertEqual((body.view_mode, body.stamina, body.effort), ("high normal", 7000.0, 0.9))
+        self.assertEqual((body.speed, body.direction_of_speed, body.neck_angle, body.dash_count), (0.3, 12, 20, 5))
+        self.assertEqual(body.capacity, 120433.0)
+        self.assertEqual((body.arm_movable_cycles, body.tackle_expire_cycles, body.card), (3, 5, "yellow"))
+
+        # The learned positions of the fields do not break the parsing of the newer messages afterwards
+        state = _parsed(BODY_BALL_AND_PLAYER)
+        self.assertEqual((state.body_state.speed, state.body_state.direction_of_speed), (1.02, 90))
+        self.assertEqual((state.body_state.capacity, state.body_state.dash_count), (0.0, 1200))
+
+    # Other threads may be parsing at the same time, so the shared layout is replaced instead of changed
+    def test_shared_layout_is_not_changed(self):
+        _parsed(BODY)
+        layout = parsing._body_sense_layout
+        learned = list(layout)
+        state = _parsed(BODY_OLD_PROTOCOL)
+        self.assertEqual(layout, learned)
+        self.assertEqual((state.body_state.speed, state.body_state.direction_of_speed), (0.3, 12))
+
+        # A layout hint, that does not fit the message, only costs a search
+        parsing._body_sense_layout = [0] * len(learned)
+        state = _parsed(BODY)
+        self.assertEqual((state.body_state.speed, state.body_state.direction_of_speed), (0.58, -31))
+
+    # The values are the same as the ones matched by the regular expression used before
+    def test_same_as_legacy_regex(self):
+        for msg in example_sense_body_messages(200):
+            body = _parsed(msg).body_state
+            matched = legacy_match_body_sense(msg)
+            self.assertEqual(body.view_mode, matched.group(2))
+            self.assertEqual((body.stamina, body.effort, body.capacity),
+                             (float(matched.group(3)), float(matched.group(4)), float(matched.group(5))))
+            self.assertEqual((body.speed, body.direction_of_speed), (float(matched.group(6)), int(matched.group(7))))
+            self.assertEqual((body.neck_angle, body.dash_count), (int(matched.group(8)), int(matched.group(10))))
+            self.assertEqual(body.collision, matched.group(27))
@@ -0,0 +1,151 @@
+import queue
+import select
+import socket
+from unittest import TestCase
+
+from async_connection import AsyncConnection
+from client_connection import pack_messages, Connection, Datagram, wait_for_server
+from fake_server.stub_server import StubServer
+from player.perception_mailbox import PerceptionMailbox
+
+
+class TestPackMessages(TestCase):
+    def test_commands_of_one_cycle_share_datagram(self):
+        datagrams = pack_messages(["(dash 100)", "(turn_neck 30)", "(change_view narrow high)"])
+        self.assertEqual(datagrams, [b"(dash 100)(turn_neck 30)(change_view narrow high)\0"])
+
+    def test_size_cap_splits_datagrams(self):
+        datagrams = pack_messages(["(dash 100)", "(turn_neck 30)", "(say hi)"], max_size=25)
+        self.assertEqual(datagrams, [b"(dash 100)(turn_neck 30)\0", b"(say hi)\0"])
+        for datagram in datagrams:
+            self.assertTrue(len(datagram) <= 25, "Datagrams must not exceed the size cap")
+
+    def test_init_is_sent_alone(self):
+        datagrams = pack_messages(["(init Team1 (version 16))", "(synch_see)", "(move -10 0)"])
+        self.assertEqual(datagrams, [b"(init Team1 (version 16))\0", b"(synch_see)(move -10 0)\0"])
+
+    # In synchronous mode the commands of the next cycle must not reach the server before it has simulated this one
+    def test_done_ends_datagram(self):
+        datagrams = pack_messages(["(dash 100)", "(done)", "(turn 30)", "(done)"])
+        self.assertEqual(datagrams, [b"(dash 100)(done)\0", b"(turn 30)(done)\0"])
+
+    def test_coalescing_disabled(self):
+        datagrams = pack_messages(["(dash 100)", "(turn_neck 30)"], coalesce=False)
+        self.assertEqual(datagrams, [b"(dash 100)\0", b"(turn_neck 30)\0"])
+
+
+class _Think:
+    def __init__(self):
+        self.input_queue = queue.Queue()
+
+
+def _receive(connection):
+    select.select([connection.sock], [], [], 1)
+    connection._on_readable()
+    try:
+        return connection.think.input_queue.get_nowait()
+    except queue.Empty:
+        return None
+
+
+class TestReceive(TestCase):
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.connection = Connection("127.0.0.1", self.server.getsockname()[1], _Think(), max_receive_size=16)
+        self.connection.sock.bind(("127.0.0.1", 0))
+        self.client_addr = self.connection.sock.getsockname()
+
+    def tearDown(self):
+        self.server.close()
+        self.connection.sock.close()
+
+    def test_datagram_is_decoded_lazily(self):
+        self.server.sendto(b"(sense_body 0)", self.client_addr)
+        msg = _receive(self.connection)
+        self.assertIsInstance(msg, Datagram)
+        self.assertTrue(msg.startswith(b"(sense_body"))
+        self.assertEqual(msg.decode(), "(sense_body 0)")
+
+    def test_oversized_datagram_is_counted(self):
+        self.server.sendto(b"(see 0 ((b) 1 2) ((p) 3 4))", self.client_addr)
+        self.assertIsNone(_receive(self.connection))
+        self.assertEqual(self.connection.statistics.truncated_datagrams, 1)
+
+    # A datagram held by the thinker must not change, when the next datagrams are received into the buffer
+    def test_held_datagram_is_unchanged(self):
+        self.server.sendto(b"(sense_body 0)", self.client_addr)
+        held = _receive(self.connection)
+        for tick in range(1, 10):
+            self.server.sendto("(sense_body {0})".format(tick).encode(), self.client_addr)
+            self.assertEqual(_receive(self.connection).decode(), "(sense_body {0})".format(tick))
+        self.assertEqual(held.decode(), "(sense_body 0)")
+
+    def test_connected_when_server_answers_from_new_port(self):
+        self.assertFalse(self.connection.connected.is_set())
+        answering = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        answering.bind(("127.0.0.1", 0))
+        try:
+            answering.sendto(b"(init l 1 before_kick_off)", self.client_addr)
+            _receive(self.connection)
+            self.assertTrue(self.connection.connected.is_set())
+            self.assertEqual(self.connection.addr, answering.getsockname())
+        finally:
+            answering.close()
+
+    # A refused connection f.ex. after an ICMP port unreachable is counted, and does not stop the reactor thread
+    def test_receive_error_is_counted(self):
+        class _RefusingSocket:
+            def recvfrom(self, size):
+                raise ConnectionRefusedError(111, "Connection refused")
+
+        real_sock = self.connection.sock
+        self.connection.sock = _RefusingSocket()
+        try:
+            self.connection._on_readable()
+        finally:
+            self.connection.sock = real_sock
+        self.assertEqual(self.connection.statistics.receive_errors, 1)
+        self.assertTrue(self.connection.think.input_queue.empty())
+
+    def test_receive_stage(self):
+        self.connection.receive_stage = lambda msg: ("staged", msg.decode())
+        self.connection._deliver([Datagram(b"(see 0)")])
+        self.assertEqual(self.connection.think.input_queue.get_nowait(), ("staged", "(see 0)"))
+
+    # The thinker is woken once for everything that was received together
+    def test_burst_is_delivered_together(self):
+        self.connection.think.input_queue = PerceptionMailbox()
+        for msg in [b"(sense_body 0)", b"(see 0)", b"(hear 0 ref po)"]:
+            self.server.sendto(msg, self.client_addr)
+        select.select([self.connection.sock], [], [], 1)
+        self.connection._on_readable()
+        received = [self.connection.think.input_queue.get_nowait().decode() for _ in range(3)]
+        self.assertEqual(received, ["(sense_body 0)", "(see 0)", "(hear 0 ref po)"])
+
+
+class TestAsyncReceiveStage(TestCase):
+    def test_receive_stage(self):
+        connection = AsyncConnection("127.0.0.1", 6000, _Think(), receive_stage=lambda msg: ("staged", msg.decode()))
+        connection.datagram_received(b"(see 0)", ("127.0.0.1", 6001))
+        self.assertEqual(connection.think.input_queue.get_nowait(), ("staged", "(see 0)"))
+        self.assertEqual(connection.addr, ("127.0.0.1", 6001))
+
+
+class TestWaitForServer(TestCase):
+    def test_answered_by_running_server(self):
+        server = StubServer()
+        server.start()
+        try:
+            self.assertTrue(wait_for_server(server.host, server.port, timeout=2))
+            self.assertEqual(len(server.clients), 0, "The probe must not connect a client")
+        finally:
+            server.stop()
+            server.join()
+
+    def test_times_out_without_server(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        self.assertFalse(wait_for_server("127.0.0.1", port, timeout=0.2))
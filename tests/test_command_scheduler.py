@@ -0,0 +1,71 @@
+from unittest import TestCase
+
+from command_scheduler import CommandScheduler
+
+
+class TestCommandScheduler(TestCase):
+    def test_newest_body_command_replaces_older(self):
+        scheduler = CommandScheduler(enforce_cycle_limits=True)
+        scheduler.put(["(dash 100)", "(turn_neck 30)"])
+        scheduler.put(["(turn 45)", "(turn_neck -10)"])
+
+        self.assertEqual(scheduler.take_messages(), ["(turn 45)", "(turn_neck -10)"])
+        self.assertEqual(scheduler.superseded["dash"], 1)
+        self.assertEqual(scheduler.superseded["turn_neck"], 1)
+        self.assertTrue(scheduler.empty())
+
+    def test_urgent_command_is_kept_and_sent_first(self):
+        scheduler = CommandScheduler(enforce_cycle_limits=True)
+        scheduler.put("(synch_see)")
+        scheduler.put(["(catch 10)"], urgent=True)
+        scheduler.put(["(dash 50)", "(change_view narrow high)"])
+
+        self.assertEqual(scheduler.take_messages(), ["(catch 10)", "(synch_see)", "(change_view narrow high)"])
+        self.assertEqual(scheduler.superseded["dash"], 1)
+
+    def test_done_separates_cycles(self):
+        scheduler = CommandScheduler(enforce_cycle_limits=True)
+        scheduler.put(["(dash 100)"])
+        scheduler.put("(done)")
+        scheduler.put(["(kick 100 0)"])
+        scheduler.put("(done)")
+
+        self.assertEqual(scheduler.take_messages(), ["(dash 100)", "(done)", "(kick 100 0)", "(done)"])
+        self.assertEqual(sum(scheduler.superseded.values()), 0)
+
+    # Commands queued separately during a cycle are held until the send point, and scheduled together
+    def test_separate_puts_in_same_cycle(self):
+        scheduler = CommandScheduler(enforce_cycle_limits=True)
+        scheduler.start_cycle()
+        scheduler.put(["(dash 100)"])
+        self.assertEqual(scheduler.take_messages(), [])
+        scheduler.put("(clang (ver 8 8))")
+        scheduler.put(["(turn 45)"])
+        self.assertEqual(scheduler.take_messages(), ["(clang (ver 8 8))"])
+
+        scheduler.end_cycle()
+        self.assertEqual(scheduler.take_messages(), ["(turn 45)"])
+        self.assertEqual(scheduler.superseded["dash"], 1)
+
+    # The server rejects a second body command in a cycle, so a command queued after the send point waits for the next
+    def test_command_after_send_point_waits_for_next_cycle(self):
+        scheduler = CommandScheduler(enforce_cycle_limits=True)
+        scheduler.start_cycle()
+        scheduler.put(["(dash 100)"])
+        scheduler.end_cycle()
+        self.assertEqual(scheduler.take_messages(), ["(dash 100)"])
+
+        scheduler.put(["(kick 100 0)"], urgent=True)
+        self.assertEqual(scheduler.take_messages(), [])
+        scheduler.start_cycle()
+        scheduler.put(["(dash 50)"])
+        scheduler.end_cycle()
+        self.assertEqual(scheduler.take_messages(), ["(kick 100 0)"])
+        self.assertEqual(scheduler.superseded["dash"], 1)
+
+    def test_order_kept_without_cycle_limits(self):
+        scheduler = CommandScheduler()
+        scheduler.put("(move (ball) 0 0)")
+        scheduler.put("(move (player Team1 4) 10 10 0 0 0)")
+
+        self.assertEqual(scheduler.take_messages(), ["(move (ball) 0 0)", "(move (player Team1 4) 10 10 0 0 0)"])
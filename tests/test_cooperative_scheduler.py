@@ -0,0 +1,61 @@
+import time
+from unittest import TestCase
+
+from fake_server.stub_server import StubServer
+from player.cooperative_scheduler import CooperativeRuntime
+
+
+class TestCooperativeScheduler(TestCase):
+    def setUp(self):
+        self.server = StubServer(cycle_length=0.05)
+        self.server.start()
+        self.runtime = CooperativeRuntime(num_threads=1)
+        self.runtime.start()
+
+    def tearDown(self):
+        self.runtime.stop()
+        self.runtime.join()
+        self.server.stop()
+        self.server.join()
+
+    def test_agents_connect_in_order_and_act(self):
+        agents = [self.runtime.create_agent("Team1", self.server.port, self.server.host, player_type)
+                  for player_type in ["goalie", "NaN"]]
+        for agent in agents:
+            agent.start()
+        self.assertEqual([agent.think.player_state.num for agent in agents], [1, 2])
+
+        time.sleep(0.5)
+        self.assertTrue(self.server.total_statistics().commands > 0, "The agents should send commands")
+        for agent in agents:
+            agent.stop()
+            agent.join()
+
+        self.assertTrue(all(agent.steps > 0 for agent in agents))
+        # Give the server time to receive the bye messages
+        end_time = time.monotonic() + 1
+        while len(self.server.clients) > 0 and time.monotonic() < end_time:
+            time.sleep(0.01)
+        self.assertEqual(len(self.server.clients), 0, "The agents should say bye when stopped")
+
+    def test_crashing_agent_does_not_stop_the_others(self):
+        agents = [self.runtime.create_agent("Team1", self.server.port, self.server.host, player_type)
+                  for player_type in ["goalie", "NaN"]]
+        for agent in agents:
+            agent.start()
+
+        def fail(msg):
+            raise ValueError("Broken thinker")
+        agents[1].think.handle_message = fail
+
+        agents[1].join(timeout=2)
+        self.assertTrue(agents[1].stopped.is_set(), "The crashed agent should be disconnected")
+        self.assertTrue(agents[1].crashed)
+        self.assertFalse(agents[0].crashed)
+
+        steps = agents[0].steps
+        time.sleep(0.2)
+        self.assertTrue(agents[0].steps > steps, "The other agent should keep playing")
+        self.assertTrue(self.runtime.schedulers[0].is_alive())
+        agents[0].stop()
+        agents[0].join()
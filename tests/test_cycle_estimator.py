@@ -0,0 +1,30 @@
+from unittest import TestCase
+
+from player.cycle_estimator import ServerCycleEstimator
+
+
+class TestServerCycleEstimator(TestCase):
+    def test_acts_at_offset_inside_cycle(self):
+        estimator = ServerCycleEstimator(cycle_length=0.1, action_offset=0.03)
+        for i in range(10):
+            estimator.register_sense_body(5 + i * 0.1)
+
+        self.assertAlmostEqual(estimator.jitter, 0)
+        self.assertAlmostEqual(estimator.next_action_time(5.91), 5.93)
+
+    def test_only_one_action_per_cycle(self):
+        estimator = ServerCycleEstimator(cycle_length=0.1, action_offset=0.03)
+        for i in range(10):
+            estimator.register_sense_body(5 + i * 0.1)
+
+        estimator.register_action(5.935)
+        self.assertAlmostEqual(estimator.next_action_time(5.94), 6.03)
+
+    def test_follows_drifting_arrivals(self):
+        estimator = ServerCycleEstimator(cycle_length=0.1, action_offset=0.03)
+        # The server cycles start 10 ms later than first observed
+        estimator.register_sense_body(5.0)
+        for i in range(1, 100):
+            estimator.register_sense_body(5.01 + i * 0.1)
+
+        self.assertAlmostEqual(estimator.next_action_time(14.951) % 0.1, 0.04, places=3)
@@ -0,0 +1,89 @@
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import configurations
+import experiment_runner
+from experiment_runner import parse_spec, aggregate, read_spec
+from match_farm import apply_configuration, MatchFarm
+
+
+class TestExperimentRunner(TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_repetitions_are_interleaved(self):
+        spec = parse_spec({"variants": [{"name": "a", "repetitions": 2},
+                                        {"name": "b", "repetitions": 1,
+                                         "configuration": {"STAMINA_MODEL_TEAMS": ["Team_1"]}}]})
+        self.assertEqual(spec.matches(), [("a", 0, {}), ("b", 0, {"STAMINA_MODEL_TEAMS": ["Team_1"]}), ("a", 1, {})])
+
+    def test_invalid_specs_are_rejected(self):
+        invalid = [{"variants": []},
+                   {"variants": [{"name": "a/b"}]},
+                   {"variants": [{"name": "a"}, {"name": "a"}]},
+                   {"variants": [{"name": "a", "repetitions": 0}]},
+                   {"variants": [{"name": "a", "configuration": {"NO_SUCH_SETTING": 1}}]},
+                   {"variants": [{"name": "a"}], "num_games": 3}]
+        for spec in invalid:
+            with self.assertRaises(Exception, msg=str(spec)):
+                parse_spec(spec)
+
+    def test_example_spec_is_valid(self):
+        spec = read_spec(Path(experiment_runner.__file__).parent / "experiments" / "models.json")
+        self.assertEqual(len(spec.matches()), 40)
+
+    def test_variant_directories(self):
+        spec = parse_spec({"variants": [{"name": "a", "repetitions": 2}]})
+        farm = MatchFarm(num_matches=0, farm_dir=self.directory, team_names=spec.team_names, num_players=1,
+                         matches=spec.matches())
+        self.assertEqual(farm.num_matches, 2)
+        match = farm._match_spec(1)
+        self.assertEqual(match.directory, self.directory / "a_1")
+        self.assertEqual(match.variant, "a")
+
+    def test_configuration_reaches_modules_importing_by_name(self):
+        from uppaal import strategy
+        from player import player_thinker
+        teams = configurations.STAMINA_MODEL_TEAMS
+        pass_chain = configurations.USING_PASS_CHAIN_STRAT
+        original_teams = list(teams)
+        try:
+            apply_configuration({"STAMINA_MODEL_TEAMS": ["Team_1"], "GOALIE_MODEL_TEAMS": ["Team_2"],
+                                 "USING_PASS_CHAIN_STRAT": not pass_chain})
+            self.assertEqual(strategy.STAMINA_MODEL_TEAMS, ["Team_1"])
+            self.assertEqual(player_thinker.GOALIE_MODEL_TEAMS, ["Team_2"])
+            self.assertEqual(configurations.USING_PASS_CHAIN_STRAT, not pass_chain)
+        finally:
+            teams[:] = original_teams
+            configurations.GOALIE_MODEL_TEAMS.clear()
+            configurations.USING_PASS_CHAIN_STRAT = pass_chain
+        with self.assertRaises(Exception):
+            apply_configuration({"NO_SUCH_SETTING": 1})
+
+    def _write(self, path, text):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+    def test_aggregates_per_variant(self):
+        spec = parse_spec({"variants": [{"name": "a", "repetitions": 2}, {"name": "b", "repetitions": 1}]})
+        for variant, repetition, kicks, possession in [("a", 0, 2, 100), ("a", 1, 4, 300), ("b", 0, 1, 50)]:
+            stat_dir = self.directory / "{0}_{1}".format(variant, repetition) / "Statistics"
+            self._write(stat_dir / "possession" / "possession.csv",
+                        "Game number, Team_1, Team_2\n{0}, {1}, 10\n".format(repetition + 1, possession))
+            self._write(stat_dir / "game" / "kicks.csv", "Tick, Team_1, Team_2\n1, {0}, 0\n2, {0}, 1\n".format(kicks))
+            self._write(stat_dir / "game" / "average_stamina.csv", "Tick, Team_1, Team_2\n1, 8000, 7000\n2, 6000, 7000\n")
+        aggregate(spec, self.directory)
+
+        aggregated = self.directory / "aggregated"
+        self.assertEqual((aggregated / "a" / "possession.csv").read_text(),
+                         "Variant, Repetition, Game number, Team_1, Team_2\na, 0, 1, 100, 10\na, 1, 2, 300, 10\n")
+        summary = (aggregated / "summary.csv").read_text().splitlines()
+        self.assertIn("a, possession.csv, Team_1, 200.000, 2", summary)
+        self.assertIn("a, kicks.csv, Team_1, 6.000, 2", summary)
+        self.assertIn("b, kicks.csv, Team_2, 1.000, 1", summary)
+        self.assertIn("a, average_stamina.csv, Team_1, 7000.000, 2", summary)
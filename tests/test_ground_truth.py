@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+import numpy
+
+from fake_monitor.ground_truth import GroundTruthFeed
+from statisticsmodule import show_parser
+
+# A monitor show message with the play mode, the score and a player pointing
+MONITOR_SHOW = "(show 120 (pm 2) (tm Team1 Team2 0 1) ((b) 1.5 -3.25 0.5 0) " \
+               "((l 1) 0 0x9 -50 0 0.1 -0.1 45 -10 (v h 180) (s 7950.5 0.9 1 130600) (c 3 5 4 0 1 17 0 0 0 0 0)) " \
+               "((r 7) 2 0x1 10.5 -20 0 0 180 0 12 -3 (v l 60) (s 8000 1 1) (f l 1) (c 0 0 0 0 0 0 0 0 0 0 0)))"
+
+
+class TestShowParser(TestCase):
+    def test_parses_monitor_show(self):
+        frame = show_parser.parse_show(MONITOR_SHOW)
+        self.assertEqual(frame.tick, 120)
+        self.assertEqual(frame.play_mode, 2)
+        self.assertEqual(frame.ball.tolist(), [1.5, -3.25, 0.5, 0])
+        self.assertEqual(frame.present_players(), [("l", 1), ("r", 7)])
+        self.assertEqual(frame.player("l", 1).tolist(), [0, 9, -50, 0, 0.1, -0.1, 45, -10, 7950.5, 0.9, 1, 3])
+        # The point direction and the focus are skipped
+        self.assertEqual(frame.player("r", 7)[show_parser.X:show_parser.NECK + 1].tolist(), [10.5, -20, 0, 0, 180, 0])
+        self.assertEqual(frame.player("r", 7)[show_parser.STAMINA], 8000)
+        self.assertTrue(numpy.isnan(frame.player("l", 2)).all())
+
+    def test_parses_log_show(self):
+        frame = show_parser.parse_show("(show 3 ((b) 0 0 0 0) ((l 2) 0 0 -10 5 0 0 0 0 (v h 90) (s 8000 1 1 130600) "
+                                       "(c 0 0 0 0 0 0 0 0 0 0 0)))")
+        self.assertIsNone(frame.play_mode)
+        self.assertEqual(frame.player("l", 2)[show_parser.STATE], 0)
+        self.assertEqual(frame.present_players(), [("l", 2)])
+
+
+class TestGroundTruthFeed(TestCase):
+    def test_frames_are_kept_for_history_ticks(self):
+        feed = GroundTruthFeed(history=2)
+        for tick in range(3):
+            feed.publish_message(MONITOR_SHOW.replace("(show 120", "(show {0}".format(tick)))
+        self.assertEqual(feed.latest_tick, 2)
+        self.assertIsNone(feed.frame(0))
+        self.assertEqual(feed.frame(1).tick, 1)
+        self.assertEqual(feed.player_position(2, "r", 7), (10.5, -20))
+        self.assertIsNone(feed.player_position(2, "r", 8))
+        self.assertEqual(feed.ball_position(2), (1.5, -3.25))
+
+    def test_frames_are_copies(self):
+        feed = GroundTruthFeed()
+        feed.publish_message(MONITOR_SHOW)
+        frame = feed.latest()
+        frame.ball[0] = 100
+        self.assertEqual(feed.ball_position(120), (1.5, -3.25))
@@ -0,0 +1,127 @@
+import queue
+import selectors
+import socket
+import time
+from unittest import TestCase
+
+from client_connection import Connection
+from io_reactor import IOReactor
+
+
+class _Think:
+    def __init__(self):
+        self.input_queue = queue.Queue()
+
+
+# Stands in for a connection, whose socket stops accepting datagrams
+class _BlockingConnection:
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.fully_sent = False
+        self.flushes = 0
+
+    def is_stopped(self):
+        return False
+
+    def _flush_actions(self):
+        self.flushes += 1
+        return self.fully_sent
+
+
+def _wait_for(condition, timeout=2):
+    end_time = time.monotonic() + timeout
+    while not condition() and time.monotonic() < end_time:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestIOReactor(TestCase):
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.settimeout(2)
+        self.reactor = IOReactor()
+        self.reactor.start()
+        self.connection = Connection("127.0.0.1", self.server.getsockname()[1], _Think(), reactor=self.reactor)
+        self.connection.start()
+
+    def tearDown(self):
+        if not self.connection.is_stopped():
+            self.connection.stop()
+        self.reactor.stop()
+        self.reactor.join()
+        self.connection.sock.close()
+        self.server.close()
+
+    def test_queued_commands_are_sent(self):
+        self.connection.action_queue.put("(init Team1 (version 16))")
+        payload, _ = self.server.recvfrom(1024)
+        self.assertEqual(payload, b"(init Team1 (version 16))\0")
+        self.assertEqual(self.connection.statistics.datagrams_sent, 1)
+
+    def test_received_datagrams_are_delivered(self):
+        self.connection.action_queue.put("(init Team1 (version 16))")
+        _, client_addr = self.server.recvfrom(1024)
+        self.server.sendto(b"(init l 1 before_kick_off)", client_addr)
+        self.server.sendto(b"(sense_body 0)", client_addr)
+
+        think_queue = self.connection.think.input_queue
+        self.assertEqual(think_queue.get(timeout=2).decode(), "(init l 1 before_kick_off)")
+        self.assertEqual(think_queue.get(timeout=2).decode(), "(sense_body 0)")
+        self.assertTrue(self.connection.connected.is_set())
+
+    def test_unregistered_on_stop(self):
+        self.connection.action_queue.put("(init Team1 (version 16))")
+        self.server.recvfrom(1024)
+        sock = self.connection.sock
+        self.assertTrue(_wait_for(lambda: sock in self._registered_sockets()))
+
+        self.connection.stop()
+        payload, _ = self.server.recvfrom(1024)
+        self.assertEqual(payload, b"(bye)\0")
+        self.assertTrue(_wait_for(lambda: sock not in self._registered_sockets()))
+
+    def _registered_sockets(self):
+        return [key.fileobj for key in list(self.reactor._selector.get_map().values())]
+
+
+# Drives the reactor from the test thread, so the selector can be inspected between the steps
+class TestBlockedSocket(TestCase):
+    def setUp(self):
+        self.reactor = IOReactor()
+        self.connection = _BlockingConnection()
+
+    def tearDown(self):
+        self.reactor._selector.close()
+        self.reactor._wakeup_recv.close()
+        self.reactor._wakeup_send.close()
+        self.connection.sock.close()
+
+    def _events(self):
+        return self.reactor._selector.get_key(self.connection.sock).events
+
+    def test_waits_for_writable_socket(self):
+        self.reactor.register(self.connection)
+        self.reactor._process_pending()
+        self.assertEqual(self.connection.flushes, 1)
+        self.assertIn(self.connection, self.reactor._blocked)
+        self.assertEqual(self._events(), selectors.EVENT_READ | selectors.EVENT_WRITE)
+
+        # Blocked connections are flushed when the socket becomes writable, not when more is queued
+        self.reactor.request_flush(self.connection)
+        self.reactor._process_pending()
+        self.assertEqual(self.connection.flushes, 1)
+
+        self.connection.fully_sent = True
+        self.reactor._flush(self.connection)
+        self.assertNotIn(self.connection, self.reactor._blocked)
+        self.assertEqual(self._events(), selectors.EVENT_READ)
+
+    def test_blocked_connection_is_unregistered(self):
+        self.reactor.register(self.connection)
+        self.reactor._process_pending()
+        self.reactor.unregister(self.connection)
+        self.reactor._process_pending()
+        self.assertNotIn(self.connection, self.reactor._blocked)
+        with self.assertRaises(KeyError):
+            self.reactor._selector.get_key(self.connection.sock)
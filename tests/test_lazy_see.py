@@ -0,0 +1,81 @@
+from unittest import TestCase
+
+import parsing
+from player.player import PlayerState
+from player.world_objects import Coordinate
+from see_tokenizer import tokenize_see, parse_players
+
+SEE = "(see {0} ((f c) 20 0) ((f c t) 30 -40) ((l t) 25 -60) ((b) 5 10) ((p \"Team1\" 4) 10 -20 0.1 2 30 0) " \
+      "((p \"Team2\" 7) 15 30) ((p) 40 5))"
+SEE_WITHOUT_PLAYERS = "(see {0} ((f c) 20 0) ((l t) 25 -60) ((b) 5 10))"
+
+
+def _state():
+    state = PlayerState()
+    state.team_name = "Team1"
+    state.position.set_value(Coordinate(-10, 5), 0)
+    state.face_dir.set_value(30, 0)
+    state.body_angle.set_value(30, 0)
+    return state
+
+
+def _see(state, msg):
+    parsing._update_time(msg, state)
+    parsing._parse_see(msg, state)
+    state.on_see_update()
+
+
+def _players(state):
+    return {(op.get_value().team, op.get_value().num): op for op in state.world_view.other_players}
+
+
+class TestLazySee(TestCase):
+    def test_player_slices(self):
+        tokens = tokenize_see(SEE.format(1), lazy_players=True)
+        self.assertEqual(tokens.players, [])
+        self.assertEqual(parse_players(tokens.player_slices), tokenize_see(SEE.format(1)).players)
+
+    # The players are parsed when the world view is first asked for them, not when the see message arrives
+    def test_players_parsed_on_demand(self):
+        state = _state()
+        _see(state, SEE.format(1))
+        self.assertEqual((state.statistics.sees_with_players, state.statistics.sees_with_players_parsed), (1, 0))
+        self.assertTrue(state.world_view.ball.is_value_known())
+
+        players = _players(state)
+        self.assertEqual(set(players), {("Team1", "4"), ("Team2", "7"), (None, None)})
+        self.assertEqual(state.statistics.sees_with_players_parsed, 1)
+        self.assertEqual(players[("Team1", "4")].last_updated_time, 1)
+
+        # Asking again does not parse again
+        _players(state)
+        self.assertEqual(state.statistics.sees_with_players_parsed, 1)
+
+    # Players parsed later are placed relative to where the player was, when it saw them
+    def test_players_placed_at_time_of_see(self):
+        eager = _state()
+        _see(eager, SEE.format(1))
+        expected = _players(eager)[("Team1", "4")].get_value()
+
+        lazy = _state()
+        _see(lazy, SEE.format(1))
+        lazy.position.set_value(Coordinate(20, 20), 2)
+        lazy.world_view.sim_time = 3
+        teammate = _players(lazy)[("Team1", "4")]
+        self.assertEqual(teammate.last_updated_time, 1)
+        self.assertEqual(str(teammate.get_value().coord), str(expected.coord))
+
+    # Players of see messages, that are forgotten before they are needed, are never parsed
+    def test_unused_players_skipped(self):
+        state = _state()
+        _see(state, SEE.format(1))
+        _see(state, SEE.format(5))
+        _see(state, SEE_WITHOUT_PLAYERS.format(25))
+        self.assertEqual(_players(state), {})
+        self.assertEqual((state.statistics.sees_with_players, state.statistics.sees_with_players_parsed), (2, 0))
+
+        # Players of older see messages are still remembered, when the last see message did not contain them
+        _see(state, SEE.format(30))
+        _see(state, SEE_WITHOUT_PLAYERS.format(31))
+        self.assertEqual(len(_players(state)), 3)
+        self.assertEqual(state.statistics.sees_with_players_parsed, 1)
@@ -0,0 +1,44 @@
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from statisticsmodule import log_segments
+
+_SERVER_LOG = ["ULG5\n", "(server_param (goal_width 14.02))\n", "(playmode 0 before_kick_off)\n",
+               "(show 0 ((b) 0 0 0 0))\n", "(show 1 ((b) 1 0 0 0))\n", "(show 2 ((b) 2 0 0 0))\n",
+               "(show 3 ((b) 3 0 0 0))\n"]
+_ACTION_LOG = ["0,0\tRecv Team1_1: (init Team1 (version 16))\n", "1,0\tRecv Team1_1: (dash 100)\n",
+               "2,0\tRecv Team1_1: (kick 50 0)\n", "3,0\tRecv Team1_1: (turn 10)\n"]
+_NAME = "20210101120000-Team1_0-vs-Team2_0"
+
+
+class TestLogSegments(TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        with open(self.directory / (_NAME + ".rcg"), "w") as file:
+            file.writelines(_SERVER_LOG)
+        with open(self.directory / (_NAME + ".rcl"), "w") as file:
+            file.writelines(_ACTION_LOG)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_ticks_start_over_in_every_segment(self):
+        directories = log_segments.split_logs(self.directory, [(0, 2), (2, 4)], self.directory / "segments")
+        self.assertEqual(len(directories), 2)
+
+        with open(directories[1] / "202101011200000001-Team1_0-vs-Team2_0.rcg") as file:
+            server_log = file.readlines()
+        self.assertEqual(server_log, ["ULG5\n", "(server_param (goal_width 14.02))\n", "(show 0 ((b) 2 0 0 0))\n",
+                                      "(show 1 ((b) 3 0 0 0))\n"])
+
+        with open(directories[1] / "202101011200000001-Team1_0-vs-Team2_0.rcl") as file:
+            action_log = file.readlines()
+        # The init messages are needed by every segment, to find the players
+        self.assertEqual(action_log, ["0,0\tRecv Team1_1: (init Team1 (version 16))\n",
+                                      "0,0\tRecv Team1_1: (kick 50 0)\n", "1,0\tRecv Team1_1: (turn 10)\n"])
+
+    def test_segment_names_have_unique_game_ids(self):
+        self.assertNotEqual(log_segments.segment_log_name(_NAME + ".rcg", 0),
+                            log_segments.segment_log_name(_NAME + ".rcg", 1))
@@ -0,0 +1,56 @@
+import shutil
+import socket
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import match_farm
+import uppaal
+from match_farm import CpuSampler, MatchFarm
+from statisticsmodule import log_parser
+
+
+class TestMatchFarm(TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_allocates_free_port_triples(self):
+        farm = MatchFarm(num_matches=2, farm_dir=self.directory, team_names=["Team1", "Team2"], num_players=1)
+        # Occupy a port of the first triple
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        occupied = sock.getsockname()[1]
+        farm._next_port = occupied - 1
+        try:
+            first = farm._allocate_ports()
+        finally:
+            sock.close()
+        self.assertEqual(first[0], occupied - 1 + match_farm.PORT_STRIDE)
+        self.assertEqual(first, (first[0], first[0] + 1, first[0] + 2))
+        self.assertEqual(farm._allocate_ports()[0], first[0] + match_farm.PORT_STRIDE)
+
+    def test_idle_cores_within_core_count(self):
+        sampler = CpuSampler()
+        sum(i * i for i in range(100000))
+        idle_cores = sampler.idle_cores()
+        self.assertTrue(0 <= idle_cores <= sampler.cores)
+
+    def test_newest_logs_are_found_in_log_dir(self):
+        for name in ["20200101120000-A_0-vs-B_0.rcg", "20210101120000-A_0-vs-B_0.rcg", "20210101120000-A_0-vs-B_0.rcl"]:
+            (self.directory / name).touch()
+        self.assertEqual(log_parser.get_newest_server_log(self.directory), "20210101120000-A_0-vs-B_0.rcg")
+        self.assertEqual(log_parser.get_newest_action_log(self.directory), "20210101120000-A_0-vs-B_0.rcl")
+
+    def test_uppaal_working_directory(self):
+        original = (uppaal.QUERIES_PATH, uppaal.MODELS_PATH, uppaal.OUTPUT_DIR_PATH)
+        try:
+            uppaal.use_working_directory(self.directory)
+            self.assertEqual(uppaal.MODELS_PATH, self.directory / "models")
+            self.assertTrue((uppaal.MODELS_PATH / "PassOrDribbleModel.xml").exists())
+            self.assertTrue((uppaal.QUERIES_PATH / "PassOrDribbleModel.q").exists())
+            self.assertTrue(uppaal.OUTPUT_DIR_PATH.exists())
+        finally:
+            uppaal.QUERIES_PATH, uppaal.MODELS_PATH, uppaal.OUTPUT_DIR_PATH = original
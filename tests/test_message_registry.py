@@ -0,0 +1,113 @@
+import threading
+from unittest import TestCase
+
+import parsing
+from coaches.world_objects_coach import WorldViewCoach
+from message_registry import MessageRegistry
+from player.player import PlayerState
+
+
+def _unknown(msg, received):
+    received.append(("unknown", msg))
+
+
+def _see(msg, received):
+    received.append(("see", msg))
+
+
+def _ok(msg, received):
+    received.append(("ok", msg))
+
+
+def _ok_look(msg, received):
+    received.append(("ok look", msg))
+
+
+class TestMessageRegistry(TestCase):
+    def setUp(self) -> None:
+        self.registry = MessageRegistry("test", _unknown)
+        self.registry.register(["see", "see_global"], _see)
+        self.registry.register(["ok"], _ok)
+        self.registry.register(["ok look"], _ok_look)
+
+    def test_dispatch_by_first_word(self):
+        received = []
+        self.registry.dispatch("(see 12 ((b) 1 2))", received)
+        self.registry.dispatch("(see_global 12)", received)
+        self.registry.dispatch("(sense_body 12 (view_mode high normal))", received)
+        self.assertEqual(received, [("see", "(see 12 ((b) 1 2))"), ("see", "(see_global 12)"),
+                                    ("unknown", "(sense_body 12 (view_mode high normal))")])
+
+    # A handler of the first two words is preferred, otherwise the handler of the first word is used
+    def test_dispatch_by_two_words(self):
+        received = []
+        self.registry.dispatch("(ok look 926 ((g r) 52.5 0))", received)
+        self.registry.dispatch("(ok eye on)", received)
+        self.registry.dispatch("(ok)", received)
+        self.assertEqual([handler for handler, _ in received], ["ok look", "ok", "ok"])
+
+    def test_register_twice(self):
+        with self.assertRaises(Exception):
+            self.registry.register(["see"], _see)
+
+    def test_statistics(self):
+        for msg in ["(see 1)", "(see 2)", "(ok look 3)", "(hear 4 referee play_on)"]:
+            self.registry.dispatch(msg, [])
+        calls = {stats.head: (stats.handler, stats.calls) for stats in self.registry.statistics()}
+        self.assertEqual(calls, {"see": ("_see", 2), "ok look": ("_ok_look", 1), "default": ("_unknown", 1)})
+        self.assertTrue(all(stats.seconds >= 0 for stats in self.registry.statistics()))
+
+        self.registry.reset_statistics()
+        self.assertEqual(self.registry.statistics(), [])
+
+
+    # Every thread counts on its own, and the counts are added up
+    def test_statistics_of_several_threads(self):
+        threads = [threading.Thread(target=lambda: [self.registry.dispatch("(see 1)", []) for _ in range(100)])
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.registry.dispatch("(ok)", [])
+        calls = {stats.head: stats.calls for stats in self.registry.statistics()}
+        self.assertEqual(calls, {"see": 400, "ok": 1})
+
+        self.registry.reset_statistics()
+        self.registry.dispatch("(ok)", [])
+        self.assertEqual([(stats.head, stats.calls) for stats in self.registry.statistics()], [("ok", 1)])
+
+
+class TestParsingHandlers(TestCase):
+    def setUp(self) -> None:
+        parsing.PLAYER_MESSAGES.reset_statistics()
+
+    def test_player_messages(self):
+        ps = PlayerState()
+        parsing.parse_message_update_state(b"(init l 7 before_kick_off)", ps)
+        parsing.parse_message_update_state("(sense_body 42 (view_mode high normal) (stamina 7000 0.9 130000) "
+                                           "(speed 0.3 12) (head_angle 20) (kick 1) (dash 5))", ps)
+        parsing.parse_message_update_state("(hear 42 referee play_on)", ps)
+        parsing.parse_message_update_state("(ok synch_see)", ps)
+        parsing.parse_message_update_state("(player_type (id 0) (player_speed_max 1.05))", ps)
+        self.assertEqual((ps.world_view.side, ps.num), ("l", 7))
+        self.assertEqual(ps.world_view.sim_time, 42)
+        self.assertEqual(ps.body_state.stamina, 7000)
+        self.assertEqual(ps.world_view.game_state, "play_on")
+
+        calls = {stats.head: stats.calls for stats in parsing.PLAYER_MESSAGES.statistics()}
+        self.assertEqual(calls, {"init": 1, "sense_body": 1, "hear": 1, "ok synch_see": 1, "player_type": 1})
+
+    def test_unknown_messages(self):
+        with self.assertRaises(Exception):
+            parsing.parse_message_update_state("(ok look 926 ((b) 0 0 0 0))", PlayerState())
+        with self.assertRaises(Exception):
+            parsing.parse_message_trainer("(unknown 1)", WorldViewCoach(0, "Team1"))
+
+    def test_online_coach_messages(self):
+        world_view = WorldViewCoach(0, "Team1")
+        parsing.parse_message_online_coach("(init r ok)", "Team1", world_view)
+        parsing.parse_message_online_coach("(hear 10 referee kick_off_l)", "Team1", world_view)
+        parsing.parse_message_online_coach("(ok eye on)", "Team1", world_view)
+        self.assertEqual(world_view.side, "r")
+        self.assertEqual(world_view.game_state, "kick_off_l")
@@ -12,6 +12,11 @@ class Test(TestCase):
         self.assertEqual(ps.world_view.game_state, "kick_off_l", "Game state in the player state should update according to msg")
         self.assertEqual(ps.world_view.sim_time, 0, "Sim time in the player state should update according to msg")
 
+    def test_is_think_message(self):
+        self.assertTrue(parsing.is_think_message("(think)"))
+        self.assertTrue(parsing.is_think_message(b"(think)\x00"))
+        self.assertFalse(parsing.is_think_message(b"(sense_body 0 (view_mode high normal))"))
+
     # todo Fix trilateration tests
     def test_trilateration_horizontally_aligned(self):
         expected_position = Coordinate(19.53533, 21.47515)
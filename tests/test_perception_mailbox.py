@@ -0,0 +1,84 @@
+import asyncio
+import queue
+from unittest import TestCase
+
+from client_connection import Datagram
+from player.perception_mailbox import AsyncPerceptionMailbox, PerceptionMailbox
+
+
+class TestPerceptionMailbox(TestCase):
+    def test_keeps_newest_perception_and_all_hear_messages(self):
+        mailbox = PerceptionMailbox()
+        mailbox.put("(sense_body 1)")
+        mailbox.put("(see 1)")
+        mailbox.put("(hear 1 referee goal_l_1)")
+        mailbox.put("(sense_body 2)")
+        mailbox.put("(see 2)")
+        mailbox.put("(hear 2 referee kick_off_r)")
+
+        received = []
+        while not mailbox.empty():
+            received.append(mailbox.get_nowait())
+
+        self.assertEqual(received, ["(hear 1 referee goal_l_1)", "(sense_body 2)", "(see 2)",
+                                    "(hear 2 referee kick_off_r)"])
+        self.assertEqual(mailbox.dropped_see, 1)
+        self.assertEqual(mailbox.dropped_sense_body, 1)
+
+    def test_datagrams_are_collapsed(self):
+        mailbox = PerceptionMailbox()
+        mailbox.put(Datagram(b"(see 1)"))
+        mailbox.put(Datagram(b"(see 2)"))
+        self.assertEqual(mailbox.qsize(), 1)
+        self.assertEqual(mailbox.get().decode(), "(see 2)")
+
+    def test_put_all_collapses_like_put(self):
+        mailbox = PerceptionMailbox()
+        mailbox.put_all(["(see 1)", "(hear 1 referee goal_l_1)", "(see 2)"])
+        self.assertEqual(mailbox.get_nowait(), "(hear 1 referee goal_l_1)")
+        self.assertEqual(mailbox.get_nowait(), "(see 2)")
+        self.assertTrue(mailbox.empty())
+        self.assertEqual(mailbox.dropped_see, 1)
+
+    def test_consumed_see_is_not_replaced(self):
+        mailbox = PerceptionMailbox()
+        mailbox.put("(see 1)")
+        self.assertEqual(mailbox.get(), "(see 1)")
+        mailbox.put("(see 2)")
+        self.assertEqual(mailbox.get(), "(see 2)")
+        self.assertEqual(mailbox.dropped_see, 0)
+
+    def test_get_times_out_when_empty(self):
+        mailbox = PerceptionMailbox()
+        with self.assertRaises(queue.Empty):
+            mailbox.get(timeout=0.01)
+
+
+class TestAsyncPerceptionMailbox(TestCase):
+    def test_collapses_and_wakes_waiting_thinker(self):
+        async def run():
+            mailbox = AsyncPerceptionMailbox()
+            waiting = asyncio.ensure_future(mailbox.get())
+            await asyncio.sleep(0)
+            mailbox.put_nowait("(see 1)")
+            self.assertEqual(await asyncio.wait_for(waiting, 1), "(see 1)")
+
+            mailbox.put_nowait("(see 2)")
+            mailbox.put_nowait("(see 3)")
+            self.assertEqual(await mailbox.get(), "(see 3)")
+            self.assertEqual(mailbox.dropped_see, 1)
+            with self.assertRaises(asyncio.QueueEmpty):
+                mailbox.get_nowait()
+
+        asyncio.run(run())
+
+    # None is used to wake the thinker, when it is stopped
+    def test_none_is_delivered(self):
+        async def run():
+            mailbox = AsyncPerceptionMailbox()
+            mailbox.put_nowait("(see 1)")
+            mailbox.put_nowait(None)
+            self.assertEqual(mailbox.get_nowait(), "(see 1)")
+            self.assertIsNone(await mailbox.get())
+
+        asyncio.run(run())
@@ -0,0 +1,109 @@
+import pickle
+from unittest import TestCase
+
+import parsing
+from client_connection import Datagram
+from percepts import SeePercept, BodyPercept, HearPercept
+from player.perception_mailbox import PerceptionMailbox
+from player.player import PlayerState
+from player.world_objects import Coordinate
+
+SEE = "(see {0} ((f c) 20 0) ((f c t) 30 -40) ((l t) 25 -60) ((b) 5 10 0.5 2) ((p \"Team1\" 4) 10 -20 0.1 2 30 0))"
+BODY = "(sense_body {0} (view_mode high narrow) (stamina 7000 0.9 130000) (speed 0.3 12) (head_angle 20) (kick 1) " \
+       "(dash 5) (turn 2) (say 0) (turn_neck 1) (catch 0) (move 0) (change_view 0) " \
+       "(arm (movable 0) (expires 0) (target 0 0) (count 0)) (focus (target none) (count 0)) " \
+       "(tackle (expires 0) (count 0)) (collision (ball)) (foul  (charged 0) (card none)))"
+HEAR = "(hear {0} referee play_on)"
+
+
+def _state():
+    state = PlayerState()
+    state.team_name = "Team1"
+    state.position.set_value(Coordinate(-10, 5), 0)
+    state.face_dir.set_value(30, 0)
+    state.body_angle.set_value(30, 0)
+    return state
+
+
+def _messages():
+    messages = []
+    for tick in range(1, 4):
+        messages.extend([HEAR.format(tick), BODY.format(tick), SEE.format(tick)])
+    return messages
+
+
+class TestPercepts(TestCase):
+    def test_read_percept(self):
+        see = parsing.read_percept(Datagram(SEE.format(7).encode(), received_at=12.5))
+        self.assertIsInstance(see, SeePercept)
+        self.assertEqual((see.time, see.received_at, see.players_behind), (7, 12.5, 0))
+        self.assertEqual(len(see.flags), 2)
+        self.assertEqual(see.player_slices, (('p "Team1" 4', " 10 -20 0.1 2 30 0"),))
+
+        body = parsing.read_percept(BODY.format(8))
+        self.assertIsInstance(body, BodyPercept)
+        self.assertEqual((body.time, body.view_mode, body.collision, body.speed), (8, "high narrow", "(ball)", 0.3))
+        self.assertIn(("stamina", 7000.0), body.values)
+
+        hear = parsing.read_percept(HEAR.format(9))
+        self.assertEqual(hear, HearPercept(9, "referee", HEAR.format(9), None, hear.parse_seconds))
+
+        # Other messages are passed on as they were received
+        init = Datagram(b"(init l 7 before_kick_off)")
+        self.assertIs(parsing.read_percept(init), init)
+
+    # Errors of the I/O thread are left to the thinker, which parses the raw message and reports them
+    def test_malformed_message_passed_on(self):
+        malformed = Datagram(b"(see 5 ((x) 1 2))")
+        self.assertIs(parsing.read_percept(malformed), malformed)
+        with self.assertRaises(Exception):
+            parsing.parse_message_update_state(malformed, _state())
+
+    # A see message is a duplicate only if its time equals the time of the last one, not if it starts with it
+    def test_duplicate_see(self):
+        for read in [lambda msg: msg, parsing.read_percept]:
+            state = _state()
+            parsing.parse_message_update_state(HEAR.format(0), state)
+            parsing.parse_message_update_state(read(SEE.format(1)), state)
+            parsing.parse_message_update_state(read(SEE.format(1)), state)
+            self.assertEqual(state.statistics.sees_with_players, 1)
+            parsing.parse_message_update_state(read(SEE.format(12)), state)
+            self.assertEqual(state.action_history.last_see_update, 12)
+            self.assertEqual(state.statistics.sees_with_players, 2)
+
+    def test_percepts_are_immutable(self):
+        see = parsing.read_percept(SEE.format(7))
+        with self.assertRaises(AttributeError):
+            see.time = 8
+        self.assertEqual(pickle.loads(pickle.dumps(see)), see)
+
+    # The mailbox keeps only the newest see and sense_body percept, like it does for the messages
+    def test_mailbox(self):
+        mailbox = PerceptionMailbox()
+        for msg in _messages():
+            mailbox.put(parsing.read_percept(msg))
+        received = [mailbox.get_nowait() for _ in range(mailbox.qsize())]
+        self.assertEqual([(type(percept), percept.time) for percept in received],
+                         [(HearPercept, 1), (HearPercept, 2), (HearPercept, 3), (BodyPercept, 3), (SeePercept, 3)])
+        self.assertEqual((mailbox.dropped_see, mailbox.dropped_sense_body), (2, 2))
+
+    # Applying the percepts changes the player state like parsing the messages
+    def test_same_state_as_parsing_messages(self):
+        parsed = _state()
+        applied = _state()
+        for msg in _messages():
+            parsing.parse_message_update_state(msg, parsed)
+            parsing.parse_message_update_state(parsing.read_percept(msg), applied)
+
+        self.assertEqual(vars(applied.body_state), vars(parsed.body_state))
+        self.assertEqual(applied.world_view.sim_time, parsed.world_view.sim_time)
+        self.assertEqual(applied.world_view.game_state, "play_on")
+        self.assertEqual(str(applied.position.get_value()), str(parsed.position.get_value()))
+        self.assertEqual(str(applied.world_view.ball.get_value().coord), str(parsed.world_view.ball.get_value().coord))
+        self.assertEqual([str(op.get_value().coord) for op in applied.world_view.other_players],
+                         [str(op.get_value().coord) for op in parsed.world_view.other_players])
+        self.assertEqual(applied.ball_collision_time, parsed.ball_collision_time)
+
+        times = applied.statistics.percept_times
+        self.assertEqual(times.counts, {"HearPercept": 3, "BodyPercept": 3, "SeePercept": 3})
+        self.assertEqual(parsed.statistics.percept_times.counts, {})
@@ -1,7 +1,7 @@
 from unittest import TestCase
 
 from geometry import Coordinate
-from player.player import ViewFrequency, PlayerState
+from player.player import ViewFrequency, PlayerState, LatencyHistogram
 from player.world_objects import ObservedPlayer, PrecariousData
 
 
@@ -9,6 +9,56 @@ class TestViewFrequency(TestCase):
     pass
 
 
+class TestLatencyHistogram(TestCase):
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for ms in range(100):
+            histogram.register(ms / 1000 + 0.0005)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.percentile(50), 50)
+        self.assertEqual(histogram.percentile(99), 99)
+
+    def test_slow_messages_in_last_bucket(self):
+        histogram = LatencyHistogram()
+        histogram.register(2.5)
+        self.assertEqual(histogram.buckets[LatencyHistogram.MAX_MS], 1)
+
+
+class TestScenarioReset(TestCase):
+    def test_observations_forgotten_identity_kept(self):
+        state = PlayerState()
+        state.team_name = "Team1"
+        state.num = 4
+        state.world_view.side = "r"
+        state.world_view.sim_time = 250
+        starting_position = Coordinate(-20, 10)
+        state.starting_position = starting_position
+        state.position = PrecariousData(Coordinate(5, 5), 249)
+        state.strategy_result_list.append("(dash_power 80)")
+        statistics = state.statistics
+
+        state.reset_for_scenario()
+        self.assertEqual((state.team_name, state.num, state.world_view.side), ("Team1", 4, "r"))
+        self.assertEqual(state.world_view.sim_time, 250)
+        self.assertIs(state.starting_position, starting_position)
+        self.assertIs(state.statistics, statistics)
+        self.assertFalse(state.position.is_value_known())
+        self.assertEqual(state.strategy_result_list, [])
+
+    # A strategy that was already being generated, when the scenario was reset, must not be used in the next one
+    def test_strategy_of_previous_scenario_discarded(self):
+        state = PlayerState()
+        scenario = state.scenario
+        state.add_strategy_result("(dash_power 80)", scenario)
+        self.assertEqual(state.strategy_result_list, ["(dash_power 80)"])
+
+        state.reset_for_scenario()
+        state.add_strategy_result("(dash_power 60)", scenario)
+        self.assertEqual(state.strategy_result_list, [])
+        state.add_strategy_result("(dash_power 40)", state.scenario)
+        self.assertEqual(state.strategy_result_list, ["(dash_power 40)"])
+
+
 class TestWorldView(TestCase):
     # LEFT SIDE
     def test_get_non_offside_forward_team_mates_01(self):
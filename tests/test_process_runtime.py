@@ -0,0 +1,35 @@
+import threading
+from unittest import TestCase
+
+from player.process_runtime import ProcessTeamRuntime, default_players_per_process
+
+
+class TestProcessTeamRuntime(TestCase):
+    def test_players_grouped_in_connect_order(self):
+        runtime = ProcessTeamRuntime(["Team1", "Team2"], 3, 6000, "127.0.0.1", players_per_process=4)
+        self.assertEqual(runtime.groups, [[("Team1", "goalie"), ("Team1", "NaN"), ("Team1", "NaN"), ("Team2", "goalie")],
+                                          [("Team2", "NaN"), ("Team2", "NaN")]])
+        self.assertEqual(len(runtime.processes), 2)
+
+    def test_one_process_per_player(self):
+        runtime = ProcessTeamRuntime(["Team1"], 11, 6000, "127.0.0.1", players_per_process=1)
+        self.assertEqual(len(runtime.processes), 11)
+
+    def test_default_size_uses_all_players(self):
+        self.assertTrue(default_players_per_process(22) >= 1)
+        self.assertEqual(default_players_per_process(1), 1)
+
+    # The processes are forked, so no other thread may hold a lock at that time
+    def test_refuses_to_fork_with_threads_running(self):
+        release = threading.Event()
+        thread = threading.Thread(target=release.wait, name="Lingering")
+        thread.start()
+        try:
+            runtime = ProcessTeamRuntime(["Team1"], 1, 6000, "127.0.0.1")
+            with self.assertRaises(Exception) as context:
+                runtime.start()
+            self.assertIn("Lingering", str(context.exception))
+            self.assertIsNone(runtime.processes[0].pid)
+        finally:
+            release.set()
+            thread.join()
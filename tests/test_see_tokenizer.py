@@ -0,0 +1,31 @@
+from unittest import TestCase
+
+from parsing_benchmark import example_see_messages, legacy_tokenize_see
+from see_tokenizer import tokenize_see, SeenFlag, SeenLine, SeenBall, SeenPlayer
+
+SEE = "(see 0 ((f r b) 48.9 29) ((f g r b) 42.5 -4) ((g r) 43.8 -13) ((F) 1 -179) ((f p r c) 27.9 -21 0 0) " \
+      "((P) 1 -179) ((p \"Team2\" 2) 1 0 0 0) ((p \"Team2\" 1 goalie) 9 0 0 0 30 -5 t) ((p \"Team1\") 27.1 0) " \
+      "((p) 12) ((b) 13.5 -31 0.2 -5) ((l r) 42.5 90))"
+
+
+class TestSeeTokenizer(TestCase):
+    def test_tokenize_see(self):
+        tokens = tokenize_see(SEE)
+        self.assertEqual(tokens.flags, [SeenFlag("rb", 48.9, 29), SeenFlag("grb", 42.5, -4), SeenFlag("prc", 27.9, -21)])
+        self.assertEqual(tokens.goals, [SeenFlag("gr", 43.8, -13)])
+        self.assertEqual(tokens.lines, [SeenLine("r", 42.5, 90)])
+        self.assertEqual(tokens.ball, SeenBall(13.5, -31, 0.2, -5))
+        self.assertEqual(tokens.players_behind, 1)
+        self.assertEqual(tokens.players, [SeenPlayer("Team2", "2", None, 1, 0, 0, 0, None, None),
+                                          SeenPlayer("Team2", "1", True, 9, 0, 0, 0, 30, -5),
+                                          SeenPlayer("Team1", None, None, 27.1, 0, None, None, None, None),
+                                          SeenPlayer(None, None, None, None, 12, None, None, None, None)])
+
+    def test_unknown_element(self):
+        with self.assertRaises(Exception):
+            tokenize_see("(see 0 ((x) 1 2))")
+
+    # The tokenizer finds the same objects as the regular expressions used before
+    def test_same_as_legacy_extraction(self):
+        for msg in example_see_messages(500):
+            self.assertEqual(vars(tokenize_see(msg)), vars(legacy_tokenize_see(msg)), msg)
@@ -0,0 +1,95 @@
+import threading
+import time
+from unittest import TestCase
+
+from player.player import PlayerState
+from uppaal import strategy_pool
+from uppaal.strategy_pool import StrategyPool
+
+
+def _state(sim_time=0):
+    state = PlayerState()
+    state.world_view.sim_time = sim_time
+    state.is_generating_strategy = True
+    return state
+
+
+class TestStrategyPool(TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.generated = []
+
+    def _generate(self, state):
+        self.release.wait(2)
+        self.generated.append(state)
+        state.is_generating_strategy = False
+
+    def _wait_for(self, condition):
+        end_time = time.monotonic() + 2
+        while not condition() and time.monotonic() < end_time:
+            time.sleep(0.01)
+
+    def test_limits_concurrency_and_drops_oldest(self):
+        pool = StrategyPool(max_workers=1, max_queue_length=2)
+        states = [_state() for _ in range(4)]
+        pool.submit(states[0], self._generate)
+        self._wait_for(lambda: pool.queue_depth() == 0)
+        for state in states[1:]:
+            pool.submit(state, self._generate)
+
+        # states[0] is being generated, states[1] was dropped to make room for states[3]
+        self.assertEqual(pool.queue_depth(), 2)
+        self.assertEqual(pool.metrics.dropped, 1)
+        self.assertFalse(states[1].is_generating_strategy)
+
+        self.release.set()
+        self._wait_for(lambda: pool.metrics.completed == 3)
+        pool.shutdown(1)
+        self.assertEqual(self.generated, [states[0], states[2], states[3]])
+        self.assertEqual(pool.metrics.max_queue_depth, 2)
+        self.assertEqual(pool.metrics.wait_time.count, 3)
+
+    def test_cancels_expired_stale_and_cancelled_requests(self):
+        pool = StrategyPool(max_workers=1, max_age_cycles=5)
+        pool.submit(_state(), self._generate)
+        self._wait_for(lambda: pool.queue_depth() == 0)
+
+        expired = _state()
+        pool.submit(expired, self._generate, deadline=0)
+        stale = _state(sim_time=10)
+        pool.submit(stale, self._generate)
+        stale.world_view.sim_time = 16
+        cancelled = _state()
+        pool.submit(cancelled, self._generate).cancel()
+        fresh = _state(sim_time=10)
+        pool.submit(fresh, self._generate)
+        fresh.world_view.sim_time = 15
+
+        self.release.set()
+        self._wait_for(lambda: pool.metrics.completed == 2)
+        pool.shutdown(1)
+        self.assertEqual((pool.metrics.expired, pool.metrics.stale, pool.metrics.cancelled), (1, 1, 1))
+        self.assertEqual(self.generated[1:], [fresh])
+        for state in [expired, stale, cancelled]:
+            self.assertFalse(state.is_generating_strategy, "The player should be able to request a new strategy")
+
+    def test_failed_generation_frees_player(self):
+        pool = StrategyPool(max_workers=1)
+        state = _state()
+
+        def fail(_):
+            raise ValueError("verifyta not found")
+
+        pool.submit(state, fail)
+        self._wait_for(lambda: pool.metrics.failed == 1)
+        pool.shutdown(1)
+        self.assertFalse(state.is_generating_strategy)
+
+    # Player processes are forked after the workers of the shared pool have stopped
+    def test_shutdown_shared_pool(self):
+        pool = strategy_pool.shared_pool()
+        pool.submit(_state(), self._generate)
+        self.release.set()
+        strategy_pool.shutdown_shared_pool(2)
+        self.assertFalse(any(worker.is_alive() for worker in pool._workers))
+        self.assertIsNone(strategy_pool.shared_pool_metrics())
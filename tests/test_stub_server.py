@@ -0,0 +1,46 @@
+import socket
+from unittest import TestCase
+
+from fake_server.stub_server import StubServer, split_messages
+
+
+class TestSplitMessages(TestCase):
+    def test_coalesced_commands_are_split(self):
+        self.assertEqual(split_messages(b"(move -36 20)(synch_see)(clang (ver 8 8))\0"),
+                         ["(move -36 20)", "(synch_see)", "(clang (ver 8 8))"])
+
+
+class TestStubServer(TestCase):
+    def setUp(self):
+        self.server = StubServer(cycle_length=0.02)
+        self.server.start()
+        self.client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.client.settimeout(1)
+
+    def tearDown(self):
+        self.server.stop()
+        self.server.join()
+        self.client.close()
+
+    def _receive(self, prefix):
+        while True:
+            payload, address = self.client.recvfrom(8192)
+            if payload.startswith(prefix):
+                return payload, address
+
+    def test_init_answered_from_new_port(self):
+        self.client.sendto(b"(init Team1(goalie)(version 16))\0", (self.server.host, self.server.port))
+        payload, address = self._receive(b"(init")
+        self.assertEqual(payload, b"(init l 1 before_kick_off)\0")
+        self.assertNotEqual(address[1], self.server.port)
+
+        self.client.sendto(b"(synch_see)\0", address)
+        self._receive(b"(ok synch_see)")
+        self._receive(b"(sense_body")
+        self.client.sendto(b"(dash 100)(turn_neck 10)\0", address)
+        self._receive(b"(sense_body")
+        self._receive(b"(sense_body")
+
+        statistics = self.server.clients[0].statistics
+        self.assertEqual(statistics.commands, 2)
+        self.assertEqual(statistics.response_latency.count, 1)
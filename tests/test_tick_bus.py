@@ -0,0 +1,34 @@
+import threading
+from unittest import TestCase
+
+from tick_bus import TickBus
+
+
+class TestTickBus(TestCase):
+    def test_wait_returns_when_tick_is_reached(self):
+        bus = TickBus()
+        publisher = threading.Timer(0.05, lambda: [bus.publish(tick) for tick in range(1, 11)])
+        publisher.start()
+        self.assertTrue(bus.wait_for_tick(10, timeout=2))
+        publisher.join()
+        self.assertTrue(bus.wait_for_tick(5, timeout=0), "Ticks already reached should not block")
+
+    def test_wait_times_out(self):
+        bus = TickBus()
+        bus.publish(3)
+        self.assertFalse(bus.wait_for_tick(4, timeout=0.05))
+
+    def test_close_wakes_waiters(self):
+        bus = TickBus()
+        threading.Timer(0.05, bus.close).start()
+        self.assertFalse(bus.wait_for_tick(100, timeout=2))
+
+    def test_subscribers_called_once_per_new_tick(self):
+        bus = TickBus()
+        ticks = []
+        bus.subscribe(ticks.append)
+        for tick in [0, 0, 1, 1, 1, 3, 2]:
+            bus.publish(tick)
+        bus.unsubscribe(ticks.append)
+        bus.publish(4)
+        self.assertEqual(ticks, [0, 1, 3])
@@ -0,0 +1,82 @@
+import os
+import queue
+import select
+import socket
+import tempfile
+from unittest import TestCase
+
+from client_connection import Connection
+from player.player_thinker import Thinker
+from traffic_capture import TrafficRecorder, read_capture, INBOUND, OUTBOUND
+from traffic_replay import CaptureReplayer
+
+_SENSE_BODY = b"(sense_body 0 (view_mode high normal) (stamina 8000 1 130600) (speed 0 0) (head_angle 0) (kick 0) " \
+              b"(dash 0) (turn 0) (say 0) (turn_neck 0) (catch 0) (move 0) (change_view 0) (arm (movable 0) " \
+              b"(expires 0) (target 0 0) (count 0)) (focus (target none) (count 0)) (tackle (expires 0) (count 0)) " \
+              b"(collision none) (foul  (charged 0) (card none)))\0"
+
+
+class _Think:
+    def __init__(self):
+        self.input_queue = queue.Queue()
+
+
+class TestTrafficCapture(TestCase):
+    def setUp(self):
+        file, self.path = tempfile.mkstemp(suffix=".rccap")
+        os.close(file)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_records_are_read_back_in_order(self):
+        recorder = TrafficRecorder(self.path)
+        recorder.record(OUTBOUND, b"(init Team1 (version 16))\0", 1.0)
+        recorder.record(INBOUND, memoryview(b"(init l 1 before_kick_off)\0"), 1.5)
+        recorder.close()
+
+        records = list(read_capture(self.path))
+        self.assertEqual([(r.timestamp, r.direction, r.payload) for r in records],
+                         [(1.0, OUTBOUND, b"(init Team1 (version 16))\0"),
+                          (1.5, INBOUND, b"(init l 1 before_kick_off)\0")])
+
+    def test_connection_records_both_directions(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(("127.0.0.1", 0))
+        server.settimeout(1)
+        connection = Connection("127.0.0.1", server.getsockname()[1], _Think(), recorder=TrafficRecorder(self.path))
+        connection.sock.bind(("127.0.0.1", 0))
+        try:
+            connection.action_queue.put("(dash 100)")
+            connection._flush_actions()
+            _, address = server.recvfrom(1024)
+            server.sendto(b"(sense_body 0)", address)
+            server.settimeout(None)
+            select.select([connection.sock], [], [], 1)
+            connection._on_readable()
+            self.assertFalse(connection.think.input_queue.empty())
+            connection.recorder.close()
+        finally:
+            server.close()
+            connection.sock.close()
+
+        records = list(read_capture(self.path))
+        self.assertEqual([(r.direction, r.payload) for r in records],
+                         [(OUTBOUND, b"(dash 100)\0"), (INBOUND, b"(sense_body 0)")])
+
+    def test_step_replay_acts_on_sense_body(self):
+        recorder = TrafficRecorder(self.path)
+        recorder.record(OUTBOUND, b"(init Team1 (version 16))\0")
+        recorder.record(INBOUND, b"(init l 2 before_kick_off)\0")
+        recorder.record(INBOUND, _SENSE_BODY)
+        recorder.close()
+
+        sent = CaptureReplayer(self.path, speed=0).step(Thinker("Team1", "NaN"))
+        self.assertTrue(sent[0].startswith("(move"), "The player should move to its start position after init")
+        self.assertTrue(len(sent) > 1, "The player should act on the sense_body message")
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as file:
+            file.write(b"not a capture")
+        with self.assertRaises(Exception):
+            list(read_capture(self.path))